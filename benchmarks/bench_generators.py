@@ -0,0 +1,263 @@
+"""Benchmark workbook generation throughput, memory and file size.
+
+Each case builds workbooks with one generator and writer backend. Warm runs
+call the generator repeatedly in this process after a warm-up call; cold runs
+start a fresh interpreter per workbook, so they include imports. Batch cases
+go through the generators' multi-workbook APIs. Peak memory is the traced
+allocation peak for warm runs (for batch cases, the calling process only) and
+the interpreter's peak resident set size for cold runs.
+
+Results are compared against benchmarks/baseline.json and any case that is
+slower, uses more memory or writes bigger files than the baseline allows is
+flagged (exit status 1). Run from the repository root:
+
+    python benchmarks/bench_generators.py
+    python benchmarks/bench_generators.py --cases mortgage --repeat 10
+    python benchmarks/bench_generators.py --save-baseline
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import importlib.util
+from contextlib import redirect_stdout
+from io import StringIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PY_DIR = os.path.join(ROOT, 'py')
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Metrics compared against the baseline, and whether higher is better
+METRICS = {
+    'workbooks_per_sec': True,
+    'peak_memory_bytes': False,
+    'output_bytes': False
+}
+
+def load_module(script_file):
+    """Import a generator script from the py folder."""
+    module_name = os.path.splitext(script_file)[0].replace('-', '_')
+    if module_name not in sys.modules:
+        if PY_DIR not in sys.path:
+            sys.path.insert(0, PY_DIR)
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(PY_DIR, script_file))
+        module = importlib.util.module_from_spec(spec)
+        # Registered first so batch APIs can pickle work for their pools
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+def single(script_file, entry_point, **kwargs):
+    """A case that writes one workbook per call."""
+    def run(out_dir, options):
+        getattr(load_module(script_file), entry_point)(os.path.join(out_dir, 'workbook.xlsx'), **kwargs)
+        return 1
+    return run
+
+def mortgage_batch(out_dir, options):
+    tape = os.path.join(out_dir, 'tape.csv')
+    with open(tape, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['loan_id', 'price', 'down_payment', 'rate', 'term'])
+        for i in range(options.batch_size):
+            writer.writerow([i, 250000 + i * 1000, 50000, f"{5 + i % 10 * 0.125}%", 30 if i % 2 else 15])
+    module = load_module('mortgage-calculator-generator.py')
+    module.generate_mortgage_batch(tape, os.path.join(out_dir, 'out'), workers=options.workers)
+    os.remove(tape)
+    return options.batch_size
+
+def inspection_batch(out_dir, options):
+    properties = [{'report_id': str(i), 'property_address': f"{i} Main St", 'year_built': 1950 + i % 70}
+                  for i in range(options.batch_size)]
+    module = load_module('home-inspection-excel-python.py')
+    module.generate_inspection_batch(properties, output_dir=os.path.join(out_dir, 'out'), workers=options.workers)
+    return options.batch_size
+
+# Case name -> callable(out_dir, options) that writes workbooks and returns how many
+CASES = {
+    'mortgage/openpyxl': single('mortgage-calculator-generator.py', 'create_mortgage_calculator'),
+    'mortgage/write-only': single('mortgage-calculator-generator.py', 'create_mortgage_calculator', streaming=True),
+    'mortgage/raw': single('mortgage-calculator-generator.py', 'create_mortgage_calculator', backend='raw'),
+    'mortgage/evaluate': single('mortgage-calculator-generator.py', 'create_mortgage_calculator', evaluate=True),
+    'mortgage/compact': single('mortgage-calculator-generator.py', 'create_mortgage_calculator', compact=True),
+    'mortgage/batch': mortgage_batch,
+    'budget/openpyxl': single('development-budget-generator.py', 'generate_real_estate_budget', seed=0),
+    'budget/raw': single('development-budget-generator.py', 'generate_real_estate_budget', backend='raw', seed=0),
+    'inspection/openpyxl': single('home-inspection-excel-python.py', 'create_home_inspection_excel'),
+    'inspection/raw': single('home-inspection-excel-python.py', 'create_home_inspection_excel', backend='raw'),
+    'inspection/batch': inspection_batch
+}
+
+def directory_size(path):
+    """Total size of the workbooks under ``path``."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files if f.endswith('.xlsx'))
+    return total
+
+def run_once(case, options):
+    """Run a case in a scratch directory; returns (seconds, workbooks, output bytes)."""
+    out_dir = tempfile.mkdtemp(prefix='rexl_bench_')
+    try:
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            count = CASES[case](out_dir, options)
+            seconds = time.perf_counter() - start
+        return seconds, count, directory_size(out_dir)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+def measure_warm(case, options):
+    """Median throughput over ``options.repeat`` calls after a warm-up call."""
+    run_once(case, options)
+    runs = [run_once(case, options) for _ in range(options.repeat)]
+    seconds = statistics.median(run[0] for run in runs)
+
+    # Memory is measured on a separate call, since tracing slows everything down
+    tracemalloc.start()
+    try:
+        run_once(case, options)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'workbooks_per_sec': runs[0][1] / seconds,
+        'seconds': seconds,
+        'peak_memory_bytes': peak,
+        'output_bytes': runs[0][2]
+    }
+
+def measure_cold(case, options):
+    """Median throughput when every run starts a new interpreter."""
+    runs = []
+    for _ in range(options.repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--cold-run', case,
+             '--batch-size', str(options.batch_size), '--workers', str(options.workers)],
+            stdout=subprocess.PIPE, text=True, check=True
+        )
+        child = json.loads(completed.stdout.splitlines()[-1])
+        runs.append((time.perf_counter() - start, child))
+    seconds = statistics.median(run[0] for run in runs)
+    return {
+        'workbooks_per_sec': runs[0][1]['workbooks'] / seconds,
+        'seconds': seconds,
+        # Resident set size of the whole interpreter rather than traced allocations
+        'peak_memory_bytes': max(run[1]['max_rss_kb'] for run in runs) * 1024,
+        'output_bytes': runs[0][1]['output_bytes']
+    }
+
+def cold_run(case, options):
+    """Child side of measure_cold: run once and print the result as JSON."""
+    import resource
+    seconds, count, size = run_once(case, options)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'seconds': seconds,
+        'workbooks': count,
+        'output_bytes': size,
+        'max_rss_kb': rss // 1024 if sys.platform == 'darwin' else rss
+    }))
+
+def compare(results, baseline, tolerance):
+    """Return regression messages for results that are worse than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = expected.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{key}: {metric} {old:,.1f} -> {new:,.1f} ({change:+.0%})")
+    return regressions
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE) as f:
+            return json.load(f)
+    except OSError:
+        return {'machine': None, 'results': {}}
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the workbook generators.")
+    parser.add_argument('--cases', nargs='*', default=None,
+                        help="case names or prefixes to run (default: all); e.g. mortgage budget/raw")
+    parser.add_argument('--modes', nargs='*', choices=['warm', 'cold'], default=['warm', 'cold'],
+                        help="warm: repeated calls in this process; cold: a new interpreter per run")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per case and mode (median is kept)")
+    parser.add_argument('--batch-size', type=int, default=20, help="workbooks per batch case run")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes for batch cases")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed relative change before a metric counts as a regression")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--cold-run', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.cold_run:
+        cold_run(options.cold_run, options)
+        return 0
+
+    cases = [case for case in CASES
+             if not options.cases or any(case == name or case.startswith(name.rstrip('/') + '/')
+                                         for name in options.cases)]
+    results = {}
+    print(f"{'case':<28}{'mode':<6}{'wb/s':>10}{'peak MiB':>10}{'bytes':>12}")
+    for case in cases:
+        for mode in options.modes:
+            result = measure_warm(case, options) if mode == 'warm' else measure_cold(case, options)
+            results[f"{case}:{mode}"] = result
+            print(f"{case:<28}{mode:<6}{result['workbooks_per_sec']:>10.1f}"
+                  f"{result['peak_memory_bytes'] / 1048576:>10.1f}{result['output_bytes']:>12,}")
+
+    report = {'machine': machine_info(), 'results': results}
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    baseline = load_baseline()
+    if options.save_baseline:
+        baseline['machine'] = report['machine']
+        baseline['results'].update(results)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {os.path.relpath(BASELINE_FILE)}")
+        return 0
+
+    if baseline['machine'] and baseline['machine'] != report['machine']:
+        print(f"\nNote: the baseline was recorded on a different machine: {baseline['machine']}")
+    regressions = compare(results, baseline['results'], options.tolerance)
+    if regressions:
+        print(f"\nRegressions (tolerance {options.tolerance:.0%}):")
+        for message in regressions:
+            print(f"- {message}")
+        return 1
+    print(f"\nNo regressions against the baseline ({len(baseline['results'])} entries).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
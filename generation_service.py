@@ -0,0 +1,471 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import traceback
+import multiprocessing
+from contextlib import redirect_stdout
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from run_all_scripts import GENERATORS, load_generator, load_output
+
+# Service names of the registered generators
+SERVICE_GENERATORS = {
+    'budget': 'development-budget-generator.py',
+    'inspection': 'home-inspection-excel-python.py',
+    'mortgage': 'mortgage-calculator-generator.py'
+}
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Jobs waiting for a worker beyond this are turned away with 503
+DEFAULT_QUEUE_SIZE = 64
+
+# Largest request body accepted (generator parameters are small JSON objects)
+MAX_BODY_BYTES = 1024 * 1024
+
+# Seconds a client gets to send its request
+REQUEST_TIMEOUT = 30
+
+# Seconds clients are asked to wait before retrying a rejected job
+RETRY_AFTER = 1
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    408: 'Request Timeout', 413: 'Payload Too Large', 500: 'Internal Server Error',
+    503: 'Service Unavailable'
+}
+
+class RequestError(Exception):
+    """A request the service answers with an error status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Parameter checks. Each takes the value and the parameter's name and returns
+# the value to pass on, or raises ValueError. Choices such as forecast_type and
+# payment_type are left to the generators, whose ValueErrors are also answered
+# with 400.
+
+def number(low, high):
+    def check(value, name):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+            raise ValueError(f"{name} must be a number from {low:g} to {high:g}")
+        return value
+    return check
+
+def integer(low, high):
+    def check(value, name):
+        if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+            raise ValueError(f"{name} must be a whole number from {low} to {high}")
+        return value
+    return check
+
+def text(max_length=200):
+    def check(value, name):
+        if not isinstance(value, str) or len(value) > max_length:
+            raise ValueError(f"{name} must be text of at most {max_length} characters")
+        return value
+    return check
+
+def boolean(value, name):
+    if not isinstance(value, bool):
+        raise ValueError(f"{name} must be true or false")
+    return value
+
+def cell_value(value, name):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return text()(value, name)
+
+def iso_date(value, name):
+    try:
+        return datetime.date.fromisoformat(text(10)(value, name))
+    except ValueError:
+        raise ValueError(f"{name} must be a date as YYYY-MM-DD")
+
+def optional(check):
+    def check_optional(value, name):
+        return None if value is None else check(value, name)
+    return check_optional
+
+def array(item, max_items):
+    def check(value, name):
+        if not isinstance(value, list) or len(value) > max_items:
+            raise ValueError(f"{name} must be a list of at most {max_items} items")
+        return [item(entry, f"{name}[{index}]") for index, entry in enumerate(value)]
+    return check
+
+def table(key, item, max_items):
+    """A JSON object with any keys (JSON keys are text, so ``key`` may convert them)."""
+    def check(value, name):
+        if not isinstance(value, dict) or len(value) > max_items:
+            raise ValueError(f"{name} must be an object with at most {max_items} entries")
+        return {key(entry, f"{name} key"): item(value[entry], f"{name}[{entry!r}]") for entry in value}
+    return check
+
+def fields(allowed, required=()):
+    """A JSON object with only the ``allowed`` keys, each with its own check."""
+    def check(value, name):
+        if not isinstance(value, dict):
+            raise ValueError(f"{name} must be an object")
+        return check_fields(value, allowed, required, f"{name}.")
+    return check
+
+def check_fields(value, allowed, required=(), prefix=''):
+    for key in value:
+        if key not in allowed:
+            raise ValueError(f"{prefix}{key} is not accepted; expected one of {sorted(allowed)}")
+    for key in required:
+        if key not in value:
+            raise ValueError(f"{prefix}{key} is required")
+    return {key: allowed[key](entry, f"{prefix}{key}") for key, entry in value.items()}
+
+def payment_number(value, name):
+    try:
+        return integer(1, 1040)(int(value), name)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a payment number from 1 to 1040")
+
+AMOUNT = number(0, 1e9)
+LUMP_SUMS = optional(table(payment_number, AMOUNT, 120))
+
+# Keyword arguments the service passes to each generator. Anything else,
+# including the output filename and parameters that name server-side files
+# (cost_breakdown), is rejected, and sizes are capped so that a single
+# request cannot keep a worker busy indefinitely.
+SERVICE_PARAMETERS = {
+    'budget': {
+        'project_name': text(),
+        'project_address': text(),
+        'project_size': number(1, 1e8),
+        'project_type': text(),
+        'forecast_periods': integer(1, 240),
+        'forecast_type': text(20),
+        'forecast_curve': optional(text(20)),
+        'forecast_start': optional(iso_date),
+        'backend': text(20),
+        'seed': optional(integer(-2 ** 63, 2 ** 63 - 1)),
+        'streaming': optional(boolean)
+    },
+    'inspection': {
+        'use_pandas': boolean,
+        'template': optional(fields({
+            'summary_areas': array(text(100), 50),
+            'areas': table(text(31), array(text(200), 100), 50)
+        }, required=('summary_areas', 'areas'))),
+        'property_details': optional(table(text(50), optional(cell_value), 20)),
+        'backend': text(20)
+    },
+    'mortgage': {
+        'streaming': boolean,
+        'loan': optional(fields({
+            'purchase_price': AMOUNT,
+            'down_payment': AMOUNT,
+            'interest_rate': number(0, 1),
+            'loan_term': integer(1, 40),
+            'property_tax': AMOUNT,
+            'insurance': AMOUNT,
+            'pmi_rate': number(0, 1),
+            'payment_type': text(20),
+            'payment_frequency': text(30),
+            'extra_payment': AMOUNT,
+            'lump_sums': LUMP_SUMS
+        })),
+        'amortization': text(20),
+        'scenarios': optional(fields({
+            'rates': array(number(0, 1), 25),
+            'terms': array(number(1, 40), 10),
+            'down_payments': array(number(0, 1), 25),
+            'metric': text(30)
+        }, required=('rates', 'terms', 'down_payments'))),
+        'backend': text(20),
+        'evaluate': boolean,
+        'non_volatile': boolean,
+        'compact': boolean,
+        'strategies': optional(array(fields({
+            'name': text(100),
+            'payment_frequency': text(30),
+            'extra_payment': AMOUNT,
+            'lump_sums': LUMP_SUMS
+        }), 50))
+    }
+}
+
+def check_params(name, params):
+    """Check a request's generator parameters against SERVICE_PARAMETERS.
+
+    Returns the keyword arguments to pass on; raises ValueError for anything
+    not accepted.
+    """
+    return check_fields(params, SERVICE_PARAMETERS[name])
+
+def render_workbook(script_file, params, output_path=None):
+    """Run a generator in a pool worker.
+
+    Returns the workbook bytes, built in memory, or ``output_path`` once the
+    workbook is written there when a path is given.
+    """
+    stdout = StringIO()
+    with redirect_stdout(stdout):
+        data = load_output().workbook_bytes(load_generator(script_file), **params)
+
+    # Generators report some failures by printing rather than raising
+    if not data:
+        lines = stdout.getvalue().strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"{script_file} did not write a workbook")
+    if output_path is None:
+        return data
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return output_path
+
+class GenerationService:
+    """Queue generator jobs and run them on a fixed pool of worker processes.
+
+    At most ``workers`` jobs run at once and ``queue_size`` more wait for a
+    worker; jobs beyond that are rejected straight away so a burst of
+    requests cannot pile up unbounded work.
+    """
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, output_dir=os.path.join('xl', 'service')):
+        self.workers = workers or os.cpu_count() or 1
+        self.output_dir = output_dir
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.pool = None
+        self.dispatchers = []
+        self.started = time.time()
+        self.running = 0
+        self.job_count = 0
+        self.metrics = {
+            'accepted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'queue_wait_s': 0.0,
+            'run_s': 0.0,
+            'by_generator': {name: {'completed': 0, 'failed': 0} for name in SERVICE_GENERATORS}
+        }
+
+    async def start(self):
+        """Start the worker pool and one dispatcher per worker."""
+        # Forked workers would inherit open client sockets and hold connections
+        # open after a response, so they start from a clean fork server instead
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the dispatchers and shut the worker pool down."""
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, name, params, return_path=False):
+        """Queue a job and return the future for its result, or None when the queue is full."""
+        self.job_count += 1
+        output_path = None
+        if return_path:
+            os.makedirs(self.output_dir, exist_ok=True)
+            output_file = f"{self.job_count:06d}-{GENERATORS[SERVICE_GENERATORS[name]]['output']}"
+            output_path = os.path.abspath(os.path.join(self.output_dir, output_file))
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((name, params, output_path, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.metrics['rejected'] += 1
+            return None
+        self.metrics['accepted'] += 1
+        return future
+
+    async def dispatch(self):
+        """Feed queued jobs to the pool, one at a time."""
+        loop = asyncio.get_running_loop()
+        while True:
+            name, params, output_path, future, queued_at = await self.queue.get()
+            started = time.perf_counter()
+            self.metrics['queue_wait_s'] += started - queued_at
+            self.running += 1
+            try:
+                result = await loop.run_in_executor(self.pool, render_workbook, SERVICE_GENERATORS[name],
+                                                    params, output_path)
+            except Exception as e:
+                self.metrics['failed'] += 1
+                self.metrics['by_generator'][name]['failed'] += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.metrics['completed'] += 1
+                self.metrics['by_generator'][name]['completed'] += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.running -= 1
+                self.metrics['run_s'] += time.perf_counter() - started
+                self.queue.task_done()
+
+    def health(self):
+        """Service status for the /health endpoint."""
+        return {
+            'status': 'ok',
+            'uptime_s': round(time.time() - self.started, 3),
+            'workers': self.workers,
+            'generators': sorted(SERVICE_GENERATORS)
+        }
+
+    def snapshot(self):
+        """Counters and queue state for the /metrics endpoint."""
+        finished = self.metrics['completed'] + self.metrics['failed']
+        return dict(self.metrics,
+                    queue_wait_s=round(self.metrics['queue_wait_s'], 3),
+                    run_s=round(self.metrics['run_s'], 3),
+                    mean_run_s=round(self.metrics['run_s'] / finished, 3) if finished else None,
+                    queued=self.queue.qsize(),
+                    queue_size=self.queue.maxsize,
+                    running=self.running,
+                    workers=self.workers)
+
+    async def route(self, method, target, body):
+        """Answer one request. Returns ``(status, content_type, payload, headers)``."""
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, 'application/json', self.health(), {}
+        if url.path == '/metrics':
+            return 200, 'application/json', self.snapshot(), {}
+
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'generate':
+            raise RequestError(404, f"unknown path {url.path}")
+        name = parts[1]
+        if name not in SERVICE_GENERATORS:
+            raise RequestError(404, f"generator must be one of {sorted(SERVICE_GENERATORS)}, not {name!r}")
+        if method != 'POST':
+            raise RequestError(405, "jobs are submitted with POST")
+
+        # The body holds the generator's keyword arguments
+        try:
+            params = json.loads(body or b'{}')
+        except ValueError as e:
+            raise RequestError(400, f"body must be a JSON object: {e}")
+        if not isinstance(params, dict):
+            raise RequestError(400, "body must be a JSON object")
+        try:
+            params = check_params(name, params)
+        except ValueError as e:
+            raise RequestError(400, str(e))
+
+        query = parse_qs(url.query)
+        return_path = query.get('return', ['bytes'])[0] == 'path'
+        future = self.submit(name, params, return_path)
+        if future is None:
+            raise RequestError(503, "job queue is full, retry later")
+
+        try:
+            result = await future
+        except (TypeError, ValueError, RuntimeError) as e:
+            # Parameter values the generator rejected, or failures it reported
+            raise RequestError(400, f"{type(e).__name__}: {e}")
+        except Exception as e:
+            raise RequestError(500, f"{type(e).__name__}: {e}")
+
+        if return_path:
+            return 200, 'application/json', {'path': result}, {}
+        filename = GENERATORS[SERVICE_GENERATORS[name]]['output']
+        return 200, XLSX_CONTENT_TYPE, result, {'Content-Disposition': f'attachment; filename="{filename}"'}
+
+    async def handle(self, reader, writer):
+        """Read one HTTP/1.1 request from a connection, answer it and close it."""
+        headers = {}
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+                lines = head.decode('latin-1').split('\r\n')
+                method, target, _ = lines[0].split(' ', 2)
+                request_headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        request_headers[key.strip().lower()] = value.strip()
+
+                length = int(request_headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    raise RequestError(413, f"request body over {MAX_BODY_BYTES} bytes")
+                body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT) if length else b''
+                status, content_type, payload, headers = await self.route(method.upper(), target, body)
+            except RequestError as e:
+                status, content_type, payload = e.status, 'application/json', {'error': str(e)}
+                if e.status == 503:
+                    headers = {'Retry-After': str(RETRY_AFTER)}
+            except asyncio.TimeoutError:
+                status, content_type, payload = 408, 'application/json', {'error': "request timed out"}
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                status, content_type, payload = 400, 'application/json', {'error': "malformed HTTP request"}
+            except Exception:
+                traceback.print_exc()
+                status, content_type, payload = 500, 'application/json', {'error': "internal error"}
+
+            if not isinstance(payload, bytes):
+                payload = json.dumps(payload).encode('utf-8')
+            response = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                        f"Content-Type: {content_type}",
+                        f"Content-Length: {len(payload)}",
+                        "Connection: close"]
+            response.extend(f"{key}: {value}" for key, value in headers.items())
+            writer.write(('\r\n'.join(response) + '\r\n\r\n').encode('latin-1') + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def serve(host='127.0.0.1', port=8765, socket_path=None, workers=None, queue_size=DEFAULT_QUEUE_SIZE,
+                output_dir=os.path.join('xl', 'service')):
+    """Run the generation service until cancelled.
+
+    Listens on ``host``:``port``, or on a Unix socket when ``socket_path`` is set.
+    """
+    service = GenerationService(workers, queue_size, output_dir)
+    await service.start()
+    if socket_path:
+        server = await asyncio.start_unix_server(service.handle, path=socket_path)
+        address = socket_path
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        address = f"http://{host}:{port}"
+
+    print(f"Generation service on {address} ({service.workers} workers, queue of {queue_size})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def parse_args(argv=None):
+    """Parse command line options for the service."""
+    parser = argparse.ArgumentParser(description="Serve the /py generators over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on")
+    parser.add_argument('--socket', default=None, metavar='PATH', help="listen on a Unix socket instead")
+    parser.add_argument('-j', '--workers', type=int, default=0,
+                        help="worker processes generating workbooks (0 = one per CPU)")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="jobs that may wait for a worker before new ones are rejected with 503")
+    parser.add_argument('--output-dir', default=os.path.join('xl', 'service'),
+                        help="where workbooks requested with ?return=path are written")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, args.workers or None, args.queue_size,
+                          args.output_dir))
+    except KeyboardInterrupt:
+        pass
@@ -1,226 +1,226 @@
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.formatting.rule import CellIsRule
 from openpyxl.chart import PieChart, LineChart, Reference
-from datetime import datetime, timedelta
-import random
-import math
+from openpyxl.chart.series import SeriesLabel
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import os
+import argparse
+import csv
+import json
+import re
 import traceback
+from rexl.streaming import BACKENDS, SheetWriter, new_workbook
+from rexl.instrument import phase
+from rexl.output import describe
+from rexl.budget import SECTION_NAMES, build_budget_model, line_item_curves, load_cost_breakdown
+from rexl.forecast import forecast_matrix, period_labels
+from rexl.styles import register_styles, TITLE, HEADING_1, HEADER, CURRENCY, CURRENCY_WHOLE, PERCENT_SHORT, INTEGER
 
+# Budgets with more line items than this are written in streaming mode by default
+LARGE_BUDGET_ITEMS = 1000
+
+@phase()
 def generate_real_estate_budget(filename="Real_Estate_Development_Budget.xlsx", 
                                project_name="Your Project Name",
                                project_address="Your Project Address",
                                project_size=100000,  # SF
                                project_type="Commercial Development",
                                forecast_periods=24,
-                               forecast_type="Monthly"):
-    """Generate a comprehensive real estate development budget Excel workbook."""
+                               forecast_type="Monthly",
+                               backend="openpyxl",
+                               seed=None,
+                               model=None,
+                               forecast_curve=None,
+                               forecast_start=None,
+                               cost_breakdown=None,
+                               streaming=None):
+    """Generate a comprehensive real estate development budget Excel workbook.
+    
+    ``filename`` is a path or a writable binary file object (see rexl.output).
+    backend="raw" writes the sheet XML directly instead of through openpyxl cells.
+    Amounts come from ``model`` (see rexl.budget.build_budget_model), or from a
+    model built with ``seed``; without either they are random on every call.
+    
+    The Forecast sheet spreads each line item over ``forecast_periods`` periods
+    of ``forecast_type`` ("Monthly", "Quarterly" or "Annual") starting at
+    ``forecast_start`` (default today). ``forecast_curve`` names one curve from
+    rexl.forecast.CURVES for every item; by default hard costs follow an
+    S-curve, soft costs are front-loaded and land is spent upfront.
+    
+    ``cost_breakdown`` is a MasterFormat-style CSV with one row per line item
+    (see rexl.budget.load_cost_breakdown) to use instead of generated amounts.
+    With ``streaming`` (by default, for more than LARGE_BUDGET_ITEMS items)
+    openpyxl sheets are write-only and rows go straight to disk.
+    """
     print(f"Generating real estate development budget for: {project_name}")
     
     try:
-        # Create a new Excel workbook
-        wb = openpyxl.Workbook()
-        
-        # Define basic structure for budget
-        budget_structure = {
-            "hardCosts": [
-                {"category": "Site Work", "items": ["Site Preparation", "Excavation", "Landscaping"]},
-                {"category": "Structure", "items": ["Framing", "Concrete", "Roofing"]},
-                {"category": "Mechanical", "items": ["HVAC", "Plumbing", "Electrical"]},
-                {"category": "Finishes", "items": ["Drywall", "Flooring", "Paint"]},
-                {"category": "Contingency", "items": ["Construction Contingency"]}
-            ],
-            "softCosts": [
-                {"category": "Professional Fees", "items": ["Architecture", "Engineering", "Legal"]},
-                {"category": "Permits & Fees", "items": ["Building Permits", "Impact Fees"]},
-                {"category": "Financing", "items": ["Loan Fees", "Interest"]},
-                {"category": "Marketing", "items": ["Marketing Materials", "Promotions"]},
-                {"category": "Contingency", "items": ["Soft Cost Contingency"]}
-            ],
-            "other": [
-                {"category": "Land", "items": ["Land Acquisition", "Closing Costs"]},
-                {"category": "Taxes & Insurance", "items": ["Property Taxes", "Insurance"]}
-            ]
-        }
-
-        # Generate budget data
-        budget_data = {}
-        section_totals = {"hardCosts": 0, "softCosts": 0, "other": 0}
-        category_totals = {}
-        line_items_data = []
-        
-        # Values to control relative size of each section
-        section_multipliers = {"hardCosts": 5, "softCosts": 3, "other": 2}
+        with phase("budget_data"):
+            # Line items and totals come from the data model; the same seed gives the same budget
+            if model is None:
+                model = load_cost_breakdown(cost_breakdown) if cost_breakdown else build_budget_model(seed)
+            line_items_data = model["line_items"]
+            section_totals = model["section_totals"]
+            total_budget = model["total_budget"]
+            amounts = np.array([item["amount"] for item in line_items_data], dtype=float)
         
-        # Process each section
-        for section, categories in budget_structure.items():
-            section_multiplier = section_multipliers[section]
-            
-            for category in categories:
-                category_name = category["category"]
-                category_total = 0
-                
-                for item in category["items"]:
-                    # Generate a realistic amount
-                    base_amount = random.randint(5, 50) * 10000 * section_multiplier
-                    
-                    # Adjust special items
-                    if item == "Land Acquisition":
-                        base_amount = random.randint(30, 50) * 100000
-                    elif "Contingency" in item:
-                        # Set contingency as % of costs so far
-                        if section == "hardCosts":
-                            base_amount = int(section_totals["hardCosts"] * 0.05)
-                        elif section == "softCosts":
-                            base_amount = int(section_totals["softCosts"] * 0.05)
-                    
-                    budget_data[f"{section}_{category_name}_{item}"] = base_amount
-                    category_total += base_amount
-                    
-                    # Store line item data
-                    line_items_data.append({
-                        "section": section,
-                        "section_name": section.replace("hardCosts", "HARD COSTS")
-                                              .replace("softCosts", "SOFT COSTS")
-                                              .replace("other", "OTHER COSTS"),
-                        "category": category_name,
-                        "item": item,
-                        "amount": base_amount
-                    })
-                
-                category_totals[f"{section}_{category_name}"] = category_total
-                section_totals[section] += category_total
-        
-        total_budget = sum(section_totals.values())
+        with phase("workbook"):
+            # Create a new Excel workbook; large budgets stream their rows to disk
+            if streaming is None:
+                streaming = len(line_items_data) > LARGE_BUDGET_ITEMS
+            wb = new_workbook(backend, write_only=streaming)
+            register_styles(wb)
         
         # Set up sheets
         if "Sheet" in wb.sheetnames:
             del wb["Sheet"]
         
-        summary_sheet = wb.create_sheet("Summary", 0)
-        detailed_sheet = wb.create_sheet("Detailed Budget", 1)
-        forecast_sheet = wb.create_sheet("Forecast", 2)
+        summary_sheet = SheetWriter(wb.create_sheet("Summary", 0))
+        detailed_sheet = SheetWriter(wb.create_sheet("Detailed Budget", 1))
+        forecast_sheet = SheetWriter(wb.create_sheet("Forecast", 2))
         
-        # Basic setup for summary sheet
-        summary_sheet['A1'] = "REAL ESTATE DEVELOPMENT BUDGET"
-        summary_sheet['A1'].font = Font(bold=True, size=16)
-        summary_sheet.merge_cells('A1:C1')
-        summary_sheet['A1'].alignment = Alignment(horizontal='center')
+        with phase("summary_sheet"):
+            # Basic setup for summary sheet
+            summary_sheet['A1'] = "REAL ESTATE DEVELOPMENT BUDGET"
+            summary_sheet['A1'].style = TITLE
+            summary_sheet.merge_cells('A1:C1')
         
-        # Project Information
-        row = 3
-        summary_sheet['A3'] = "Project Name:"
-        summary_sheet['B3'] = project_name
-        summary_sheet['A4'] = "Project Address:"
-        summary_sheet['B4'] = project_address
-        summary_sheet['A5'] = "Project Size:"
-        summary_sheet['B5'] = f"{project_size:,} SF"
-        summary_sheet['A6'] = "Date Created:"
-        summary_sheet['B6'] = datetime.now().strftime("%m/%d/%Y")
+            # Project Information
+            row = 3
+            summary_sheet['A3'] = "Project Name:"
+            summary_sheet['B3'] = project_name
+            summary_sheet['A4'] = "Project Address:"
+            summary_sheet['B4'] = project_address
+            summary_sheet['A5'] = "Project Size:"
+            summary_sheet['B5'] = f"{project_size:,} SF"
+            summary_sheet['A6'] = "Date Created:"
+            summary_sheet['B6'] = datetime.now().strftime("%m/%d/%Y")
         
-        # Budget Summary
-        summary_sheet['A8'] = "BUDGET SUMMARY"
-        summary_sheet['A8'].font = Font(bold=True)
+            # Budget Summary
+            summary_sheet['A8'] = "BUDGET SUMMARY"
+            summary_sheet['A8'].style = HEADER
         
-        summary_sheet['A10'] = "Category"
-        summary_sheet['B10'] = "Amount"
-        summary_sheet['C10'] = "% of Total"
+            summary_sheet['A10'] = "Category"
+            summary_sheet['B10'] = "Amount"
+            summary_sheet['C10'] = "% of Total"
         
-        # Hard Costs
-        summary_sheet['A11'] = "Hard Costs"
-        summary_sheet['B11'] = section_totals["hardCosts"]
-        summary_sheet['B11'].number_format = '"$"#,##0'
-        summary_sheet['C11'] = section_totals["hardCosts"] / total_budget
-        summary_sheet['C11'].number_format = '0.0%'
+            # Hard Costs
+            summary_sheet['A11'] = "Hard Costs"
+            summary_sheet['B11'] = section_totals["hardCosts"]
+            summary_sheet['B11'].style = CURRENCY_WHOLE
+            summary_sheet['C11'] = section_totals["hardCosts"] / total_budget if total_budget else 0
+            summary_sheet['C11'].style = PERCENT_SHORT
         
-        # Soft Costs
-        summary_sheet['A12'] = "Soft Costs"
-        summary_sheet['B12'] = section_totals["softCosts"]
-        summary_sheet['B12'].number_format = '"$"#,##0'
-        summary_sheet['C12'] = section_totals["softCosts"] / total_budget
-        summary_sheet['C12'].number_format = '0.0%'
+            # Soft Costs
+            summary_sheet['A12'] = "Soft Costs"
+            summary_sheet['B12'] = section_totals["softCosts"]
+            summary_sheet['B12'].style = CURRENCY_WHOLE
+            summary_sheet['C12'] = section_totals["softCosts"] / total_budget if total_budget else 0
+            summary_sheet['C12'].style = PERCENT_SHORT
         
-        # Other Costs
-        summary_sheet['A13'] = "Other Costs"
-        summary_sheet['B13'] = section_totals["other"]
-        summary_sheet['B13'].number_format = '"$"#,##0'
-        summary_sheet['C13'] = section_totals["other"] / total_budget
-        summary_sheet['C13'].number_format = '0.0%'
+            # Other Costs
+            summary_sheet['A13'] = "Other Costs"
+            summary_sheet['B13'] = section_totals["other"]
+            summary_sheet['B13'].style = CURRENCY_WHOLE
+            summary_sheet['C13'] = section_totals["other"] / total_budget if total_budget else 0
+            summary_sheet['C13'].style = PERCENT_SHORT
         
-        # Total
-        summary_sheet['A14'] = "TOTAL"
-        summary_sheet['A14'].font = Font(bold=True)
-        summary_sheet['B14'] = total_budget
-        summary_sheet['B14'].number_format = '"$"#,##0'
-        summary_sheet['C14'] = 1.0
-        summary_sheet['C14'].number_format = '0.0%'
+            # Total
+            summary_sheet['A14'] = "TOTAL"
+            summary_sheet['A14'].style = HEADER
+            summary_sheet['B14'] = total_budget
+            summary_sheet['B14'].style = CURRENCY_WHOLE
+            summary_sheet['C14'] = 1.0
+            summary_sheet['C14'].style = PERCENT_SHORT
         
-        # Add simple pie chart (in a try block in case of chart issues)
-        try:
-            chart = PieChart()
-            chart.title = "Budget Breakdown"
+            # Add simple pie chart (in a try block in case of chart issues)
+            try:
+                chart = PieChart()
+                chart.title = "Budget Breakdown"
             
-            data = Reference(summary_sheet, min_col=2, min_row=11, max_row=13)
-            cats = Reference(summary_sheet, min_col=1, min_row=11, max_row=13)
+                data = Reference(summary_sheet, min_col=2, min_row=11, max_row=13)
+                cats = Reference(summary_sheet, min_col=1, min_row=11, max_row=13)
             
-            chart.add_data(data)
-            chart.set_categories(cats)
+                chart.add_data(data)
+                chart.set_categories(cats)
             
-            chart.height = 10
-            chart.width = 10
+                chart.height = 10
+                chart.width = 10
             
-            summary_sheet.add_chart(chart, 'A16')
-            print("Added pie chart to summary sheet")
-        except Exception as e:
-            print(f"Warning: Could not create pie chart, continuing without it: {str(e)}")
+                summary_sheet.add_chart(chart, 'A16')
+                print("Added pie chart to summary sheet")
+            except Exception as e:
+                print(f"Warning: Could not create pie chart, continuing without it: {str(e)}")
         
-        # Basic setup for detailed sheet
-        detailed_sheet['A1'] = "DETAILED DEVELOPMENT BUDGET"
-        detailed_sheet['A1'].font = Font(bold=True, size=16)
-        detailed_sheet.merge_cells('A1:E1')
-        detailed_sheet['A1'].alignment = Alignment(horizontal='center')
+        setup_detailed_sheet(detailed_sheet, model, project_size)
         
-        # Column Headers
-        detailed_sheet['A3'] = "Category"
-        detailed_sheet['B3'] = "Line Item"
-        detailed_sheet['C3'] = "Budget Amount"
-        detailed_sheet['D3'] = "Cost per SF"
-        detailed_sheet['E3'] = "% of Total"
+        with phase("forecast_sheet"):
+            # Spread every line item over the forecast periods in one matrix operation
+            curves = line_item_curves(model, forecast_curve)
+            forecast = forecast_matrix(amounts, curves, forecast_periods)
+            period_totals = forecast.sum(axis=0).round(2)
+            cumulative = period_totals.cumsum().round(2)
+            start = forecast_start or datetime.now().date()
+            labels = period_labels(start, forecast_periods, forecast_type)
         
-        for cell in ['A3', 'B3', 'C3', 'D3', 'E3']:
-            detailed_sheet[cell].font = Font(bold=True)
+            forecast_sheet['A1'] = "DEVELOPMENT COST FORECAST"
+            forecast_sheet['A1'].style = TITLE
+            forecast_sheet.merge_cells('A1:D1')
+            forecast_sheet['A2'] = f"{forecast_type} forecast, {forecast_periods} periods from {labels[0]}"
+            forecast_sheet['A2'].style = HEADING_1
+            forecast_sheet.column_dimensions['A'].width = 40
+            forecast_sheet.column_dimensions['B'].width = 28
+            forecast_sheet.column_dimensions['C'].width = 14
+            forecast_sheet.column_dimensions['D'].width = 16
         
-        # Add line items (simplified)
-        row = 4
-        for item in line_items_data:
-            row += 1
-            detailed_sheet[f'A{row}'] = item["section_name"] + ": " + item["category"]
-            detailed_sheet[f'B{row}'] = item["item"]
-            detailed_sheet[f'C{row}'] = item["amount"]
-            detailed_sheet[f'C{row}'].number_format = '"$"#,##0'
-            detailed_sheet[f'D{row}'] = item["amount"] / project_size
-            detailed_sheet[f'D{row}'].number_format = '"$"#,##0.00'
-            detailed_sheet[f'E{row}'] = item["amount"] / total_budget
-            detailed_sheet[f'E{row}'].number_format = '0.0%'
+            # Header row 3, then one row per line item
+            forecast_sheet.append(["Category", "Line Item", "Curve", "Total"] + labels, styles=HEADER)
+            period_styles = [None, None, None, CURRENCY_WHOLE] + [CURRENCY_WHOLE] * forecast_periods
+            for item, curve, period_amounts in zip(line_items_data, curves, forecast.tolist()):
+                forecast_sheet.append([item["section_name"] + ": " + item["category"], item["item"], curve,
+                                       item["amount"]] + period_amounts, styles=period_styles)
         
-        # Add total row
-        row += 2
-        detailed_sheet[f'A{row}'] = "TOTAL PROJECT BUDGET"
-        detailed_sheet[f'A{row}'].font = Font(bold=True)
-        detailed_sheet[f'C{row}'] = total_budget
-        detailed_sheet[f'C{row}'].number_format = '"$"#,##0'
-        detailed_sheet[f'E{row}'] = 1.0
-        detailed_sheet[f'E{row}'].number_format = '0.0%'
+            # Totals by period, running total and share of the budget spent
+            forecast_sheet.append([])
+            total_row = 4 + len(line_items_data) + 1
+            forecast_sheet.append(["PERIOD TOTAL", None, None, total_budget] + period_totals.tolist(),
+                                  styles=[HEADER] + period_styles[1:])
+            forecast_sheet.append(["CUMULATIVE", None, None, None] + cumulative.tolist(),
+                                  styles=[HEADER] + period_styles[1:])
+            # An empty budget has nothing to complete
+            complete = cumulative / total_budget if total_budget else cumulative * 0
+            forecast_sheet.append(["% COMPLETE", None, None, None] + complete.tolist(),
+                                  styles=[HEADER, None, None, None] + [PERCENT_SHORT] * forecast_periods)
+        
+            # Chart the spend per period and the cumulative S-curve
+            try:
+                chart = LineChart()
+                chart.title = "Cost Forecast"
+                chart.y_axis.title = "Cost"
+                chart.x_axis.title = "Period"
+            
+                data = Reference(forecast_sheet, min_col=5, max_col=4 + forecast_periods,
+                                 min_row=total_row, max_row=total_row + 1)
+                cats = Reference(forecast_sheet, min_col=5, max_col=4 + forecast_periods, min_row=3, max_row=3)
+                chart.add_data(data, from_rows=True)
+                chart.set_categories(cats)
+                for series, title in zip(chart.series, ("Period Total", "Cumulative")):
+                    series.tx = SeriesLabel(v=title)
+            
+                chart.height = 10
+                chart.width = 24
+            
+                forecast_sheet.add_chart(chart, f'A{total_row + 4}')
+            except Exception as e:
+                print(f"Warning: Could not create forecast chart, continuing without it: {str(e)}")
         
-        # Basic forecast sheet
-        forecast_sheet['A1'] = "FORECAST - TO BE IMPLEMENTED"
-        forecast_sheet['A1'].font = Font(bold=True, size=16)
+        for sheet in (summary_sheet, detailed_sheet, forecast_sheet):
+            sheet.close()
         
         # Save the workbook
-        wb.save(filename)
-        print(f"Excel workbook created successfully at: {filename}")
+        with phase("save"):
+            wb.save(filename)
+        print(f"Excel workbook created successfully at: {describe(filename)}")
         return filename
     
     except Exception as e:
@@ -228,7 +228,232 @@ def generate_real_estate_budget(filename="Real_Estate_Development_Budget.xlsx",
         traceback.print_exc()
         return None
 
+@phase("detailed_sheet")
+def setup_detailed_sheet(sheet, model, project_size, title="DETAILED DEVELOPMENT BUDGET"):
+    """Write a budget model's line items with cost per SF and share of the total."""
+    sheet['A1'] = title
+    sheet['A1'].style = TITLE
+    sheet.merge_cells('A1:E1')
+    
+    # Column Headers
+    sheet['A3'] = "Category"
+    sheet['B3'] = "Line Item"
+    sheet['C3'] = "Budget Amount"
+    sheet['D3'] = "Cost per SF"
+    sheet['E3'] = "% of Total"
+    
+    for cell in ['A3', 'B3', 'C3', 'D3', 'E3']:
+        sheet[cell].style = HEADER
+    
+    # Add line items, starting after a blank row 4
+    sheet.append([])
+    # Cost per SF and share of the total are computed for all items at once
+    line_items = model["line_items"]
+    total_budget = model["total_budget"]
+    amounts = np.array([item["amount"] for item in line_items], dtype=float)
+    item_styles = [None, None, CURRENCY_WHOLE, CURRENCY, PERCENT_SHORT]
+    per_sf = (amounts / project_size).tolist()
+    shares = (amounts / total_budget if total_budget else amounts * 0).tolist()
+    for item, item_per_sf, share in zip(line_items, per_sf, shares):
+        sheet.append([
+            item["section_name"] + ": " + item["category"],
+            item["item"],
+            item["amount"],
+            item_per_sf,
+            share
+        ], styles=item_styles)
+    
+    # Add total row
+    sheet.append([])
+    sheet.append(["TOTAL PROJECT BUDGET", None, total_budget, None, 1.0],
+                 styles=[HEADER, None, CURRENCY_WHOLE, None, PERCENT_SHORT])
+
+# Project definition keys for generate_portfolio_rollup and their defaults
+PROJECT_DEFAULTS = {
+    'project_name': None,  # "Project <n>" when missing
+    'project_address': "",
+    'project_size': 100000,
+    'project_type': "Commercial Development",
+    'seed': None,
+    'cost_breakdown': None
+}
+
+def project_definition(record, index):
+    """Fill in a portfolio project's defaults; CSV values arrive as strings."""
+    project = {**PROJECT_DEFAULTS, **{key: value for key, value in record.items() if value not in (None, '')}}
+    project['project_name'] = str(project['project_name'] or f"Project {index}")
+    project['project_size'] = float(str(project['project_size']).replace(',', ''))
+    if project['seed'] is not None:
+        project['seed'] = int(project['seed'])
+    return project
+
+def _project_model_key(project, index):
+    """Projects with the same cost breakdown or seed share one model."""
+    if project['cost_breakdown']:
+        return ('cost_breakdown', os.path.abspath(project['cost_breakdown']))
+    if project['seed'] is not None:
+        return ('seed', project['seed'])
+    return ('random', index)
+
+def _build_project_model(project):
+    """Worker task for generate_portfolio_rollup."""
+    if project['cost_breakdown']:
+        return load_cost_breakdown(project['cost_breakdown'])
+    return build_budget_model(project['seed'])
+
+def portfolio_sheet_title(name, used):
+    """A unique worksheet title of at most 31 characters; ``used`` collects lower-cased titles."""
+    title = re.sub(r"[\[\]:*?/\\]", "_", name).strip("'")[:31] or "Project"
+    candidate, number = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({number})"
+        candidate = title[:31 - len(suffix)] + suffix
+        number += 1
+    used.add(candidate.lower())
+    return candidate
+
+@phase()
+def generate_portfolio_rollup(projects, filename="Portfolio_Budget_Rollup.xlsx", workers=None, backend="openpyxl"):
+    """
+    Write one workbook rolling up the development budgets of many projects.
+    
+    projects is a list of dicts keyed like PROJECT_DEFAULTS. Budget models are
+    built in a process pool, once per distinct seed or cost breakdown; the
+    rollup then gets a Portfolio Summary sheet with hard/soft/other totals for
+    the portfolio and each project, followed by one streamed detail sheet per
+    project. filename may also be a writable binary file object.
+    """
+    projects = [project_definition(record, index) for index, record in enumerate(projects, 1)]
+    print(f"Generating portfolio rollup for {len(projects)} projects")
+    
+    with phase("models"):
+        keys = [_project_model_key(project, index) for index, project in enumerate(projects)]
+        jobs = {}
+        for key, project in zip(keys, projects):
+            jobs.setdefault(key, project)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            built = executor.map(_build_project_model, jobs.values(), chunksize=max(1, len(jobs) // 32))
+            models = dict(zip(jobs, built))
+        project_models = [models[key] for key in keys]
+    
+    with phase("workbook"):
+        # Every sheet streams; the per-project rows are written once and never revisited
+        wb = new_workbook(backend, write_only=True)
+        register_styles(wb)
+    
+    with phase("summary_sheet"):
+        # Section totals per project as one matrix: rows are projects, columns sections
+        sections = list(SECTION_NAMES)
+        totals = np.array([[model["section_totals"].get(section, 0) for section in sections]
+                           for model in project_models], dtype=float).reshape(-1, len(sections))
+        sizes = np.array([project['project_size'] for project in projects], dtype=float)
+        project_totals = totals.sum(axis=1)
+        section_totals = totals.sum(axis=0)
+        portfolio_total = float(project_totals.sum())
+        
+        used_titles = {"portfolio summary"}
+        sheet_titles = [portfolio_sheet_title(project['project_name'], used_titles) for project in projects]
+        
+        summary_sheet = SheetWriter(wb.create_sheet("Portfolio Summary"))
+        summary_sheet['A1'] = "PORTFOLIO DEVELOPMENT BUDGET"
+        summary_sheet['A1'].style = TITLE
+        summary_sheet.merge_cells('A1:D1')
+        for column, width in zip("ABCDEFGHIJK", (32, 32, 24, 14, 16, 16, 16, 16, 12, 14, 32)):
+            summary_sheet.column_dimensions[column].width = width
+        
+        summary_sheet['A3'] = "Projects:"
+        summary_sheet['B3'] = len(projects)
+        summary_sheet['A4'] = "Total Size:"
+        summary_sheet['B4'] = f"{float(sizes.sum()):,.0f} SF"
+        summary_sheet['A5'] = "Date Created:"
+        summary_sheet['B5'] = datetime.now().strftime("%m/%d/%Y")
+        
+        # Portfolio totals by section
+        summary_sheet['A7'] = "PORTFOLIO TOTALS"
+        summary_sheet['A7'].style = HEADER
+        for column, label in zip("ABC", ("Category", "Amount", "% of Total")):
+            summary_sheet[f'{column}8'] = label
+            summary_sheet[f'{column}8'].style = HEADER
+        shares = section_totals / portfolio_total if portfolio_total else np.zeros(len(sections))
+        for row, (section, amount, share) in enumerate(zip(sections, section_totals.tolist(), shares.tolist()), 9):
+            summary_sheet[f'A{row}'] = SECTION_NAMES[section].title()
+            summary_sheet[f'B{row}'] = amount
+            summary_sheet[f'B{row}'].style = CURRENCY_WHOLE
+            summary_sheet[f'C{row}'] = share
+            summary_sheet[f'C{row}'].style = PERCENT_SHORT
+        total_row = 9 + len(sections)
+        summary_sheet[f'A{total_row}'] = "TOTAL"
+        summary_sheet[f'A{total_row}'].style = HEADER
+        summary_sheet[f'B{total_row}'] = portfolio_total
+        summary_sheet[f'B{total_row}'].style = CURRENCY_WHOLE
+        summary_sheet[f'C{total_row}'] = 1.0
+        summary_sheet[f'C{total_row}'].style = PERCENT_SHORT
+        
+        # One row per project; cost per SF and portfolio share for all projects at once
+        summary_sheet[f'A{total_row + 2}'] = "PROJECTS"
+        summary_sheet[f'A{total_row + 2}'].style = HEADER
+        summary_sheet.append(["Project", "Address", "Type", "Size (SF)", "Hard Costs", "Soft Costs",
+                              "Other Costs", "Total", "Cost per SF", "% of Portfolio", "Detail Sheet"],
+                             styles=HEADER)
+        row_styles = [None, None, None, INTEGER] + [CURRENCY_WHOLE] * 4 + [CURRENCY, PERCENT_SHORT, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_sf = np.where(sizes > 0, project_totals / sizes, 0.0).tolist()
+        portfolio_shares = (project_totals / portfolio_total if portfolio_total else project_totals * 0).tolist()
+        for project, amounts, total, cost_per_sf, share, title in zip(
+                projects, totals.tolist(), project_totals.tolist(), per_sf, portfolio_shares, sheet_titles):
+            summary_sheet.append([project['project_name'], project['project_address'], project['project_type'],
+                                  project['project_size']] + amounts + [total, cost_per_sf, share, title],
+                                 styles=row_styles)
+        summary_sheet.append([])
+        total_size = float(sizes.sum())
+        summary_sheet.append(["PORTFOLIO TOTAL", None, None, total_size] + section_totals.tolist() +
+                             [portfolio_total, portfolio_total / total_size if total_size else 0, 1.0, None],
+                             styles=[HEADER] + row_styles[1:])
+        
+        try:
+            chart = PieChart()
+            chart.title = "Portfolio Budget Breakdown"
+            chart.add_data(Reference(summary_sheet, min_col=2, min_row=9, max_row=total_row - 1))
+            chart.set_categories(Reference(summary_sheet, min_col=1, min_row=9, max_row=total_row - 1))
+            chart.height = 10
+            chart.width = 10
+            summary_sheet.add_chart(chart, 'E3')
+        except Exception as e:
+            print(f"Warning: Could not create pie chart, continuing without it: {str(e)}")
+        summary_sheet.close()
+    
+    # Detail sheets are streamed one project at a time
+    for project, model, title in zip(projects, project_models, sheet_titles):
+        detail_sheet = SheetWriter(wb.create_sheet(title))
+        setup_detailed_sheet(detail_sheet, model, project['project_size'],
+                             title=f"{project['project_name'].upper()} - DETAILED BUDGET")
+        detail_sheet.close()
+    
+    with phase("save"):
+        wb.save(filename)
+    print(f"Portfolio rollup created at: {describe(filename)} ({len(projects)} projects, {len(jobs)} distinct budgets)")
+    return filename
+
+def read_projects(path):
+    """Read portfolio project definitions from a JSON list, a JSONL file or a CSV file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            return list(csv.DictReader(f))
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a real estate development budget workbook.")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the budget amounts; the same seed gives the same budget")
+    parser.add_argument('--cost-breakdown', help="MasterFormat-style CSV of line items to budget instead of generated amounts")
+    parser.add_argument('--project-size', type=int, default=100000, help="project size in SF for the cost per SF column")
+    parser.add_argument('--portfolio', help="JSON/JSONL/CSV project list; writes one rollup workbook for all projects")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for building portfolio budgets")
+    parser.add_argument('--backend', choices=BACKENDS, default="openpyxl",
+                        help="workbook writer; 'raw' writes the sheet XML directly and is fastest for large budgets")
+    args = parser.parse_args()
+    
     try:
         # Output directory handling with robust error checking
         output_dir = os.environ.get('XL_OUTPUT_DIR', '.')
@@ -254,17 +479,24 @@ if __name__ == "__main__":
             print("Using current directory instead.")
             output_dir = '.'
         
-        # Full path for output file with timestamp to avoid overwriting
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(output_dir, f"Real_Estate_Development_Budget_{timestamp}.xlsx")
-        
-        # Generate the budget
-        result = generate_real_estate_budget(filename=output_file)
+        # Same file name as the entry point's default, so run_all_scripts.py
+        # writes the same workbook whether or not it runs the script isolated
+        output_file = os.path.join(output_dir, "Real_Estate_Development_Budget.xlsx")
         
-        if result:
-            print(f"SUCCESS: Budget file created at: {result}")
+        if args.portfolio:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            rollup_file = os.path.join(output_dir, f"Portfolio_Budget_Rollup_{timestamp}.xlsx")
+            generate_portfolio_rollup(read_projects(args.portfolio), rollup_file, workers=args.workers,
+                                      backend=args.backend)
         else:
-            print("ERROR: Budget file generation failed.")
+            # Generate the budget
+            result = generate_real_estate_budget(filename=output_file, seed=args.seed, project_size=args.project_size,
+                                                 cost_breakdown=args.cost_breakdown, backend=args.backend)
+        
+            if result:
+                print(f"SUCCESS: Budget file created at: {result}")
+            else:
+                print("ERROR: Budget file generation failed.")
     
     except Exception as e:
         print(f"FATAL ERROR: {str(e)}")
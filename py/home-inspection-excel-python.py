@@ -1,30 +1,210 @@
-import pandas as pd
-import numpy as np
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import re
+from rexl.skeleton import cached_skeleton
+from rexl.streaming import BACKENDS, SheetWriter, new_workbook
+from rexl.instrument import phase
+from rexl.output import describe
+from rexl.styles import register_styles, HEADING_1, HEADING_2, HEADING_3, HEADER
 
-def create_home_inspection_excel(filename="Home_Inspection_Tool.xlsx"):
+# Areas listed in the Main Report summary, and the detailed inspection sheets
+# with the items checked on each. Template files (see load_inspection_template)
+# have the same shape.
+DEFAULT_TEMPLATE = {
+    'summary_areas': [
+        'Roof', 'Exterior', 'Foundation', 'Basement', 'Crawlspace', 
+        'Plumbing', 'Electrical', 'HVAC', 'Interior', 'Attic', 
+        'Insulation', 'Ventilation', 'Kitchen', 'Bathrooms', 'Garage'
+    ],
+    'areas': {
+        'Roof': [
+            'Roof Covering', 'Roof Flashing', 'Roof Drainage', 'Skylights', 
+            'Chimneys', 'Roof Penetrations', 'Signs of Leaking', 'Roof Ventilation',
+            'Roof Structure', 'Estimated Remaining Life'
+        ],
+        'Exterior': [
+            'Siding/Cladding', 'Exterior Doors', 'Windows', 'Trim', 
+            'Eaves/Soffits/Fascia', 'Exterior Lighting', 'Walkways', 'Driveway', 
+            'Steps/Stoops', 'Porches/Decks', 'Railings', 'Grading/Drainage',
+            'Vegetation', 'Retaining Walls', 'Fences/Gates'
+        ],
+        'Foundation': [
+            'Foundation Walls', 'Visible Structural Components', 'Signs of Water Penetration',
+            'Cracks', 'Settlement', 'Foundation Type', 'Anchor Bolts', 'Floor Framing',
+            'Wall Framing', 'Support Posts/Columns', 'Support Beams'
+        ],
+        'Plumbing': [
+            'Water Supply Lines', 'Drain/Waste/Vent Pipes', 'Main Water Shut-off',
+            'Water Pressure', 'Water Heater', 'Toilets', 'Sinks', 'Tubs/Showers',
+            'Faucets', 'Visible Leaks', 'Sump Pump', 'Sewage Ejector Pump',
+            'Gas Lines', 'Main Gas Shut-off'
+        ],
+        'Electrical': [
+            'Service Entrance', 'Main Panel', 'Circuit Breakers/Fuses', 'Branch Wiring',
+            'Grounding', 'GFCI Protection', 'AFCI Protection', 'Outlets', 'Switches',
+            'Light Fixtures', 'Ceiling Fans', 'Smoke Detectors', 'Carbon Monoxide Detectors'
+        ],
+        'HVAC': [
+            'Heating System Type', 'Heating System Age', 'Heating Operation', 'Cooling System Type',
+            'Cooling System Age', 'Cooling Operation', 'Distribution System', 'Thermostat',
+            'Filters', 'Humidifier', 'Dehumidifier', 'Ductwork', 'Ventilation'
+        ],
+        'Interior': [
+            'Floors', 'Walls', 'Ceilings', 'Windows', 'Interior Doors', 'Stairs',
+            'Railings', 'Countertops', 'Cabinets', 'Appliances', 'Evidence of Pests',
+            'Evidence of Water Damage', 'Evidence of Mold'
+        ],
+        'Attic': [
+            'Access', 'Insulation Type', 'Insulation Depth', 'Ventilation', 
+            'Visible Electrical', 'Visible Plumbing', 'Visible Framing', 
+            'Signs of Leaking', 'Signs of Pests', 'Exhaust Venting'
+        ]
+    }
+}
+
+# Property and client details that can be prefilled, with the cells they go in
+PROPERTY_FIELDS = {
+    'property_address': [('Main Report', 'B3'), ('Contact Info', 'B9')],
+    'city_state_zip': [('Main Report', 'B4')],
+    'inspection_date': [('Main Report', 'E3')],
+    'inspector_name': [('Main Report', 'E4')],
+    'client_name': [('Main Report', 'B5'), ('Contact Info', 'B3')],
+    'client_phone': [('Main Report', 'E5'), ('Contact Info', 'B4')],
+    'client_email': [('Main Report', 'B6'), ('Contact Info', 'B5')],
+    'weather_conditions': [('Main Report', 'E6')],
+    'year_built': [('Main Report', 'B7'), ('Contact Info', 'B12')],
+    'square_footage': [('Main Report', 'E7'), ('Contact Info', 'D12')]
+}
+
+class WorkbookWriter:
+    """
+    Lightweight stand-in for pandas' ExcelWriter: the sheet functions only use
+    its ``book`` and ``sheets`` attributes, and rows are appended straight to
+    openpyxl without importing pandas. With backend="raw" the sheets are
+    SheetWriters over rexl.rawxlsx sheets.
+    """
+    
+    def __init__(self, filename, backend="openpyxl"):
+        self.filename = filename
+        self.book = new_workbook(backend)
+        # Sheets are added by name, so drop the default empty one
+        if not self.book.write_only:
+            self.book.remove(self.book.active)
+        self.sheets = {}
+    
+    def close(self):
+        for sheet in self.sheets.values():
+            if isinstance(sheet, SheetWriter):
+                sheet.close()
+        self.book.save(self.filename)
+
+def write_rows(writer, sheet_name, rows):
+    """Write a block of rows to a new sheet and return the worksheet"""
+    if isinstance(writer, WorkbookWriter) and writer.book.write_only:
+        # Rows are held as addressed cells until the writer closes, so the
+        # sheet functions can still style them after writing
+        sheet = SheetWriter(writer.book.create_sheet(sheet_name))
+        for row_index, row in enumerate(rows, 1):
+            for column, value in enumerate(row, 1):
+                if value != '':
+                    sheet[f'{get_column_letter(column)}{row_index}'] = value
+        writer.sheets[sheet_name] = sheet
+    elif isinstance(writer, WorkbookWriter):
+        sheet = writer.book.create_sheet(sheet_name)
+        for row in rows:
+            # Blank strings are padding in the layout, not cell content
+            sheet.append([None if value == '' else value for value in row])
+        writer.sheets[sheet_name] = sheet
+    else:
+        import pandas as pd
+        pd.DataFrame(rows).to_excel(writer, sheet_name=sheet_name, index=False, header=False)
+    return writer.sheets[sheet_name]
+
+def load_inspection_template(path):
+    """
+    Load inspection areas and items from a JSON (or, with PyYAML installed,
+    YAML) template file:
+    
+        {"summary_areas": ["Roof", ...],
+         "areas": [{"name": "Roof", "items": ["Roof Covering", ...]}, ...]}
+    
+    Missing sections fall back to DEFAULT_TEMPLATE.
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    
+    template = dict(DEFAULT_TEMPLATE)
+    if 'summary_areas' in data:
+        template['summary_areas'] = [str(area) for area in data['summary_areas']]
+    if 'areas' in data:
+        template['areas'] = {str(area['name']): [str(item) for item in area['items']]
+                             for area in data['areas']}
+    return template
+
+def property_cell_values(details):
+    """Map property details (keyed like PROPERTY_FIELDS) to {sheet: {cell: value}}"""
+    values = {}
+    for field, value in details.items():
+        for sheet_name, cell in PROPERTY_FIELDS.get(field, []):
+            values.setdefault(sheet_name, {})[cell] = value
+    return values
+
+def fill_property_details(writer, details):
+    """Prefill client and property cells from a dict keyed like PROPERTY_FIELDS"""
+    for sheet_name, cells in property_cell_values(details).items():
+        for cell, value in cells.items():
+            writer.sheets[sheet_name][cell] = value
+
+def inspection_skeleton(template=None, backend="openpyxl"):
+    """
+    Blank workbook for a template, built once per process. Prefilled reports
+    are copies of it with only the property cells rewritten.
+    """
+    key = ('inspection', backend, json.dumps(template or DEFAULT_TEMPLATE, sort_keys=True))
+    return cached_skeleton(key, create_home_inspection_excel, template=template, backend=backend)
+
+@phase()
+def create_home_inspection_excel(filename="Home_Inspection_Tool.xlsx", use_pandas=False,
+                                 template=None, property_details=None, backend="openpyxl"):
     """
     Creates a comprehensive home inspection Excel workbook with multiple sheets
     for different areas of inspection, ratings, and data collection.
+    
+    Rows are written directly with openpyxl; pass use_pandas=True to go
+    through pandas' ExcelWriter instead (pandas is then imported on demand).
+    template (a dict from load_inspection_template) replaces the default
+    areas and check items, and property_details prefills the report.
+    backend="raw" writes the sheet XML directly instead of through openpyxl
+    cells (not with use_pandas).
+    filename may also be a writable binary file object (see rexl.output).
     """
-    # Create a Pandas Excel writer using openpyxl as the engine
-    writer = pd.ExcelWriter(filename, engine='openpyxl')
+    if template is None:
+        template = DEFAULT_TEMPLATE
+    if use_pandas and backend != "openpyxl":
+        raise ValueError("use_pandas writes through openpyxl; it cannot be combined with backend='raw'")
+    
+    with phase("workbook"):
+        if use_pandas:
+            import pandas as pd
+            writer = pd.ExcelWriter(filename, engine='openpyxl')
+        else:
+            writer = WorkbookWriter(filename, backend)
+        register_styles(writer.book)
     
     # Create main report sheet
-    create_main_report_sheet(writer)
+    create_main_report_sheet(writer, template['summary_areas'])
     
     # Create individual inspection sheets
-    create_roof_sheet(writer)
-    create_exterior_sheet(writer)
-    create_foundation_sheet(writer)
-    create_plumbing_sheet(writer)
-    create_electrical_sheet(writer)
-    create_hvac_sheet(writer)
-    create_interior_sheet(writer)
-    create_attic_sheet(writer)
+    for area_name, check_items in template['areas'].items():
+        create_inspection_sheet(writer, area_name, check_items)
     
     # Create support sheets
     create_photo_log_sheet(writer)
@@ -34,6 +214,10 @@ def create_home_inspection_excel(filename="Home_Inspection_Tool.xlsx"):
     create_instructions_sheet(writer)
     create_sample_sheet(writer)
     
+    # Prefill the client and property details
+    if property_details:
+        fill_property_details(writer, property_details)
+    
     # Apply formatting and save workbook
     workbook = writer.book
     
@@ -41,11 +225,14 @@ def create_home_inspection_excel(filename="Home_Inspection_Tool.xlsx"):
     workbook.active = workbook['Instructions']
     
     # Save the workbook
-    writer.close()
+    with phase("save"):
+        writer.close()
     
-    print(f"Excel file '{filename}' created successfully!")
+    print(f"Excel file '{describe(filename)}' created successfully!")
+    return filename
 
-def create_main_report_sheet(writer):
+@phase()
+def create_main_report_sheet(writer, inspection_areas=DEFAULT_TEMPLATE['summary_areas']):
     """Create the main inspection report summary sheet"""
     
     # Create data for main sheet
@@ -71,12 +258,6 @@ def create_main_report_sheet(writer):
     ]
     
     # Add rows for each inspection area
-    inspection_areas = [
-        'Roof', 'Exterior', 'Foundation', 'Basement', 'Crawlspace', 
-        'Plumbing', 'Electrical', 'HVAC', 'Interior', 'Attic', 
-        'Insulation', 'Ventilation', 'Kitchen', 'Bathrooms', 'Garage'
-    ]
-    
     for area in inspection_areas:
         main_data.append([area, '', '', '', ''])
     
@@ -88,12 +269,8 @@ def create_main_report_sheet(writer):
         ['', '', '', '', '']
     ])
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(main_data)
-    df.to_excel(writer, sheet_name='Main Report', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Main Report']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Main Report', main_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 20
@@ -103,10 +280,10 @@ def create_main_report_sheet(writer):
     sheet.column_dimensions['E'].width = 15
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
-    sheet['A17'].font = Font(bold=True)
+    sheet['A1'].style = HEADING_2
+    sheet['A17'].style = HEADER
     for col in ['A', 'B', 'C', 'D', 'E']:
-        sheet[f'{col}18'].font = Font(bold=True)
+        sheet[f'{col}18'].style = HEADER
     
     # Add data validation for ratings
     dv = DataValidation(type="list", formula1='"1,2,3,4,5,N/A"', allow_blank=True)
@@ -116,6 +293,7 @@ def create_main_report_sheet(writer):
     for row in range(19, 19 + len(inspection_areas)):
         dv.add(f'B{row}')
 
+@phase()
 def create_inspection_sheet(writer, area_name, check_items):
     """Helper function to create detailed inspection sheets"""
     
@@ -137,12 +315,8 @@ def create_inspection_sheet(writer, area_name, check_items):
         ['', '', '', '']
     ])
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(sheet_data)
-    df.to_excel(writer, sheet_name=area_name, index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets[area_name]
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, area_name, sheet_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 30
@@ -151,9 +325,9 @@ def create_inspection_sheet(writer, area_name, check_items):
     sheet.column_dimensions['D'].width = 15
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
+    sheet['A1'].style = HEADING_2
     for col in ['A', 'B', 'C', 'D']:
-        sheet[f'{col}3'].font = Font(bold=True)
+        sheet[f'{col}3'].style = HEADER
     
     # Add data validation for condition
     dv = DataValidation(type="list", formula1='"1,2,3,4,5,N/A"', allow_blank=True)
@@ -163,80 +337,7 @@ def create_inspection_sheet(writer, area_name, check_items):
     for row in range(4, 4 + len(check_items)):
         dv.add(f'B{row}')
 
-def create_roof_sheet(writer):
-    """Create the roof inspection sheet"""
-    roof_items = [
-        'Roof Covering', 'Roof Flashing', 'Roof Drainage', 'Skylights', 
-        'Chimneys', 'Roof Penetrations', 'Signs of Leaking', 'Roof Ventilation',
-        'Roof Structure', 'Estimated Remaining Life'
-    ]
-    create_inspection_sheet(writer, 'Roof', roof_items)
-
-def create_exterior_sheet(writer):
-    """Create the exterior inspection sheet"""
-    exterior_items = [
-        'Siding/Cladding', 'Exterior Doors', 'Windows', 'Trim', 
-        'Eaves/Soffits/Fascia', 'Exterior Lighting', 'Walkways', 'Driveway', 
-        'Steps/Stoops', 'Porches/Decks', 'Railings', 'Grading/Drainage',
-        'Vegetation', 'Retaining Walls', 'Fences/Gates'
-    ]
-    create_inspection_sheet(writer, 'Exterior', exterior_items)
-
-def create_foundation_sheet(writer):
-    """Create the foundation inspection sheet"""
-    foundation_items = [
-        'Foundation Walls', 'Visible Structural Components', 'Signs of Water Penetration',
-        'Cracks', 'Settlement', 'Foundation Type', 'Anchor Bolts', 'Floor Framing',
-        'Wall Framing', 'Support Posts/Columns', 'Support Beams'
-    ]
-    create_inspection_sheet(writer, 'Foundation', foundation_items)
-
-def create_plumbing_sheet(writer):
-    """Create the plumbing inspection sheet"""
-    plumbing_items = [
-        'Water Supply Lines', 'Drain/Waste/Vent Pipes', 'Main Water Shut-off',
-        'Water Pressure', 'Water Heater', 'Toilets', 'Sinks', 'Tubs/Showers',
-        'Faucets', 'Visible Leaks', 'Sump Pump', 'Sewage Ejector Pump',
-        'Gas Lines', 'Main Gas Shut-off'
-    ]
-    create_inspection_sheet(writer, 'Plumbing', plumbing_items)
-
-def create_electrical_sheet(writer):
-    """Create the electrical inspection sheet"""
-    electrical_items = [
-        'Service Entrance', 'Main Panel', 'Circuit Breakers/Fuses', 'Branch Wiring',
-        'Grounding', 'GFCI Protection', 'AFCI Protection', 'Outlets', 'Switches',
-        'Light Fixtures', 'Ceiling Fans', 'Smoke Detectors', 'Carbon Monoxide Detectors'
-    ]
-    create_inspection_sheet(writer, 'Electrical', electrical_items)
-
-def create_hvac_sheet(writer):
-    """Create the HVAC inspection sheet"""
-    hvac_items = [
-        'Heating System Type', 'Heating System Age', 'Heating Operation', 'Cooling System Type',
-        'Cooling System Age', 'Cooling Operation', 'Distribution System', 'Thermostat',
-        'Filters', 'Humidifier', 'Dehumidifier', 'Ductwork', 'Ventilation'
-    ]
-    create_inspection_sheet(writer, 'HVAC', hvac_items)
-
-def create_interior_sheet(writer):
-    """Create the interior inspection sheet"""
-    interior_items = [
-        'Floors', 'Walls', 'Ceilings', 'Windows', 'Interior Doors', 'Stairs',
-        'Railings', 'Countertops', 'Cabinets', 'Appliances', 'Evidence of Pests',
-        'Evidence of Water Damage', 'Evidence of Mold'
-    ]
-    create_inspection_sheet(writer, 'Interior', interior_items)
-
-def create_attic_sheet(writer):
-    """Create the attic inspection sheet"""
-    attic_items = [
-        'Access', 'Insulation Type', 'Insulation Depth', 'Ventilation', 
-        'Visible Electrical', 'Visible Plumbing', 'Visible Framing', 
-        'Signs of Leaking', 'Signs of Pests', 'Exhaust Venting'
-    ]
-    create_inspection_sheet(writer, 'Attic', attic_items)
-
+@phase()
 def create_photo_log_sheet(writer):
     """Create the photo log sheet"""
     # Create photo log data
@@ -250,12 +351,8 @@ def create_photo_log_sheet(writer):
     for i in range(1, 21):
         photo_log_data.append([str(i), '', '', ''])
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(photo_log_data)
-    df.to_excel(writer, sheet_name='Photo Log', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Photo Log']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Photo Log', photo_log_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 10
@@ -264,10 +361,11 @@ def create_photo_log_sheet(writer):
     sheet.column_dimensions['D'].width = 15
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
+    sheet['A1'].style = HEADING_2
     for col in ['A', 'B', 'C', 'D']:
-        sheet[f'{col}3'].font = Font(bold=True)
+        sheet[f'{col}3'].style = HEADER
 
+@phase()
 def create_cost_estimate_sheet(writer):
     """Create the cost estimate sheet"""
     # Create cost estimate data
@@ -284,12 +382,8 @@ def create_cost_estimate_sheet(writer):
     # Add totals row
     cost_data.append(['TOTALS', '', '=SUM(C4:C18)', '=SUM(D4:D18)', ''])
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(cost_data)
-    df.to_excel(writer, sheet_name='Cost Estimates', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Cost Estimates']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Cost Estimates', cost_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 40
@@ -299,12 +393,12 @@ def create_cost_estimate_sheet(writer):
     sheet.column_dimensions['E'].width = 30
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
+    sheet['A1'].style = HEADING_2
     for col in ['A', 'B', 'C', 'D', 'E']:
-        sheet[f'{col}3'].font = Font(bold=True)
+        sheet[f'{col}3'].style = HEADER
     
     # Format totals row
-    sheet['A19'].font = Font(bold=True)
+    sheet['A19'].style = HEADER
     
     # Add data validation for priority
     dv = DataValidation(type="list", formula1='"1,2,3,4,5"', allow_blank=True)
@@ -314,6 +408,7 @@ def create_cost_estimate_sheet(writer):
     for row in range(4, 19):
         dv.add(f'B{row}')
 
+@phase()
 def create_maintenance_sheet(writer):
     """Create the home maintenance checklist"""
     # Create maintenance data
@@ -356,12 +451,8 @@ def create_maintenance_sheet(writer):
         ['Check caulking around showers/tubs', 'Annual', '', '']
     ]
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(maintenance_data)
-    df.to_excel(writer, sheet_name='Maintenance', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Maintenance']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Maintenance', maintenance_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 35
@@ -370,14 +461,15 @@ def create_maintenance_sheet(writer):
     sheet.column_dimensions['D'].width = 15
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
+    sheet['A1'].style = HEADING_2
     for col in ['A', 'B', 'C', 'D']:
-        sheet[f'{col}3'].font = Font(bold=True)
+        sheet[f'{col}3'].style = HEADER
     
     # Format section headers
     for row in [4, 10, 15, 20]:
-        sheet[f'A{row}'].font = Font(bold=True)
+        sheet[f'A{row}'].style = HEADER
 
+@phase()
 def create_contact_sheet(writer):
     """Create the client contact information sheet"""
     # Create contact data
@@ -422,12 +514,8 @@ def create_contact_sheet(writer):
         ['Cable/Satellite', '', '', '']
     ]
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(contact_data)
-    df.to_excel(writer, sheet_name='Contact Info', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Contact Info']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Contact Info', contact_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 25
@@ -436,16 +524,17 @@ def create_contact_sheet(writer):
     sheet.column_dimensions['D'].width = 25
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
-    sheet['A8'].font = Font(bold=True, size=14)
-    sheet['A17'].font = Font(bold=True, size=14)
-    sheet['A31'].font = Font(bold=True, size=14)
+    sheet['A1'].style = HEADING_2
+    sheet['A8'].style = HEADING_2
+    sheet['A17'].style = HEADING_2
+    sheet['A31'].style = HEADING_2
     
     # Format table headers
     for col in ['A', 'B', 'C', 'D']:
-        sheet[f'{col}19'].font = Font(bold=True)
-        sheet[f'{col}33'].font = Font(bold=True)
+        sheet[f'{col}19'].style = HEADER
+        sheet[f'{col}33'].style = HEADER
 
+@phase()
 def create_instructions_sheet(writer):
     """Create the instructions sheet"""
     # Create instructions data
@@ -492,12 +581,8 @@ def create_instructions_sheet(writer):
         ['- Use the Photo Log to create a clear reference system for your findings.', '', '']
     ]
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(instructions_data)
-    df.to_excel(writer, sheet_name='Instructions', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Instructions']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Instructions', instructions_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 25
@@ -505,16 +590,17 @@ def create_instructions_sheet(writer):
     sheet.column_dimensions['C'].width = 15
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=16)
-    sheet['A5'].font = Font(bold=True, size=12)
-    sheet['A14'].font = Font(bold=True, size=12)
-    sheet['A23'].font = Font(bold=True, size=12)
-    sheet['A32'].font = Font(bold=True, size=12)
+    sheet['A1'].style = HEADING_1
+    sheet['A5'].style = HEADING_3
+    sheet['A14'].style = HEADING_3
+    sheet['A23'].style = HEADING_3
+    sheet['A32'].style = HEADING_3
     
     # Format section items
     for row in range(7, 13):
-        sheet[f'A{row}'].font = Font(bold=True)
+        sheet[f'A{row}'].style = HEADER
 
+@phase()
 def create_sample_sheet(writer):
     """Create a sample filled report to use as reference"""
     # Create sample data
@@ -549,12 +635,8 @@ def create_sample_sheet(writer):
         ['5. Provide specific recommendations - "repair" is too vague; "replace missing shingles" is better.', '', '', '']
     ]
     
-    # Convert to DataFrame and write to Excel
-    df = pd.DataFrame(sample_data)
-    df.to_excel(writer, sheet_name='Sample Entries', index=False, header=False)
-    
-    # Get the sheet and apply formatting
-    sheet = writer.sheets['Sample Entries']
+    # Write the rows and apply formatting
+    sheet = write_rows(writer, 'Sample Entries', sample_data)
     
     # Set column widths
     sheet.column_dimensions['A'].width = 30
@@ -564,18 +646,81 @@ def create_sample_sheet(writer):
     sheet.column_dimensions['E'].width = 15
     
     # Format headers
-    sheet['A1'].font = Font(bold=True, size=14)
-    sheet['A5'].font = Font(bold=True)
-    sheet['A9'].font = Font(bold=True)
-    sheet['A14'].font = Font(bold=True)
-    sheet['A19'].font = Font(bold=True)
-    sheet['A23'].font = Font(bold=True)
+    sheet['A1'].style = HEADING_2
+    sheet['A5'].style = HEADER
+    sheet['A9'].style = HEADER
+    sheet['A14'].style = HEADER
+    sheet['A19'].style = HEADER
+    sheet['A23'].style = HEADER
     
     # Format subheaders
     for row in [6, 10, 15, 20]:
         for col in range(65, 70):  # A-E
-            sheet[f'{chr(col)}{row}'].font = Font(bold=True)
+            sheet[f'{chr(col)}{row}'].style = HEADER
+
+# Template and backend shared by every report a batch worker generates
+_batch_template = None
+_batch_backend = "openpyxl"
+
+def _init_batch_worker(template, backend="openpyxl"):
+    global _batch_template, _batch_backend
+    _batch_template = template
+    _batch_backend = backend
+
+def _create_batch_report(index, details, output_dir):
+    """Worker task for generate_inspection_batch; returns the report's path"""
+    report_id = details.get('report_id') or details.get('property_address') or str(index)
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(report_id)).strip('_') or str(index)
+    filename = os.path.join(output_dir, f"Home_Inspection_{safe_id}.xlsx")
+    fields = {key: value for key, value in details.items() if key != 'report_id'}
+    inspection_skeleton(_batch_template, _batch_backend).write(filename, property_cell_values(fields))
+    return filename
+
+def generate_inspection_batch(properties, template=None, output_dir='.', workers=None, backend="openpyxl"):
+    """
+    Generate one prefilled inspection workbook per property, in parallel.
+    
+    properties is a list of dicts keyed like PROPERTY_FIELDS, plus an optional
+    report_id used in the file name. The template is parsed once and handed to
+    each worker process when it starts rather than with every report; each
+    worker then builds the blank workbook once and copies it per report.
+    backend is passed on to create_home_inspection_excel for that blank workbook.
+    """
+    if isinstance(template, str):
+        template = load_inspection_template(template)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(template, backend)) as executor:
+        count = len(properties)
+        filenames = list(executor.map(_create_batch_report, range(1, count + 1), properties,
+                                      [output_dir] * count, chunksize=max(1, count // 32)))
+    
+    print(f"Created {len(filenames)} inspection reports in {output_dir}")
+    return filenames
+
+def read_properties(path):
+    """Read property details from a JSON list or a JSONL file"""
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
 
 # Execute the script
 if __name__ == "__main__":
-    create_home_inspection_excel()
+    parser = argparse.ArgumentParser(description="Generate home inspection workbooks.")
+    parser.add_argument('--template', help="JSON or YAML file describing inspection areas and items")
+    parser.add_argument('--properties', help="JSON/JSONL property list; writes one prefilled report per property")
+    parser.add_argument('--output-dir', default=os.environ.get('XL_OUTPUT_DIR', '.'),
+                        help="directory for batch output (default: XL_OUTPUT_DIR or current directory)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for batch mode")
+    parser.add_argument('--backend', choices=BACKENDS, default="openpyxl",
+                        help="workbook writer; 'raw' writes the sheet XML directly")
+    args = parser.parse_args()
+    
+    template = load_inspection_template(args.template) if args.template else None
+    if args.properties:
+        generate_inspection_batch(read_properties(args.properties), template, args.output_dir, args.workers,
+                                  backend=args.backend)
+    else:
+        create_home_inspection_excel(template=template, backend=args.backend)
@@ -1,57 +1,417 @@
-import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.workbook.defined_name import DefinedName
 import datetime
+import io
 import os
-
-def create_mortgage_calculator():
-    # Create a new workbook
-    wb = openpyxl.Workbook()
+import re
+import csv
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from rexl.streaming import SheetWriter, new_workbook, BACKENDS
+from rexl.amortization import (ACCELERATED_FREQUENCIES, PAYMENT_FREQUENCIES, PAYMENT_TYPES, amortization_schedule,
+                               compare_strategies, payment_count, prepayment_schedule, schedule_rows)
+from rexl.xlsxpatch import inject_cached_values, compact_workbook, COMPACT_COMPRESSLEVEL
+from rexl.formulas import precompute_values
+from rexl.skeleton import cached_skeleton
+from rexl.output import is_stream
+from rexl.instrument import phase
+from rexl.sensitivity import scenario_grid, write_scenario_sheet
+from rexl.styles import register_styles, TITLE, HEADER, CURRENCY, PERCENT, INTEGER, DATE
+
+# Loan used when no scenario is supplied; rates are stored as decimals
+DEFAULT_LOAN = {
+    'purchase_price': 300000,
+    'down_payment': 60000,
+    'interest_rate': 0.0575,  # 5.75%
+    'loan_term': 30,
+    'property_tax': 3000,
+    'insurance': 1200,
+    'pmi_rate': 0.005,  # 0.5%
+    'payment_type': "Standard",
+    'payment_frequency': "Monthly",
+    'extra_payment': 0,  # extra principal with every payment
+    'lump_sums': None  # {payment number: amount}
+}
+
+# How the Amortization sheet is written: live formulas, static values computed
+# by the NumPy engine, or formulas that also carry the engine's results
+AMORTIZATION_MODES = ("formulas", "values", "cached")
+
+# Calculator inputs the amortization formulas use. Compact workbooks define
+# these names and refer to them, so each column's formula can be shared
+CALCULATOR_NAMES = {
+    'LoanAmount': 'Calculator!$C$7',
+    'Rate': 'Calculator!$C$8',
+    'TermPayments': 'Calculator!$C$9*Calculator!$E$12',
+    'PaymentsPerYear': 'Calculator!$E$12',
+    'LoanStart': 'Calculator!$C$10',
+    'PaymentType': 'Calculator!$C$11',
+    'PaymentFrequency': 'Calculator!$C$12',
+    'PeriodPayment': 'Calculator!$C$32',
+    'BalloonPayment': 'Calculator!$C$31'
+}
+
+# Names added for workbooks with prepayments
+PREPAYMENT_NAMES = {
+    'ExtraPayment': 'Calculator!$C$35'
+}
+
+# Calculator cells holding each loan input
+CALCULATOR_INPUTS = {
+    'purchase_price': 'C4',
+    'down_payment': 'C5',
+    'interest_rate': 'C8',
+    'loan_term': 'C9',
+    'payment_type': 'C11',
+    'payment_frequency': 'C12',
+    'property_tax': 'C14',
+    'insurance': 'C16',
+    'pmi_rate': 'C17'
+}
+
+# Column names accepted in a loan tape, mapped to DEFAULT_LOAN keys
+LOAN_TAPE_COLUMNS = {
+    'price': 'purchase_price',
+    'purchase_price': 'purchase_price',
+    'down_payment': 'down_payment',
+    'rate': 'interest_rate',
+    'interest_rate': 'interest_rate',
+    'term': 'loan_term',
+    'loan_term': 'loan_term',
+    'taxes': 'property_tax',
+    'property_tax': 'property_tax',
+    'insurance': 'insurance',
+    'pmi': 'pmi_rate',
+    'pmi_rate': 'pmi_rate',
+    'payment_type': 'payment_type',
+    'frequency': 'payment_frequency',
+    'payment_frequency': 'payment_frequency',
+    'extra': 'extra_payment',
+    'extra_payment': 'extra_payment',
+    'lump_sums': 'lump_sums'
+}
+
+# Columns of the Prepayment Strategies sheet: header, compare_strategies key and style
+STRATEGY_COLUMNS = (
+    ("Strategy", 'names', None),
+    ("Payments", 'payments', INTEGER),
+    ("Payoff Date", 'payoff_date', DATE),
+    ("Total Interest", 'total_interest', CURRENCY),
+    ("Total Paid", 'total_paid', CURRENCY),
+    ("Interest Saved", 'interest_saved', CURRENCY),
+    ("Years Saved", 'years_saved', None)
+)
+
+def check_payment_type(loan):
+    """Reject a payment type the Calculator formulas do not know.
+
+    Calculator!C11 is compared against these names, so anything else would
+    give a workbook of wrong payments rather than an error.
+    """
+    if loan['payment_type'] not in PAYMENT_TYPES:
+        raise ValueError(f"payment_type must be one of {PAYMENT_TYPES}, not {loan['payment_type']!r}")
+
+@phase()
+def create_mortgage_calculator(filename=None, streaming=False, loan=None, amortization="formulas",
+                               scenarios=None, backend="openpyxl", evaluate=False, non_volatile=False,
+                               compact=False, strategies=None, payoff_rows=None):
+    """Write the mortgage calculator workbook for ``loan`` (DEFAULT_LOAN fills any missing inputs).
+
+    ``payoff_rows`` sets the number of Amortization rows of a loan with
+    prepayments instead of its computed payoff, so one formula layout can
+    serve every loan paid off after that many payments.
+    """
+    if amortization not in AMORTIZATION_MODES:
+        raise ValueError(f"amortization must be one of {AMORTIZATION_MODES}, not {amortization!r}")
+    
+    # Fill in any loan inputs that were not supplied
+    loan = {**DEFAULT_LOAN, **(loan or {})}
+    check_payment_type(loan)
+    start_date = datetime.date.today()
     
-    # Create Calculator sheet (main sheet)
-    calculator_sheet = wb.active
-    calculator_sheet.title = "Calculator"
+    # One Amortization row per scheduled payment, so shorter loans carry no unused rows
+    payments = payment_count(loan['loan_term'], loan['payment_frequency'])
+    payoff = prepays(loan)
     
-    # Create other sheets
-    amortization_sheet = wb.create_sheet("Amortization")
-    comparison_sheet = wb.create_sheet("Loan Comparison")
-    affordability_sheet = wb.create_sheet("Affordability")
+    # Precompute the schedule when the sheet needs values rather than just formulas,
+    # or to find the payment that pays off a loan with prepayments
+    schedule = None
+    if amortization != "formulas" or payoff and payoff_rows is None:
+        with phase("schedule"):
+            schedule = loan_schedule(loan, start_date)
+    if payoff:
+        payments = payoff_rows or len(schedule['payment_number'])
+    
+    with phase("workbook"):
+        # Create a new workbook; in streaming mode every sheet is write-only and
+        # rows go straight to disk instead of being kept as Cell objects. The
+        # "raw" backend always streams and writes the sheet XML itself.
+        wb = new_workbook(backend, write_only=streaming)
+        register_styles(wb)
+        if compact:
+            for name, reference in calculator_names(payoff).items():
+                wb.defined_names[name] = DefinedName(name, attr_text=reference)
+        
+        # Create Calculator sheet (main sheet)
+        if wb.write_only:
+            calculator_sheet = SheetWriter(wb.create_sheet("Calculator"))
+        else:
+            calculator_sheet = SheetWriter(wb.active)
+            calculator_sheet.sheet.title = "Calculator"
+        
+        # Create other sheets
+        amortization_sheet = SheetWriter(wb.create_sheet("Amortization"))
+        comparison_sheet = SheetWriter(wb.create_sheet("Loan Comparison"))
+        affordability_sheet = SheetWriter(wb.create_sheet("Affordability"))
+        sheets = [calculator_sheet, amortization_sheet, comparison_sheet, affordability_sheet]
     
     # Set up Calculator sheet
-    setup_calculator_sheet(calculator_sheet)
+    setup_calculator_sheet(calculator_sheet, loan, start_date)
+    if payoff:
+        setup_prepayment_section(calculator_sheet, payments)
     
     # Set up Amortization sheet
-    setup_amortization_sheet(amortization_sheet)
+    setup_amortization_sheet(amortization_sheet, schedule if amortization == "values" else None, compact, payments,
+                             payoff, loan['lump_sums'])
     
     # Set up Loan Comparison sheet
-    setup_comparison_sheet(comparison_sheet)
+    setup_comparison_sheet(comparison_sheet, non_volatile, payments, payoff)
     
     # Set up Affordability sheet
     setup_affordability_sheet(affordability_sheet)
     
+    # Optional rate x term x down payment heatmap, e.g.
+    # scenarios={'rates': [0.05, 0.055, 0.06], 'terms': [15, 30], 'down_payments': [0.1, 0.2]}
+    if scenarios:
+        scenario_sheet = SheetWriter(wb.create_sheet("Scenario Grid"))
+        setup_scenario_sheet(scenario_sheet, loan, scenarios)
+        sheets.append(scenario_sheet)
+    
+    # Optional comparison of prepayment strategies, e.g.
+    # strategies=[{'name': "Extra $200", 'extra_payment': 200}, {'payment_frequency': "Accelerated Biweekly"}]
+    if strategies:
+        strategy_sheet = SheetWriter(wb.create_sheet("Prepayment Strategies"))
+        setup_strategy_sheet(strategy_sheet, loan, strategies, start_date)
+        sheets.append(strategy_sheet)
+    
+    for sheet in sheets:
+        sheet.close()
+    
     # Get output directory from environment, default to current directory
-    output_dir = os.environ.get('XL_OUTPUT_DIR', '.')
+    if filename is None:
+        output_dir = os.environ.get('XL_OUTPUT_DIR', '.')
+        filename = os.path.join(output_dir, "Mortgage_Calculator.xlsx")
+    
+    # Cached values are patched into the saved file, so a caller's stream
+    # only receives the workbook once it is finished
+    target = filename
+    if is_stream(filename) and (amortization == "cached" or evaluate or compact):
+        target = io.BytesIO()
     
     # Save the workbook
-    wb.save(os.path.join(output_dir, "Mortgage_Calculator.xlsx"))
+    with phase("save"):
+        wb.save(target)
+        if amortization == "cached":
+            inject_cached_values(target, {"Amortization": amortization_cached_values(schedule)})
+    
+    # Store every formula's result so the file reads without Excel recalculating it
+    if evaluate:
+        with phase("evaluate"):
+            precompute_values(target)
+    
+    # Shared formulas and tighter compression for files that are stored or sent in bulk
+    if compact:
+        with phase("compact"):
+            before, after = compact_workbook(target)
+        print(f"Compact output: {after:,} bytes ({before - after:,} bytes saved by shared formulas and compression)")
+    if target is not filename:
+        filename.write(target.getvalue())
     print("Mortgage calculator Excel file created successfully.")
-
-def setup_calculator_sheet(sheet):
+    return filename
+
+def prepays(loan):
+    """True when the loan pays more than its regular payment and may end early."""
+    return bool(loan['extra_payment'] or loan['lump_sums'] is not None
+                or loan['payment_frequency'] in ACCELERATED_FREQUENCIES)
+
+def loan_schedule(loan, start_date=None):
+    """Compute the loan's schedule with the NumPy engine, up to payoff when it prepays."""
+    principal = loan['purchase_price'] - loan['down_payment']
+    if prepays(loan):
+        return prepayment_schedule(
+            principal,
+            loan['interest_rate'],
+            loan['loan_term'],
+            payment_type=loan['payment_type'],
+            start_date=start_date,
+            payment_frequency=loan['payment_frequency'],
+            extra_payment=loan['extra_payment'],
+            lump_sums=loan['lump_sums']
+        )
+    return amortization_schedule(
+        principal,
+        loan['interest_rate'],
+        loan['loan_term'],
+        payment_type=loan['payment_type'],
+        start_date=start_date,
+        periods_per_year=PAYMENT_FREQUENCIES[loan['payment_frequency']]
+    )
+
+def calculator_names(payoff=False):
+    """Defined names for compact workbooks."""
+    return {**CALCULATOR_NAMES, **PREPAYMENT_NAMES} if payoff else CALCULATOR_NAMES
+
+def parse_lump_sums(value):
+    """Read lump sums as ``{payment number: amount}``.
+
+    Accepts a mapping (from JSONL tapes) or text such as "12:10000;60:25000".
+    """
+    if isinstance(value, str):
+        value = dict(item.split(':', 1) for item in value.replace(',', '').split(';') if item.strip())
+    return {int(number): float(str(amount).replace('$', '')) for number, amount in value.items()}
+
+def parse_loan(record):
+    """Convert one loan tape record into calculator inputs.
+
+    Rates may be decimals (0.0575) or percentages with a % sign ("5.75%").
+    """
+    loan = {}
+    for column, value in record.items():
+        key = LOAN_TAPE_COLUMNS.get(column.strip().lower())
+        if key is None or value is None or value == '':
+            continue
+        if key == 'lump_sums':
+            loan[key] = parse_lump_sums(value)
+        elif key in ('payment_type', 'payment_frequency'):
+            loan[key] = str(value).strip()
+        elif isinstance(value, str) and value.strip().endswith('%'):
+            loan[key] = float(value.strip()[:-1].replace(',', '')) / 100
+        elif key == 'loan_term':
+            loan[key] = int(float(value))
+        else:
+            loan[key] = float(str(value).replace(',', '').replace('$', ''))
+    return loan
+
+def read_loan_tape(path):
+    """Yield ``(loan_id, record)`` pairs from a CSV or JSONL loan tape one at a time.
+
+    Records are returned unparsed so that a bad row fails on its own instead of
+    aborting the whole batch. The loan id comes from a ``loan_id`` column when
+    present, otherwise from the record's position in the tape.
+    """
+    is_jsonl = path.lower().endswith(('.jsonl', '.ndjson', '.json'))
+    with open(path, newline='', encoding='utf-8') as f:
+        if is_jsonl:
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for index, record in enumerate(records, 1):
+            loan_id = str(record.pop('loan_id', '') or index)
+            yield loan_id, record
+
+def calculator_input_values(loan, start_date=None):
+    """Map Calculator input cells to the loan's values."""
+    values = {cell: loan[key] for key, cell in CALCULATOR_INPUTS.items()}
+    values['C10'] = (start_date or datetime.date.today()).strftime("%m/%d/%Y")
+    if prepays(loan):
+        values['C35'] = loan['extra_payment']
+    return values
+
+def lump_sum_values(loan, payments):
+    """Map the Amortization Lump Sum cells of the first ``payments`` rows to the loan's lump sums."""
+    return {f'K{3 + number}': amount for number, amount in (loan['lump_sums'] or {}).items()
+            if number <= payments}
+
+def _create_loan_workbook(loan_id, record, output_dir, streaming, backend, evaluate=False, non_volatile=False,
+                          compact=False):
+    """Worker task for generate_mortgage_batch; returns (loan_id, path, error).
+
+    Loans with the same number of payments share the same layout, so each
+    worker builds that workbook once and writes copies with only the
+    Calculator inputs replaced. Loans with prepayments have one row per
+    payment up to payoff, so they share the layout with loans paid off after
+    as many payments; their lump sums are written into each copy.
+    """
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', loan_id)
+    filename = os.path.join(output_dir, f"Mortgage_Calculator_{safe_id}.xlsx")
+    try:
+        loan = {**DEFAULT_LOAN, **parse_loan(record)}
+        check_payment_type(loan)
+        payments = payment_count(loan['loan_term'], loan['payment_frequency'])
+        layout = {'loan_term': loan['loan_term'], 'payment_frequency': loan['payment_frequency']}
+        values = {"Calculator": calculator_input_values(loan)}
+        payoff = prepays(loan)
+        if payoff:
+            payments = len(loan_schedule(loan)['payment_number'])
+            layout = {**loan, 'lump_sums': {}}
+            values["Amortization"] = lump_sum_values(loan, payments)
+        skeleton = cached_skeleton(('mortgage', streaming, backend, non_volatile, compact, payments, payoff),
+                                   create_mortgage_calculator, streaming=streaming, loan=layout, backend=backend,
+                                   non_volatile=non_volatile, compact=compact,
+                                   payoff_rows=payments if payoff else None)
+        skeleton.write(filename, values, evaluate=evaluate,
+                       compresslevel=COMPACT_COMPRESSLEVEL if compact else None)
+    except Exception as e:
+        return loan_id, None, str(e)
+    return loan_id, filename, None
+
+def generate_mortgage_batch(tape_path, output_dir='.', workers=None, streaming=True, backend="openpyxl",
+                            evaluate=False, non_volatile=False, compact=False):
+    """Write one mortgage calculator workbook per loan in a loan tape.
+
+    The tape is read lazily and at most a few tasks per worker are queued at
+    any time, so memory use does not grow with the size of the tape. With
+    ``evaluate`` each workbook stores its formulas' results for its loan, and
+    ``compact`` writes every copy in compact form.
+    Returns a list of ``(loan_id, error)`` pairs for loans that failed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    created = 0
+    failures = []
+
+    def collect(done):
+        nonlocal created
+        for future in done:
+            loan_id, path, error = future.result()
+            if error is None:
+                created += 1
+            else:
+                failures.append((loan_id, error))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for loan_id, record in read_loan_tape(tape_path):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(_create_loan_workbook, loan_id, record, output_dir, streaming, backend,
+                                         evaluate, non_volatile, compact))
+        collect(wait(pending)[0])
+
+    print(f"Created {created} mortgage workbooks in {output_dir} ({len(failures)} failed)")
+    for loan_id, error in failures:
+        print(f"- Loan {loan_id}: {error}")
+    return failures
+
+@phase()
+def setup_calculator_sheet(sheet, loan=DEFAULT_LOAN, start_date=None):
     # Set up header
     sheet.merge_cells('A1:G1')
     sheet['A1'] = "REAL ESTATE MORTGAGE CALCULATOR"
-    sheet['A1'].font = Font(size=16, bold=True)
-    sheet['A1'].alignment = Alignment(horizontal='center')
+    sheet['A1'].style = TITLE
     
     # Create sections
     sheet['A3'] = "LOAN INFORMATION"
-    sheet['A3'].font = Font(bold=True)
+    sheet['A3'].style = HEADER
     sheet['A13'] = "PROPERTY TAXES & INSURANCE"
-    sheet['A13'].font = Font(bold=True)
+    sheet['A13'].style = HEADER
     sheet['A19'] = "CLOSING COSTS & FEES"
-    sheet['A19'].font = Font(bold=True)
+    sheet['A19'].style = HEADER
     sheet['A25'] = "PAYMENT SUMMARY"
-    sheet['A25'].font = Font(bold=True)
+    sheet['A25'].style = HEADER
 
     # Loan Information Section
     sheet['A4'] = "Purchase Price ($):"
@@ -62,29 +422,33 @@ def setup_calculator_sheet(sheet):
     sheet['A9'] = "Loan Term (years):"
     sheet['A10'] = "Loan Start Date:"
     sheet['A11'] = "Payment Type:"
+    sheet['A12'] = "Payment Frequency:"
 
-    # Set up input fields
-    sheet['C4'] = 300000
-    sheet['C5'] = 60000
+    # Set up input fields (rates are stored as decimals, e.g. 5.75% as 0.0575)
+    for cell, value in calculator_input_values(loan, start_date).items():
+        sheet[cell] = value
     sheet['C6'] = "=C5/C4"
     sheet['C7'] = "=C4-C5"
-    sheet['C8'] = 0.0575  # Store as decimal (5.75%)
-    sheet['C9'] = 30
-    sheet['C10'] = datetime.datetime.now().strftime("%m/%d/%Y")
-    sheet['C11'] = "Standard"
+    sheet['D12'] = "Payments per Year:"
+    sheet['E12'] = "=IF(C12=\"Monthly\",12,26)"
 
     # Format cells
     for cell in ['C4', 'C5', 'C7']:
-        sheet[cell].number_format = '$#,##0.00'
-    sheet['C6'].number_format = '0.00%'
-    sheet['C8'].number_format = '0.00%'
-    sheet['C9'].number_format = '0'
-    sheet['C10'].number_format = 'mm/dd/yyyy'
+        sheet[cell].style = CURRENCY
+    sheet['C6'].style = PERCENT
+    sheet['C8'].style = PERCENT
+    sheet['C9'].style = INTEGER
+    sheet['C10'].style = DATE
 
     # Create loan type dropdown
     dv = DataValidation(type="list", formula1='"Standard,Balloon,Interest Only"')
     sheet.add_data_validation(dv)
     dv.add(sheet['C11'])
+    
+    # Payment frequency dropdown
+    dv = DataValidation(type="list", formula1='"Monthly,Biweekly,Accelerated Biweekly"')
+    sheet.add_data_validation(dv)
+    dv.add(sheet['C12'])
 
     # Property Taxes & Insurance Section
     sheet['A14'] = "Annual Property Tax ($):"
@@ -92,19 +456,16 @@ def setup_calculator_sheet(sheet):
     sheet['A16'] = "Annual Homeowners Insurance ($):"
     sheet['A17'] = "Monthly PMI (%):"
 
-    sheet['C14'] = 3000
     sheet['C15'] = "=C14/C4"
-    sheet['C16'] = 1200
-    sheet['C17'] = 0.005  # 0.5% as decimal
 
-    sheet['C14'].number_format = '$#,##0.00'
-    sheet['C16'].number_format = '$#,##0.00'
-    sheet['C15'].number_format = '0.00%'
-    sheet['C17'].number_format = '0.00%'
+    sheet['C14'].style = CURRENCY
+    sheet['C16'].style = CURRENCY
+    sheet['C15'].style = PERCENT
+    sheet['C17'].style = PERCENT
 
     # Conditional PMI calculation
     sheet['E17'] = "=IF(C5/C4<0.2,C7*C17/12,0)"
-    sheet['E17'].number_format = '$#,##0.00'
+    sheet['E17'].style = CURRENCY
     sheet['D17'] = "Monthly PMI Amount:"
 
     # Closing Costs & Fees Section
@@ -116,9 +477,9 @@ def setup_calculator_sheet(sheet):
     sheet['C21'] = 2500
     sheet['C22'] = "=(C7*C20)+C21"  # Removed /100 since C20 is already decimal
 
-    sheet['C20'].number_format = '0.00%'
-    sheet['C21'].number_format = '$#,##0.00'
-    sheet['C22'].number_format = '$#,##0.00'
+    sheet['C20'].style = PERCENT
+    sheet['C21'].style = CURRENCY
+    sheet['C22'].style = CURRENCY
 
     # Payment Summary Section
     sheet['A26'] = "Principal & Interest Payment:"
@@ -127,27 +488,73 @@ def setup_calculator_sheet(sheet):
     sheet['A29'] = "Monthly PMI:"
     sheet['A30'] = "Total Monthly Payment:"
     sheet['A31'] = "Balloon Payment (if applicable):"
+    sheet['A32'] = "Payment per Period:"
 
     # Calculate P&I payment based on loan type - no need to convert percentages
-    sheet['C26'] = "=IF(C11=\"Standard\",PMT(C8/12,C9*12,-C7),IF(C11=\"Interest Only\",C7*C8/12,PMT(C8/12,C9*12,-C7,-(C7*0.7))))"
+    sheet['C26'] = "=IF(C11=\"Standard\",PMT(C8/12,C9*12,-C7),IF(C11=\"Interest Only\",C7*C8/12,PMT(C8/12,C9*12,-C7,C7*0.7)))"
     sheet['C27'] = "=C14/12"
     sheet['C28'] = "=C16/12"
     sheet['C29'] = "=E17"
     sheet['C30'] = "=SUM(C26:C29)"
     sheet['C31'] = "=IF(C11=\"Balloon\",C7*0.7,0)"
+    # Principal and interest due each period at the payment frequency; accelerated
+    # biweekly pays half the monthly payment
+    sheet['C32'] = ("=IF(C11=\"Interest Only\",C7*C8/E12,IF(C12=\"Accelerated Biweekly\","
+                    "PMT(C8/12,C9*12,-C7,IF(C11=\"Balloon\",C7*0.7,0))/2,"
+                    "PMT(C8/E12,C9*E12,-C7,IF(C11=\"Balloon\",C7*0.7,0))))")
 
-    for cell in ['C26', 'C27', 'C28', 'C29', 'C30', 'C31']:
-        sheet[cell].number_format = '$#,##0.00'
+    for cell in ['C26', 'C27', 'C28', 'C29', 'C30', 'C31', 'C32']:
+        sheet[cell].style = CURRENCY
 
     # Add balloon payment explanation
     sheet['E31'] = "=IF(C11=\"Balloon\",\"(Due at end of term)\",\"\")"
 
-def setup_amortization_sheet(sheet):
+@phase()
+def setup_prepayment_section(sheet, payments):
+    """Extra principal input and payoff results for a schedule of ``payments`` rows."""
+    last = 3 + payments
+    sheet['A34'] = "PREPAYMENTS"
+    sheet['A34'].style = HEADER
+
+    sheet['A35'] = "Extra Principal per Payment ($):"
+    sheet['A36'] = "Lump Sum Prepayments ($):"
+    sheet['A37'] = "Payments to Payoff:"
+    sheet['A38'] = "Payoff Date:"
+    sheet['A39'] = "Total Interest Paid:"
+
+    # Lump sums are entered against their payment on the Amortization sheet
+    sheet['C36'] = f"=SUM(Amortization!K4:K{last})"
+    sheet['C37'] = f"=Amortization!A{last}"
+    sheet['C38'] = f"=Amortization!B{last}"
+    sheet['C39'] = f"=Amortization!H{last}"
+
+    for cell in ['C35', 'C36', 'C39']:
+        sheet[cell].style = CURRENCY
+    sheet['C37'].style = INTEGER
+    sheet['C38'].style = DATE
+
+def amortization_cached_values(schedule):
+    """Map Amortization sheet formula cells to the engine's results."""
+    values = {}
+    for row, payment in enumerate(schedule_rows(schedule), 4):
+        for col, value in zip('ABCDEFGHIJ', payment):
+            values[f'{col}{row}'] = value
+    return values
+
+@phase()
+def setup_amortization_sheet(sheet, schedule=None, compact=False, payments=360, payoff=False, lump_sums=None):
+    """Write the amortization table as formulas, or as the static values of ``schedule``.
+
+    Formulas fill one row per payment, ``payments`` rows in all. With
+    ``compact`` they refer to the Calculator through CALCULATOR_NAMES. With
+    ``payoff`` the table adds the extra principal paid with each payment and
+    a Lump Sum column (filled from ``lump_sums``), and the last payment only
+    covers what is still owed.
+    """
     # Set up header
     sheet.merge_cells('A1:G1')
     sheet['A1'] = "AMORTIZATION SCHEDULE"
-    sheet['A1'].font = Font(size=16, bold=True)
-    sheet['A1'].alignment = Alignment(horizontal='center')
+    sheet['A1'].style = TITLE
 
     # Create column headers
     headers = {
@@ -161,51 +568,78 @@ def setup_amortization_sheet(sheet):
         'H3': 'Cumulative Interest',
         'I3': 'Balloon Payment'
     }
+    if payoff:
+        headers['J3'] = 'Extra Principal'
+        headers['K3'] = 'Lump Sum'
     
     for cell, value in headers.items():
         sheet[cell] = value
-        sheet[cell].font = Font(bold=True)
-
-    # Format columns - use 361 to accommodate a 30-year loan (360 payments) plus header row
-    for row in range(4, 365):
-        sheet[f'B{row}'].number_format = 'mm/dd/yyyy'
-        for col in 'CDEFGHI':
-            sheet[f'{col}{row}'].number_format = '$#,##0.00'
-
-    # Set up formulas for amortization calculation
-    sheet['A4'] = 1
-    sheet['B4'] = "=EDATE(Calculator!C10,1)"  # First payment is one month after loan start
-    sheet['C4'] = "=Calculator!C7"
-    sheet['D4'] = "=IF(Calculator!C11=\"Standard\",ABS(Calculator!C26),IF(Calculator!C11=\"Interest Only\",C4*Calculator!C8/12,ABS(Calculator!C26)))"
-    sheet['E4'] = "=IF(Calculator!C11=\"Interest Only\",0,D4-F4)"
-    sheet['F4'] = "=C4*Calculator!C8/12"
-    sheet['G4'] = "=C4-E4"
-    sheet['H4'] = "=F4"
-    sheet['I4'] = "=IF(Calculator!C11=\"Balloon\",IF(A4=Calculator!C9*12,Calculator!C31,0),0)"
-
-    # Add formulas for subsequent rows
-    for row in range(5, 365):
-        sheet[f'A{row}'] = f"=A{row-1}+1"
-        sheet[f'B{row}'] = f"=EDATE(B{row-1},1)"
-        sheet[f'C{row}'] = f"=G{row-1}"
-        sheet[f'D{row}'] = f"=IF(Calculator!C11=\"Standard\",ABS(Calculator!C26),IF(Calculator!C11=\"Interest Only\",C{row}*Calculator!C8/12,ABS(Calculator!C26)))"
-        sheet[f'E{row}'] = f"=IF(Calculator!C11=\"Interest Only\",0,D{row}-F{row})"
-        sheet[f'F{row}'] = f"=C{row}*Calculator!C8/12"
-        sheet[f'G{row}'] = f"=C{row}-E{row}"
-        sheet[f'H{row}'] = f"=H{row-1}+F{row}"
-        sheet[f'I{row}'] = f"=IF(Calculator!C11=\"Balloon\",IF(A{row}=Calculator!C9*12,Calculator!C31,0),0)"
-
-def setup_comparison_sheet(sheet):
+        sheet[cell].style = HEADER
+
+    # Each row is written and formatted in one pass
+    row_styles = [None, DATE] + [CURRENCY] * (9 if payoff else 7)
+
+    if schedule is not None:
+        lump_sums = lump_sums or {}
+        for payment in schedule_rows(schedule):
+            if payoff:
+                payment += (lump_sums.get(payment[0]),)
+            sheet.append(payment, styles=row_styles)
+        return
+
+    # Calculator inputs by name, or as plain cell references
+    ref = {name: name if compact else reference.replace('$', '')
+           for name, reference in calculator_names(payoff).items()}
+    payment_type, payment = ref['PaymentType'], ref['PeriodPayment']
+    # Interest rate per payment period
+    rate = f"{ref['Rate']}/{ref['PaymentsPerYear']}"
+    monthly = f"{ref['PaymentFrequency']}=\"Monthly\""
+    lump_sums = lump_sums or {}
+
+    # Set up formulas for amortization calculation, one row per payment
+    for row in range(4, 4 + payments):
+        first = row == 4
+        # First payment is one period after loan start
+        previous_date = ref['LoanStart'] if first else f"B{row-1}"
+        values = [
+            1 if first else f"=A{row-1}+1",
+            f"=IF({monthly},EDATE({previous_date},1),{previous_date}+14)",
+            f"={ref['LoanAmount']}" if first else f"=G{row-1}"
+        ]
+        if payoff:
+            # The payment and extra principal stop at what is owed, so the loan ends at 0
+            values += [
+                f"=IF({payment_type}=\"Interest Only\",F{row},MIN(ABS({payment}),C{row}+F{row}))",
+                f"=D{row}-F{row}+J{row}",
+                f"=C{row}*{rate}",
+                f"=C{row}-E{row}",
+                f"=F{row}" if first else f"=H{row-1}+F{row}",
+                f"=IF({payment_type}=\"Balloon\",IF(A{row}={ref['TermPayments']},G{row},0),0)",
+                f"=MIN({ref['ExtraPayment']}+K{row},C{row}+F{row}-D{row})",
+                lump_sums.get(row - 3)
+            ]
+        else:
+            values += [
+                f"=IF({payment_type}=\"Standard\",ABS({payment}),IF({payment_type}=\"Interest Only\",C{row}*{rate},ABS({payment})))",
+                f"=IF({payment_type}=\"Interest Only\",0,D{row}-F{row})",
+                f"=C{row}*{rate}",
+                f"=C{row}-E{row}",
+                f"=F{row}" if first else f"=H{row-1}+F{row}",
+                f"=IF({payment_type}=\"Balloon\",IF(A{row}={ref['TermPayments']},{ref['BalloonPayment']},0),0)"
+            ]
+        sheet.append(values, styles=row_styles)
+
+@phase()
+def setup_comparison_sheet(sheet, non_volatile=False, payments=360, payoff=False):
     # Set up header
     sheet.merge_cells('A1:G1')
     sheet['A1'] = "LOAN COMPARISON CALCULATOR"
-    sheet['A1'].font = Font(size=16, bold=True)
-    sheet['A1'].alignment = Alignment(horizontal='center')
+    sheet['A1'].style = TITLE
 
     # Create comparison table
     sheet.merge_cells('A3:G3')
     sheet['A3'] = "COMPARE DIFFERENT LOAN OPTIONS"
-    sheet['A3'].font = Font(bold=True)
+    sheet['A3'].style = HEADER
 
     # Create table headers
     headers = {
@@ -220,7 +654,7 @@ def setup_comparison_sheet(sheet):
     
     for cell, value in headers.items():
         sheet[cell] = value
-        sheet[cell].font = Font(bold=True)
+        sheet[cell].style = HEADER
 
     # Set up comparison rows
     sheet['A6'] = "Option 1 (Current)"
@@ -232,7 +666,19 @@ def setup_comparison_sheet(sheet):
     sheet['C6'] = "=Calculator!C9"
     sheet['D6'] = "=ABS(Calculator!C26)"
     sheet['E6'] = "=Calculator!C30"
-    sheet['F6'] = "=IF(Calculator!C11=\"Standard\",INDIRECT(\"Amortization!H\"&Calculator!C9*12+3),Calculator!C8/12*Calculator!C7*Calculator!C9)"
+    if payoff:
+        # With prepayments the schedule ends at payoff, whatever the payment type
+        total_interest = f"Amortization!H{3 + payments}"
+    elif non_volatile:
+        # INDEX only depends on the cumulative interest column, so Excel does not
+        # recalculate it (and the schedule behind it) on every edit like INDIRECT
+        total_interest = f"INDEX(Amortization!H4:H{3 + payments},Calculator!C9*Calculator!E12)"
+    else:
+        total_interest = "INDIRECT(\"Amortization!H\"&Calculator!C9*Calculator!E12+3)"
+    if payoff:
+        sheet['F6'] = f"={total_interest}"
+    else:
+        sheet['F6'] = f"=IF(Calculator!C11=\"Standard\",{total_interest},Calculator!C8/12*Calculator!C7*Calculator!C9)"
     sheet['G6'] = "=F6+Calculator!C7+Calculator!C22"
 
     # Set up option 2 with example values (store as decimals)
@@ -253,21 +699,61 @@ def setup_comparison_sheet(sheet):
 
     # Format cells
     for row in range(6, 9):
-        sheet[f'B{row}'].number_format = '0.00%'
-        sheet[f'C{row}'].number_format = '0'
+        sheet[f'B{row}'].style = PERCENT
+        sheet[f'C{row}'].style = INTEGER
         for col in 'DEFG':
-            sheet[f'{col}{row}'].number_format = '$#,##0.00'
+            sheet[f'{col}{row}'].style = CURRENCY
+
+@phase()
+def setup_scenario_sheet(sheet, loan, scenarios):
+    """Write a heatmap of ``scenarios['metric']`` (total monthly payment by default)."""
+    grid = scenario_grid(
+        loan['purchase_price'],
+        scenarios['rates'],
+        scenarios['terms'],
+        scenarios['down_payments'],
+        property_tax=loan['property_tax'],
+        insurance=loan['insurance'],
+        pmi_rate=loan['pmi_rate']
+    )
+    write_scenario_sheet(sheet, grid, scenarios.get('metric', 'total_monthly'))
+
+@phase()
+def setup_strategy_sheet(sheet, loan, strategies, start_date=None):
+    """Write a table comparing prepayment ``strategies`` for the loan (see compare_strategies)."""
+    comparison = compare_strategies(
+        loan['purchase_price'] - loan['down_payment'],
+        loan['interest_rate'],
+        loan['loan_term'],
+        strategies,
+        payment_type=loan['payment_type'],
+        start_date=start_date
+    )
 
+    sheet.merge_cells('A1:G1')
+    sheet['A1'] = "PREPAYMENT STRATEGIES"
+    sheet['A1'].style = TITLE
+    sheet['A2'] = "Savings are against paying monthly with no prepayments"
+
+    sheet.append([])
+    sheet.append([header for header, _, _ in STRATEGY_COLUMNS], styles=HEADER)
+    columns = [comparison[key] for _, key, _ in STRATEGY_COLUMNS]
+    columns = [column if isinstance(column, list) else column.tolist() for column in columns]
+    styles = [style for _, _, style in STRATEGY_COLUMNS]
+    number_formats = [None] * (len(STRATEGY_COLUMNS) - 1) + ['0.0']
+    for row in zip(*columns):
+        sheet.append(row, styles=styles, number_formats=number_formats)
+
+@phase()
 def setup_affordability_sheet(sheet):
     # Set up header
     sheet.merge_cells('A1:G1')
     sheet['A1'] = "AFFORDABILITY CALCULATOR"
-    sheet['A1'].font = Font(size=16, bold=True)
-    sheet['A1'].alignment = Alignment(horizontal='center')
+    sheet['A1'].style = TITLE
 
     # Create income and expense inputs
     sheet['A3'] = "INCOME & EXPENSE INFORMATION"
-    sheet['A3'].font = Font(bold=True)
+    sheet['A3'].style = HEADER
 
     sheet['A5'] = "Gross Annual Income ($):"
     sheet['A6'] = "Monthly Debt Payments ($):"
@@ -279,14 +765,14 @@ def setup_affordability_sheet(sheet):
     sheet['C7'] = "=C5/12*0.28"
     sheet['C8'] = 0.36  # 36% as decimal
 
-    sheet['C5'].number_format = '$#,##0.00'
-    sheet['C6'].number_format = '$#,##0.00'
-    sheet['C7'].number_format = '$#,##0.00'
-    sheet['C8'].number_format = '0.00%'
+    sheet['C5'].style = CURRENCY
+    sheet['C6'].style = CURRENCY
+    sheet['C7'].style = CURRENCY
+    sheet['C8'].style = PERCENT
 
     # Create affordability calculator
     sheet['A10'] = "AFFORDABILITY RESULTS"
-    sheet['A10'].font = Font(bold=True)
+    sheet['A10'].style = HEADER
 
     sheet['A12'] = "Interest Rate (%):"
     sheet['A13'] = "Loan Term (years):"
@@ -300,11 +786,11 @@ def setup_affordability_sheet(sheet):
     sheet['C15'] = "=Calculator!C16/Calculator!C4"
     sheet['C16'] = "=Calculator!C6"
 
-    sheet['C12'].number_format = '0.00%'
-    sheet['C13'].number_format = '0'
-    sheet['C14'].number_format = '0.00%'
-    sheet['C15'].number_format = '0.00%'
-    sheet['C16'].number_format = '0.00%'
+    sheet['C12'].style = PERCENT
+    sheet['C13'].style = INTEGER
+    sheet['C14'].style = PERCENT
+    sheet['C15'].style = PERCENT
+    sheet['C16'].style = PERCENT
 
     sheet['A18'] = "Maximum Affordable Loan:"
     sheet['A19'] = "Maximum Home Price:"
@@ -325,7 +811,35 @@ def setup_affordability_sheet(sheet):
     sheet['C24'] = "=SUM(ABS(C21),C22,C23)"
 
     for row in range(18, 25):
-        sheet[f'C{row}'].number_format = '$#,##0.00'
+        sheet[f'C{row}'].style = CURRENCY
 
 if __name__ == "__main__":
-    create_mortgage_calculator()
+    parser = argparse.ArgumentParser(description="Generate mortgage calculator workbooks.")
+    parser.add_argument('--tape', help="CSV or JSONL loan tape; writes one workbook per loan")
+    parser.add_argument('--output-dir', default=os.environ.get('XL_OUTPUT_DIR', '.'),
+                        help="directory for batch output (default: XL_OUTPUT_DIR or current directory)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for batch mode")
+    parser.add_argument('--backend', choices=BACKENDS, default="openpyxl",
+                        help="workbook writer: openpyxl, or raw to write the sheet XML directly")
+    parser.add_argument('--evaluate', action='store_true',
+                        help="store formula results in the workbooks so they read without Excel")
+    parser.add_argument('--non-volatile', action='store_true',
+                        help="use INDEX instead of INDIRECT so Excel only recalculates what changed")
+    parser.add_argument('--compact', action='store_true',
+                        help="smaller files: defined names, shared formulas and maximum zip compression")
+    parser.add_argument('--frequency', choices=PAYMENT_FREQUENCIES, default=DEFAULT_LOAN['payment_frequency'],
+                        help="payment frequency of the loan")
+    parser.add_argument('--extra-payment', type=float, default=0, metavar='AMOUNT',
+                        help="extra principal paid with every payment")
+    parser.add_argument('--lump-sum', action='append', default=[], metavar='PAYMENT:AMOUNT',
+                        help="one-off prepayment with a payment, e.g. 12:10000 (repeatable)")
+    args = parser.parse_args()
+    
+    if args.tape:
+        generate_mortgage_batch(args.tape, args.output_dir, workers=args.workers, backend=args.backend,
+                                evaluate=args.evaluate, non_volatile=args.non_volatile, compact=args.compact)
+    else:
+        loan = {'payment_frequency': args.frequency, 'extra_payment': args.extra_payment,
+                'lump_sums': parse_lump_sums(';'.join(args.lump_sum)) or None}
+        create_mortgage_calculator(loan=loan, backend=args.backend, evaluate=args.evaluate,
+                                   non_volatile=args.non_volatile, compact=args.compact)
@@ -0,0 +1,331 @@
+"""Vectorized loan amortization.
+
+Computes a complete payment schedule with NumPy in one pass using the
+closed-form balance of an annuity, rather than row by row. The schedule
+mirrors the columns of the mortgage calculator's Amortization sheet and can be
+used on its own, without producing a workbook.
+
+Prepayment schedules add recurring extra principal and lump sums, which
+shorten the loan; the balance is still found for every period at once, and
+the schedule stops at the payment that pays the loan off.
+"""
+
+import datetime
+
+import numpy as np
+
+PAYMENT_TYPES = ("Standard", "Interest Only", "Balloon")
+
+# Payments per year for each payment frequency
+PAYMENT_FREQUENCIES = {"Monthly": 12, "Biweekly": 26, "Accelerated Biweekly": 26}
+
+# Frequencies that pay half the monthly payment every two weeks, so 13
+# monthly payments go to the loan each year instead of 12
+ACCELERATED_FREQUENCIES = ("Accelerated Biweekly",)
+
+# Balance below which a loan counts as paid off (half a cent)
+PAYOFF_TOLERANCE = 0.005
+
+# Longest loan term supported, in years
+MAX_TERM_YEARS = 40
+
+# Share of the loan amount due at the end of the term for Balloon loans
+BALLOON_RATIO = 0.7
+
+# Schedule keys in Amortization sheet column order (A-I)
+SCHEDULE_COLUMNS = (
+    'payment_number',
+    'payment_date',
+    'beginning_balance',
+    'payment',
+    'principal',
+    'interest',
+    'ending_balance',
+    'cumulative_interest',
+    'balloon_payment'
+)
+
+# Prepayment schedules add the extra principal paid with each payment
+PREPAYMENT_COLUMNS = SCHEDULE_COLUMNS + ('extra_principal',)
+
+
+def periodic_payment(principal, annual_rate, term_years, payment_type="Standard",
+                     periods_per_year=12, balloon_ratio=BALLOON_RATIO):
+    """Return the regular payment, matching the calculator's PMT formulas.
+
+    Arguments may be scalars or NumPy arrays of matching shape.
+    """
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / periods_per_year
+    periods = np.asarray(term_years, dtype=float) * periods_per_year
+
+    if payment_type == "Interest Only":
+        return principal * rate
+
+    balloon = principal * balloon_ratio if payment_type == "Balloon" else 0.0
+    growth = (1 + rate) ** periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = rate * (principal * growth - balloon) / (growth - 1)
+    # PMT with a zero rate is a straight division of the amount repaid
+    return np.where(rate == 0, (principal - balloon) / periods, payment)
+
+
+def payment_count(term_years, payment_frequency="Monthly"):
+    """Number of scheduled payments over a term at a payment frequency."""
+    periods_per_year = PAYMENT_FREQUENCIES.get(payment_frequency)
+    if periods_per_year is None:
+        raise ValueError(f"payment_frequency must be one of {tuple(PAYMENT_FREQUENCIES)}, not {payment_frequency!r}")
+    if not 0 < term_years <= MAX_TERM_YEARS:
+        raise ValueError(f"loan term must be more than 0 and at most {MAX_TERM_YEARS} years, not {term_years!r}")
+    return int(round(term_years * periods_per_year))
+
+
+def add_months(start_date, months):
+    """Return ``start_date`` shifted by each entry of ``months`` like Excel's EDATE."""
+    months = np.asarray(months)
+    start_month = np.datetime64(start_date, 'M')
+    month_start = (start_month + months).astype('datetime64[D]')
+    days_in_month = (start_month + months + 1).astype('datetime64[D]') - month_start
+    day_offset = np.minimum(start_date.day - 1, days_in_month.astype(int) - 1)
+    return month_start + day_offset
+
+
+def amortization_schedule(principal, annual_rate, term_years, payment_type="Standard",
+                          start_date=None, periods=None, periods_per_year=12,
+                          balloon_ratio=BALLOON_RATIO):
+    """Compute an amortization schedule as a dict of NumPy arrays.
+
+    Keys are listed in ``SCHEDULE_COLUMNS``. ``periods`` defaults to the full
+    term; a longer value continues the schedule the way the Amortization
+    sheet's formula rows do. Payment dates follow ``start_date`` (today when
+    omitted) at monthly steps, or every 14 days for biweekly schedules.
+    """
+    if payment_type not in PAYMENT_TYPES:
+        raise ValueError(f"Unknown payment type: {payment_type!r}")
+
+    term_periods = int(round(term_years * periods_per_year))
+    periods = term_periods if periods is None else int(periods)
+    rate = annual_rate / periods_per_year
+    payment = float(periodic_payment(principal, annual_rate, term_years, payment_type,
+                                     periods_per_year, balloon_ratio))
+
+    k = np.arange(1, periods + 1)
+    if payment_type == "Interest Only":
+        beginning = np.full(periods, float(principal))
+        ending = beginning.copy()
+    else:
+        # Balance after k payments: P(1+r)^k - A((1+r)^k - 1)/r
+        growth = (1 + rate) ** np.arange(0, periods + 1)
+        if rate == 0:
+            balances = principal - payment * np.arange(0, periods + 1)
+        else:
+            balances = principal * growth - payment * (growth - 1) / rate
+        beginning = balances[:-1]
+        ending = balances[1:]
+
+    interest = beginning * rate
+    payments = np.full(periods, payment)
+    principal_paid = beginning - ending
+
+    balloon_payment = np.zeros(periods)
+    if payment_type == "Balloon" and term_periods <= periods:
+        balloon_payment[term_periods - 1] = principal * balloon_ratio
+
+    if start_date is None:
+        start_date = datetime.date.today()
+
+    return {
+        'payment_number': k,
+        'payment_date': payment_dates(start_date, periods, periods_per_year),
+        'beginning_balance': beginning,
+        'payment': payments,
+        'principal': principal_paid,
+        'interest': interest,
+        'ending_balance': ending,
+        'cumulative_interest': np.cumsum(interest),
+        'balloon_payment': balloon_payment
+    }
+
+
+def payment_dates(start_date, periods, periods_per_year=12):
+    """Dates of the first ``periods`` payments after ``start_date``."""
+    k = np.arange(1, periods + 1)
+    if periods_per_year == 12:
+        return add_months(start_date, k)
+    return np.datetime64(start_date, 'D') + k * int(round(364 / periods_per_year))
+
+
+def prepayment_extras(periods, extra_payment=0.0, lump_sums=None):
+    """Extra principal offered with each of ``periods`` payments.
+
+    ``extra_payment`` is added to every payment and ``lump_sums`` maps payment
+    numbers (from 1) to one-off amounts; lump sums after the last period are
+    ignored.
+    """
+    extras = np.full(periods, float(extra_payment))
+    for number, amount in (lump_sums or {}).items():
+        if 1 <= int(number) <= periods:
+            extras[int(number) - 1] += float(amount)
+    return extras
+
+
+def prepaid_balances(principal, rate, payment, extras, interest_only=False):
+    """Balances after each payment when ``extras`` is paid on top of ``payment``.
+
+    ``extras`` has one entry per period along its last axis, and may stack
+    several strategies along the others. Returns the opening balance followed
+    by the balance after each payment, with the same leading shape; balances
+    are 0 from the payment that pays the loan off.
+    """
+    extras = np.asarray(extras, dtype=float)
+    paid = np.cumsum(extras, axis=-1)
+    if interest_only:
+        # Interest-only payments never reduce the balance; only the extras do
+        balances = principal - paid
+    elif rate == 0:
+        balances = principal - payment * np.arange(1, extras.shape[-1] + 1) - paid
+    else:
+        # Balance after k payments: (1+r)^k (P - sum of each payment discounted to the start)
+        growth = (1 + rate) ** np.arange(1, extras.shape[-1] + 1)
+        balances = growth * (principal - np.cumsum((payment + extras) / growth, axis=-1))
+    opening = np.full(extras.shape[:-1] + (1,), float(principal))
+    balances = np.concatenate([opening, balances], axis=-1)
+    return np.where(np.maximum.accumulate(balances <= PAYOFF_TOLERANCE, axis=-1), 0.0, balances)
+
+
+def _frequency_terms(principal, annual_rate, term_years, payment_type, payment_frequency, balloon_ratio):
+    """Periods per year, rate per period, term in periods and regular payment."""
+    periods = payment_count(term_years, payment_frequency)
+    periods_per_year = PAYMENT_FREQUENCIES[payment_frequency]
+    if payment_frequency in ACCELERATED_FREQUENCIES:
+        payment = float(periodic_payment(principal, annual_rate, term_years, payment_type, 12, balloon_ratio)) / 2
+    else:
+        payment = float(periodic_payment(principal, annual_rate, term_years, payment_type,
+                                         periods_per_year, balloon_ratio))
+    return periods_per_year, annual_rate / periods_per_year, periods, payment
+
+
+def prepayment_schedule(principal, annual_rate, term_years, payment_type="Standard", start_date=None,
+                        payment_frequency="Monthly", extra_payment=0.0, lump_sums=None,
+                        balloon_ratio=BALLOON_RATIO):
+    """Compute a schedule with extra principal payments, ending when the loan is paid off.
+
+    Keys are listed in ``PREPAYMENT_COLUMNS``; there is one row per payment
+    actually made, so a loan paid off early has fewer rows than its term. The
+    last payment and its extra principal are cut down to what is owed. Interest
+    Only payments follow the balance as prepayments reduce it, and a Balloon
+    loan that is not paid off early owes its remaining balance at the end of
+    the term.
+    """
+    if payment_type not in PAYMENT_TYPES:
+        raise ValueError(f"Unknown payment type: {payment_type!r}")
+
+    periods_per_year, rate, term_periods, payment = _frequency_terms(
+        principal, annual_rate, term_years, payment_type, payment_frequency, balloon_ratio)
+    offered = prepayment_extras(term_periods, extra_payment, lump_sums)
+    interest_only = payment_type == "Interest Only"
+    balances = prepaid_balances(principal, rate, payment, offered, interest_only)
+
+    # The payment that brings the balance to 0 is the last one needed
+    paid_off = np.flatnonzero(balances[1:] == 0)
+    periods = int(paid_off[0]) + 1 if paid_off.size else term_periods
+
+    beginning = balances[:periods]
+    interest = beginning * rate
+    owed = beginning + interest
+    scheduled = interest if interest_only else np.minimum(payment, owed)
+    extra = np.minimum(offered[:periods], owed - scheduled)
+    principal_paid = scheduled - interest + extra
+    ending = np.append(balances[1:periods], beginning[-1] - principal_paid[-1])
+
+    balloon_payment = np.zeros(periods)
+    if payment_type == "Balloon" and periods == term_periods:
+        balloon_payment[-1] = ending[-1]
+
+    if start_date is None:
+        start_date = datetime.date.today()
+
+    return {
+        'payment_number': np.arange(1, periods + 1),
+        'payment_date': payment_dates(start_date, periods, periods_per_year),
+        'beginning_balance': beginning,
+        'payment': scheduled,
+        'principal': principal_paid,
+        'interest': interest,
+        'ending_balance': ending,
+        'cumulative_interest': np.cumsum(interest),
+        'balloon_payment': balloon_payment,
+        'extra_principal': extra
+    }
+
+
+def compare_strategies(principal, annual_rate, term_years, strategies, payment_type="Standard",
+                       start_date=None, balloon_ratio=BALLOON_RATIO):
+    """Compare prepayment strategies for one loan.
+
+    Each strategy is a dict with an optional ``name``, ``payment_frequency``,
+    ``extra_payment`` and ``lump_sums`` (as for ``prepayment_schedule``).
+    Strategies on the same payment frequency are evaluated together in one
+    set of array operations. Returns a dict of per-strategy arrays: the
+    number of payments, payoff date, total interest and total paid, plus the
+    interest and years saved against the loan paid monthly without
+    prepayments.
+    """
+    if payment_type not in PAYMENT_TYPES:
+        raise ValueError(f"Unknown payment type: {payment_type!r}")
+    if start_date is None:
+        start_date = datetime.date.today()
+
+    count = len(strategies)
+    payments = np.zeros(count, dtype=int)
+    payoff_date = np.zeros(count, dtype='datetime64[D]')
+    total_interest = np.zeros(count)
+    years = np.zeros(count)
+
+    by_frequency = {}
+    for index, strategy in enumerate(strategies):
+        by_frequency.setdefault(strategy.get('payment_frequency', "Monthly"), []).append(index)
+
+    for frequency, indexes in by_frequency.items():
+        periods_per_year, rate, term_periods, payment = _frequency_terms(
+            principal, annual_rate, term_years, payment_type, frequency, balloon_ratio)
+        offered = np.stack([prepayment_extras(term_periods, strategies[index].get('extra_payment', 0.0),
+                                              strategies[index].get('lump_sums'))
+                            for index in indexes])
+        balances = prepaid_balances(principal, rate, payment, offered, payment_type == "Interest Only")
+
+        # Payments made: up to the first zero balance, or the whole term
+        paid_off = balances[:, 1:] == 0
+        made = np.where(paid_off.any(axis=1), paid_off.argmax(axis=1) + 1, term_periods)
+        dates = payment_dates(start_date, term_periods, periods_per_year)
+        payments[indexes] = made
+        payoff_date[indexes] = dates[made - 1]
+        # Balances are 0 after payoff, so later periods add no interest
+        total_interest[indexes] = balances[:, :-1].sum(axis=1) * rate
+        years[indexes] = made / periods_per_year
+
+    baseline = prepayment_schedule(principal, annual_rate, term_years, payment_type, start_date,
+                                   balloon_ratio=balloon_ratio)
+    baseline_interest = baseline['cumulative_interest'][-1]
+
+    return {
+        'names': [strategy.get('name', f"Strategy {index}") for index, strategy in enumerate(strategies, 1)],
+        'payments': payments,
+        'payoff_date': payoff_date,
+        'total_interest': total_interest,
+        'total_paid': principal + total_interest,
+        'interest_saved': baseline_interest - total_interest,
+        'years_saved': len(baseline['payment_number']) / 12 - years
+    }
+
+
+def schedule_rows(schedule):
+    """Yield the schedule one row at a time as plain Python values."""
+    columns = [schedule[key].tolist() for key in PREPAYMENT_COLUMNS if key in schedule]
+    return zip(*columns)
+
+
+def schedule_to_frame(schedule):
+    """Return the schedule as a pandas DataFrame (pandas is imported on demand)."""
+    import pandas as pd
+    return pd.DataFrame({key: schedule[key] for key in PREPAYMENT_COLUMNS if key in schedule})
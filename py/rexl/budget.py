@@ -0,0 +1,245 @@
+"""Development budget data model.
+
+Builds the line items and totals of a development budget as plain data,
+separately from any workbook, so the same budget can be written to several
+formats, compared or deduplicated. Amounts are drawn from a private random
+generator: a seed makes the budget reproducible, and seeded models are
+memoized.
+"""
+
+import copy
+import csv
+import functools
+import hashlib
+import json
+import random
+
+# Sections, their categories and the line items in each
+BUDGET_STRUCTURE = {
+    "hardCosts": [
+        {"category": "Site Work", "items": ["Site Preparation", "Excavation", "Landscaping"]},
+        {"category": "Structure", "items": ["Framing", "Concrete", "Roofing"]},
+        {"category": "Mechanical", "items": ["HVAC", "Plumbing", "Electrical"]},
+        {"category": "Finishes", "items": ["Drywall", "Flooring", "Paint"]},
+        {"category": "Contingency", "items": ["Construction Contingency"]}
+    ],
+    "softCosts": [
+        {"category": "Professional Fees", "items": ["Architecture", "Engineering", "Legal"]},
+        {"category": "Permits & Fees", "items": ["Building Permits", "Impact Fees"]},
+        {"category": "Financing", "items": ["Loan Fees", "Interest"]},
+        {"category": "Marketing", "items": ["Marketing Materials", "Promotions"]},
+        {"category": "Contingency", "items": ["Soft Cost Contingency"]}
+    ],
+    "other": [
+        {"category": "Land", "items": ["Land Acquisition", "Closing Costs"]},
+        {"category": "Taxes & Insurance", "items": ["Property Taxes", "Insurance"]}
+    ]
+}
+
+# Values to control relative size of each section
+SECTION_MULTIPLIERS = {"hardCosts": 5, "softCosts": 3, "other": 2}
+
+# Section labels used in the workbook
+SECTION_NAMES = {"hardCosts": "HARD COSTS", "softCosts": "SOFT COSTS", "other": "OTHER COSTS"}
+
+# Forecast curve for each section, and categories spent differently from their section
+SECTION_CURVES = {"hardCosts": "s-curve", "softCosts": "front-loaded", "other": "straight-line"}
+CATEGORY_CURVES = {"Land": "upfront"}
+
+# MasterFormat division titles by two-digit division number
+MASTERFORMAT_DIVISIONS = {
+    "00": "Procurement and Contracting Requirements",
+    "01": "General Requirements",
+    "02": "Existing Conditions",
+    "03": "Concrete",
+    "04": "Masonry",
+    "05": "Metals",
+    "06": "Wood, Plastics, and Composites",
+    "07": "Thermal and Moisture Protection",
+    "08": "Openings",
+    "09": "Finishes",
+    "10": "Specialties",
+    "11": "Equipment",
+    "12": "Furnishings",
+    "13": "Special Construction",
+    "14": "Conveying Equipment",
+    "21": "Fire Suppression",
+    "22": "Plumbing",
+    "23": "Heating, Ventilating, and Air Conditioning (HVAC)",
+    "25": "Integrated Automation",
+    "26": "Electrical",
+    "27": "Communications",
+    "28": "Electronic Safety and Security",
+    "31": "Earthwork",
+    "32": "Exterior Improvements",
+    "33": "Utilities",
+    "34": "Transportation",
+    "35": "Waterway and Marine Construction",
+    "40": "Process Interconnections",
+    "41": "Material Processing and Handling Equipment",
+    "42": "Process Heating, Cooling, and Drying Equipment",
+    "43": "Process Gas and Liquid Handling, Purification, and Storage Equipment",
+    "44": "Pollution and Waste Control Equipment",
+    "45": "Industry-Specific Manufacturing Equipment",
+    "46": "Water and Wastewater Equipment",
+    "48": "Electrical Power Generation"
+}
+
+# Cost breakdown CSV headers (lower case) -> line item fields
+COST_BREAKDOWN_COLUMNS = {
+    'code': 'code',
+    'csi_code': 'code',
+    'section_code': 'code',
+    'description': 'description',
+    'item': 'description',
+    'line_item': 'description',
+    'amount': 'amount',
+    'cost': 'amount',
+    'budget': 'amount',
+    'division': 'division',
+    'division_name': 'division_name',
+    'cost_type': 'section',
+    'section': 'section'
+}
+
+# Accepted cost_type values -> budget sections
+COST_TYPES = {
+    'hard': 'hardCosts', 'hard costs': 'hardCosts', 'hardcosts': 'hardCosts',
+    'soft': 'softCosts', 'soft costs': 'softCosts', 'softcosts': 'softCosts',
+    'other': 'other', 'other costs': 'other'
+}
+
+# Contingency items are this share of their section's costs listed before them
+CONTINGENCY_RATE = 0.05
+
+
+def _generate_model(rng, structure):
+    section_totals = {section: 0 for section in structure}
+    line_items = []
+
+    for section, categories in structure.items():
+        section_multiplier = SECTION_MULTIPLIERS.get(section, 1)
+
+        for category in categories:
+            category_name = category["category"]
+            category_total = 0
+
+            for item in category["items"]:
+                # Generate a realistic amount
+                amount = rng.randint(5, 50) * 10000 * section_multiplier
+
+                # Adjust special items
+                if item == "Land Acquisition":
+                    amount = rng.randint(30, 50) * 100000
+                elif "Contingency" in item and section in ("hardCosts", "softCosts"):
+                    amount = int(section_totals[section] * CONTINGENCY_RATE)
+
+                category_total += amount
+                line_items.append({
+                    "section": section,
+                    "section_name": SECTION_NAMES.get(section, section.upper()),
+                    "category": category_name,
+                    "item": item,
+                    "amount": amount
+                })
+
+            section_totals[section] += category_total
+
+    return model_from_line_items(line_items)
+
+
+def model_from_line_items(line_items):
+    """Build a budget model, with its totals, around existing line items."""
+    section_totals = {section: 0 for section in SECTION_NAMES}
+    category_totals = {}
+    for item in line_items:
+        key = f"{item['section']}_{item['category']}"
+        category_totals[key] = category_totals.get(key, 0) + item["amount"]
+        section_totals[item["section"]] = section_totals.get(item["section"], 0) + item["amount"]
+
+    # Amounts read from files are floats; keep totals to the cent
+    return {
+        "line_items": line_items,
+        "category_totals": {key: round(total, 2) for key, total in category_totals.items()},
+        "section_totals": {section: round(total, 2) for section, total in section_totals.items()},
+        "total_budget": round(sum(section_totals.values()), 2)
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def _seeded_model(seed, structure_json):
+    return _generate_model(random.Random(seed), json.loads(structure_json))
+
+
+def build_budget_model(seed=None, structure=None):
+    """Generate budget line items and totals.
+
+    Returns a dict with ``line_items`` (section, section_name, category, item
+    and amount for each item, in structure order), ``category_totals`` keyed
+    ``"<section>_<category>"``, ``section_totals`` and ``total_budget``. The
+    same seed and structure always give the same model; seeded models are
+    built once and copies are returned.
+    """
+    structure = BUDGET_STRUCTURE if structure is None else structure
+    if seed is None:
+        return _generate_model(random.Random(), structure)
+    return copy.deepcopy(_seeded_model(seed, json.dumps(structure)))
+
+
+def parse_cost_item(record):
+    """Convert one cost breakdown record into a budget line item.
+
+    Only ``amount`` and ``description`` are required. The division comes from
+    the first two digits of ``code`` when not given, and its name from
+    MASTERFORMAT_DIVISIONS; items without a ``cost_type`` are hard costs.
+    """
+    fields = {}
+    for column, value in record.items():
+        key = COST_BREAKDOWN_COLUMNS.get((column or '').strip().lower())
+        if key is not None and value is not None and str(value).strip():
+            fields[key] = str(value).strip()
+
+    if 'amount' not in fields or 'description' not in fields:
+        raise ValueError(f"cost items need an amount and a description: {record}")
+    code = fields.get('code', '')
+    division = fields.get('division') or code.replace(' ', '')[:2]
+    division_name = fields.get('division_name') or MASTERFORMAT_DIVISIONS.get(division, "Unclassified")
+    section = COST_TYPES.get(fields.get('section', 'hard').lower())
+    if section is None:
+        raise ValueError(f"cost_type must be one of {sorted(set(COST_TYPES))}, not {fields['section']!r}")
+
+    return {
+        "section": section,
+        "section_name": SECTION_NAMES[section],
+        "category": f"{division} {division_name}" if division else division_name,
+        "item": f"{code} {fields['description']}" if code else fields['description'],
+        "amount": float(fields['amount'].replace(',', '').replace('$', ''))
+    }
+
+
+def load_cost_breakdown(path):
+    """Build a budget model from a MasterFormat-style cost breakdown CSV.
+
+    Each row is one line item (see parse_cost_item), kept in file order.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        line_items = [parse_cost_item(record) for record in csv.DictReader(f)]
+    return model_from_line_items(line_items)
+
+
+def line_item_curves(model, curve=None):
+    """Forecast curve names for the model's line items (see rexl.forecast).
+
+    ``curve`` applies one curve to every item; by default land is spent
+    upfront and every other item follows its section's curve.
+    """
+    if curve is not None:
+        return [curve] * len(model["line_items"])
+    return [CATEGORY_CURVES.get(item["category"], SECTION_CURVES.get(item["section"], "straight-line"))
+            for item in model["line_items"]]
+
+
+def budget_fingerprint(model):
+    """Stable SHA-256 of a model's contents, for spotting identical budgets."""
+    data = {key: model[key] for key in ("line_items", "category_totals", "section_totals", "total_budget")}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
@@ -0,0 +1,663 @@
+"""Evaluate workbook formulas without Excel.
+
+Generated workbooks are mostly formulas, and openpyxl saves them without
+results, so anything reading the files with ``data_only=True`` sees empty
+cells. ``Evaluator`` computes those results in Python: each formula is parsed
+once (with openpyxl's tokenizer) into nested closures, formula cells are
+ordered by their references with ``graphlib`` and evaluated in that order.
+References only known at run time (``INDIRECT``) are resolved in later passes
+once everything they might point at has a value. Workbook-level defined names
+are expanded where they are used.
+
+Only the functions and operators the RExl generators use are supported (see
+FUNCTIONS); a formula using anything else is left without a cached value.
+``volatile_cells`` lists formulas that make Excel recalculate on every edit.
+"""
+
+import calendar
+import datetime
+import decimal
+import graphlib
+import io
+import re
+
+import openpyxl
+from openpyxl.formula.tokenizer import Token, Tokenizer
+from openpyxl.utils.cell import range_boundaries, get_column_letter
+from openpyxl.utils.datetime import from_excel, to_excel
+
+from rexl.xlsxpatch import inject_cached_values
+
+# Binary operators by precedence, loosest first; all are left-associative
+PRECEDENCE = {
+    '=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1,
+    '&': 2,
+    '+': 3, '-': 3,
+    '*': 4, '/': 4,
+    '^': 5
+}
+
+# Functions Excel recalculates after every edit, whatever changed
+VOLATILE_FUNCTIONS = frozenset({
+    'INDIRECT', 'OFFSET', 'NOW', 'TODAY', 'RAND', 'RANDBETWEEN', 'RANDARRAY', 'CELL', 'INFO'
+})
+
+# Text formats accepted where a date is expected, as Excel does for date strings
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%m/%d/%y")
+
+CELL_REFERENCE = re.compile(r'^\$?([A-Za-z]{1,3})\$?([0-9]+)$')
+
+
+class FormulaError(Exception):
+    """An Excel error value such as #DIV/0!, raised while evaluating."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class _Pending(Exception):
+    """A formula read a formula cell that has not been evaluated yet."""
+
+
+class Reference:
+    """A cell or a rectangular range on one sheet."""
+
+    __slots__ = ('sheet', 'min_col', 'min_row', 'max_col', 'max_row')
+
+    def __init__(self, sheet, min_col, min_row, max_col, max_row):
+        self.sheet = sheet
+        self.min_col = min_col
+        self.min_row = min_row
+        self.max_col = max_col
+        self.max_row = max_row
+
+    @classmethod
+    def parse(cls, text, default_sheet):
+        """Parse ``A1``, ``$A$1:B2``, ``Sheet!A1`` or ``'My Sheet'!A1:A9``; None if not a reference."""
+        sheet, _, ref = text.rpartition('!')
+        if sheet:
+            if sheet.startswith("'") and sheet.endswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        else:
+            sheet = default_sheet
+        corners = ref.split(':')
+        if len(corners) > 2 or not all(CELL_REFERENCE.match(corner) for corner in corners):
+            return None
+        min_col, min_row, max_col, max_row = range_boundaries(ref.replace('$', '').upper())
+        return cls(sheet, min_col, min_row, max_col, max_row)
+
+    def keys(self):
+        """``(sheet, coordinate)`` of every cell, row by row."""
+        return [(self.sheet, f"{get_column_letter(column)}{row}")
+                for row in range(self.min_row, self.max_row + 1)
+                for column in range(self.min_col, self.max_col + 1)]
+
+    @property
+    def is_cell(self):
+        return self.min_col == self.max_col and self.min_row == self.max_row
+
+
+class Area:
+    """Values of a multi-cell range, as rows of cell values."""
+
+    __slots__ = ('rows',)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def values(self):
+        return [value for row in self.rows for value in row]
+
+
+# ---------------------------------------------------------------- coercion
+
+def to_number(value):
+    """Coerce a value the way Excel arithmetic does."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if value is None:
+        return 0
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return to_excel(value)
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return float(text.replace(',', '')) if text else 0
+        except ValueError:
+            pass
+        if text.endswith('%'):
+            try:
+                return float(text[:-1]) / 100
+            except ValueError:
+                pass
+        for date_format in DATE_FORMATS:
+            try:
+                return to_excel(datetime.datetime.strptime(text, date_format))
+            except ValueError:
+                continue
+    raise FormulaError('#VALUE!')
+
+
+def to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        return repr(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def to_bool(value):
+    if isinstance(value, str):
+        if value.upper() in ("TRUE", "FALSE"):
+            return value.upper() == "TRUE"
+        raise FormulaError('#VALUE!')
+    return bool(to_number(value))
+
+
+def scalar(value):
+    """A single value; a multi-cell range cannot be used as one."""
+    if isinstance(value, Area):
+        raise FormulaError('#VALUE!')
+    return value
+
+
+def _number_result(value):
+    """Return whole floats as ints, as Excel stores them."""
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            raise FormulaError('#NUM!')
+        if value.is_integer() and abs(value) < 2 ** 53:
+            return int(value)
+    return value
+
+
+def _compare_key(value):
+    """Order numbers before text before booleans, as Excel comparisons do."""
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, str):
+        return (1, value.lower())
+    return (0, to_number(value))
+
+
+def compare(operator, left, right):
+    # An empty cell compares as 0 to numbers and as "" to text
+    if left is None:
+        left = "" if isinstance(right, str) else 0
+    if right is None:
+        right = "" if isinstance(left, str) else 0
+    left, right = _compare_key(left), _compare_key(right)
+    return {
+        '=': left == right, '<>': left != right,
+        '<': left < right, '>': left > right,
+        '<=': left <= right, '>=': left >= right
+    }[operator]
+
+
+def _arithmetic(operator, left, right):
+    left, right = to_number(left), to_number(right)
+    if operator == '+':
+        return left + right
+    if operator == '-':
+        return left - right
+    if operator == '*':
+        return left * right
+    if operator == '/':
+        if right == 0:
+            raise FormulaError('#DIV/0!')
+        return left / right
+    try:
+        return float(left) ** right
+    except (OverflowError, ZeroDivisionError):
+        raise FormulaError('#NUM!')
+
+
+# ---------------------------------------------------------------- functions
+
+def _numbers(args):
+    """Numbers for SUM/MAX/MIN: text and booleans inside ranges are skipped."""
+    numbers = []
+    for arg in args:
+        if isinstance(arg, Area):
+            numbers.extend(value for value in arg.values()
+                           if isinstance(value, (int, float)) and not isinstance(value, bool))
+        elif arg is not None:
+            numbers.append(to_number(arg))
+    return numbers
+
+
+def fn_sum(*args):
+    return sum(_numbers(args))
+
+
+def fn_max(*args):
+    return max(_numbers(args), default=0)
+
+
+def fn_min(*args):
+    return min(_numbers(args), default=0)
+
+
+def fn_abs(value):
+    return abs(to_number(scalar(value)))
+
+
+def fn_round(value, digits=0):
+    # Halves round away from zero in Excel, unlike Python's round()
+    number = decimal.Decimal(repr(to_number(scalar(value))))
+    quantum = decimal.Decimal(1).scaleb(-int(to_number(scalar(digits))))
+    return float(number.quantize(quantum, rounding=decimal.ROUND_HALF_UP))
+
+
+def fn_and(*args):
+    return all(to_bool(value) for arg in args for value in (arg.values() if isinstance(arg, Area) else [arg]))
+
+
+def fn_or(*args):
+    return any(to_bool(value) for arg in args for value in (arg.values() if isinstance(arg, Area) else [arg]))
+
+
+def fn_not(value):
+    return not to_bool(scalar(value))
+
+
+def fn_pmt(rate, nper, pv, fv=0, when=0):
+    rate, nper, pv, fv, when = (to_number(scalar(arg)) for arg in (rate, nper, pv, fv, when))
+    if nper == 0:
+        raise FormulaError('#NUM!')
+    if rate == 0:
+        return -(pv + fv) / nper
+    growth = (1 + rate) ** nper
+    return -(rate * (fv + pv * growth)) / ((1 + rate * when) * (growth - 1))
+
+
+def fn_pv(rate, nper, pmt, fv=0, when=0):
+    rate, nper, pmt, fv, when = (to_number(scalar(arg)) for arg in (rate, nper, pmt, fv, when))
+    if rate == 0:
+        return -(fv + pmt * nper)
+    growth = (1 + rate) ** nper
+    return -(fv + pmt * (1 + rate * when) * (growth - 1) / rate) / growth
+
+
+def fn_edate(start, months):
+    start = from_excel(int(to_number(scalar(start))))
+    months = int(to_number(scalar(months)))
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    day = min(start.day, calendar.monthrange(year, month + 1)[1])
+    return int(to_excel(datetime.date(year, month + 1, day)))
+
+
+def fn_index(area, row, column=None):
+    rows = area.rows if isinstance(area, Area) else [[area]]
+    row = int(to_number(scalar(row)))
+    if column is None:
+        # A single index counts along a one-row range
+        row, column = (1, row) if len(rows) == 1 else (row, 1)
+    else:
+        column = int(to_number(scalar(column)))
+    if not (1 <= row <= len(rows) and 1 <= column <= len(rows[0])):
+        raise FormulaError('#REF!')
+    return rows[row - 1][column - 1]
+
+
+# Supported functions; IF and INDIRECT are handled while compiling
+FUNCTIONS = {
+    'SUM': fn_sum,
+    'MAX': fn_max,
+    'MIN': fn_min,
+    'ABS': fn_abs,
+    'ROUND': fn_round,
+    'AND': fn_and,
+    'OR': fn_or,
+    'NOT': fn_not,
+    'PMT': fn_pmt,
+    'PV': fn_pv,
+    'EDATE': fn_edate,
+    'INDEX': fn_index
+}
+
+
+# ---------------------------------------------------------------- parsing
+
+class _Parser:
+    """Compile one formula's tokens into a function of the evaluator."""
+
+    def __init__(self, formula, sheet, names=None, expanding=()):
+        self.tokens = [token for token in Tokenizer(formula).items if token.type != Token.WSPACE]
+        self.position = 0
+        self.sheet = sheet
+        self.names = names or {}
+        self.expanding = expanding
+        self.references = []
+        self.dynamic = False
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise FormulaError('#NAME?')
+        self.position += 1
+        return token
+
+    def compile(self):
+        node = self.expression(0)
+        if self.peek() is not None:
+            raise FormulaError('#NAME?')
+        return node
+
+    def expression(self, min_precedence):
+        left = self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token.type != Token.OP_IN or PRECEDENCE.get(token.value, 0) <= min_precedence:
+                return left
+            self.position += 1
+            right = self.expression(PRECEDENCE[token.value])
+            left = self.binary(token.value, left, right)
+
+    @staticmethod
+    def binary(operator, left, right):
+        if operator == '&':
+            return lambda ev: to_text(scalar(left(ev))) + to_text(scalar(right(ev)))
+        if PRECEDENCE[operator] == 1:
+            return lambda ev: compare(operator, scalar(left(ev)), scalar(right(ev)))
+        return lambda ev: _arithmetic(operator, scalar(left(ev)), scalar(right(ev)))
+
+    def unary(self):
+        token = self.peek()
+        if token is not None and token.type == Token.OP_PRE:
+            self.position += 1
+            operand = self.unary()
+            if token.value == '-':
+                return lambda ev: -to_number(scalar(operand(ev)))
+            return operand
+        node = self.primary()
+        token = self.peek()
+        while token is not None and token.type == Token.OP_POST:
+            self.position += 1
+            node = (lambda inner: lambda ev: to_number(scalar(inner(ev))) / 100)(node)
+            token = self.peek()
+        return node
+
+    def primary(self):
+        token = self.take()
+        if token.type == Token.OPERAND:
+            return self.operand(token)
+        if token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self.expression(0)
+            closing = self.take()
+            if closing.type != Token.PAREN:
+                raise FormulaError('#NAME?')
+            return node
+        if token.type == Token.FUNC and token.subtype == Token.OPEN:
+            return self.function(token.value[:-1].upper())
+        raise FormulaError('#NAME?')
+
+    def operand(self, token):
+        if token.subtype == Token.NUMBER:
+            number = float(token.value)
+            value = int(number) if number.is_integer() else number
+            return lambda ev: value
+        if token.subtype == Token.TEXT:
+            text = token.value[1:-1].replace('""', '"')
+            return lambda ev: text
+        if token.subtype == Token.LOGICAL:
+            logical = token.value.upper() == "TRUE"
+            return lambda ev: logical
+        if token.subtype == Token.ERROR:
+            code = token.value
+
+            def error(ev):
+                raise FormulaError(code)
+            return error
+
+        reference = Reference.parse(token.value, self.sheet)
+        if reference is None:
+            return self.defined_name(token.value.upper())
+        self.references.extend(reference.keys())
+        return lambda ev: ev.read(reference)
+
+    def defined_name(self, name):
+        # A name stands for its formula, compiled in place; names are case-insensitive
+        if name not in self.names or name in self.expanding:
+            raise FormulaError('#NAME?')
+        parser = _Parser('=' + self.names[name], self.sheet, self.names, self.expanding + (name,))
+        node = parser.compile()
+        self.references.extend(parser.references)
+        self.dynamic = self.dynamic or parser.dynamic
+        return node
+
+    def arguments(self):
+        args = []
+        token = self.peek()
+        if token is not None and token.type == Token.FUNC and token.subtype == Token.CLOSE:
+            self.position += 1
+            return args
+        while True:
+            token = self.peek()
+            if token is not None and token.type == Token.SEP or (
+                    token is not None and token.type == Token.FUNC and token.subtype == Token.CLOSE):
+                # Omitted argument, as in IF(A1,,B1)
+                args.append(lambda ev: None)
+            else:
+                args.append(self.expression(0))
+            token = self.take()
+            if token.type == Token.FUNC and token.subtype == Token.CLOSE:
+                return args
+            if token.type != Token.SEP:
+                raise FormulaError('#NAME?')
+
+    def function(self, name):
+        args = self.arguments()
+        if name == 'IF':
+            if not 2 <= len(args) <= 3:
+                raise FormulaError('#NAME?')
+            condition, if_true = args[0], args[1]
+            if_false = args[2] if len(args) == 3 else (lambda ev: False)
+            # Only the branch taken is evaluated, as in Excel
+            return lambda ev: if_true(ev) if to_bool(scalar(condition(ev))) else if_false(ev)
+        if name == 'INDIRECT':
+            if len(args) != 1:
+                raise FormulaError('#NAME?')
+            self.dynamic = True
+            target, sheet = args[0], self.sheet
+
+            def indirect(ev):
+                reference = Reference.parse(to_text(scalar(target(ev))), sheet)
+                if reference is None:
+                    raise FormulaError('#REF!')
+                return ev.read(reference)
+            return indirect
+
+        function = FUNCTIONS.get(name)
+        if function is None:
+            raise FormulaError('#NAME?')
+        return lambda ev: function(*(arg(ev) for arg in args))
+
+
+# ---------------------------------------------------------------- evaluation
+
+class Evaluator:
+    """Evaluates every formula of a workbook, given as ``{sheet: {coordinate: value}}``.
+
+    Strings starting with '=' are formulas; anything else is a constant.
+    ``names`` maps workbook defined names to their formulas (without '=').
+    The formulas are compiled and ordered once, so ``evaluate`` can be called
+    repeatedly with different input values.
+    """
+
+    def __init__(self, cells, names=None):
+        names = {name.upper(): text for name, text in (names or {}).items()}
+        self.constants = {}
+        self.formulas = {}
+        self.unsupported = {}
+        dependencies = {}
+        self.dynamic = set()
+        for sheet, sheet_cells in cells.items():
+            for coordinate, value in sheet_cells.items():
+                key = (sheet, coordinate)
+                if isinstance(value, str) and value.startswith('=') and len(value) > 1:
+                    try:
+                        parser = _Parser(value, sheet, names)
+                        self.formulas[key] = parser.compile()
+                    except Exception:
+                        self.unsupported[key] = value
+                        continue
+                    dependencies[key] = parser.references
+                    if parser.dynamic:
+                        self.dynamic.add(key)
+                else:
+                    self.constants[key] = value
+
+        # Only formula cells need ordering; references to constants are always ready
+        graph = {key: [dep for dep in deps if dep in self.formulas] for key, deps in dependencies.items()}
+        try:
+            self.order = list(graphlib.TopologicalSorter(graph).static_order())
+        except graphlib.CycleError:
+            # Circular references never resolve and are left without values
+            self.order = list(graph)
+        self._values = None
+        self._results = None
+
+    @classmethod
+    def from_file(cls, source):
+        """Read a saved workbook (a path, bytes or binary file object)."""
+        return cls(*read_workbook(source))
+
+    def read(self, reference):
+        if reference.is_cell:
+            return self._value(reference.keys()[0])
+        # Rows of values for multi-cell ranges
+        width = reference.max_col - reference.min_col + 1
+        keys = reference.keys()
+        values = [self._value(key) for key in keys]
+        return Area([values[start:start + width] for start in range(0, len(values), width)])
+
+    def _value(self, key):
+        results = self._results
+        if key in results:
+            value = results[key]
+            if isinstance(value, FormulaError):
+                raise value
+            return value
+        values = self._values
+        # Unsupported formulas never get a value, so neither does anything using them
+        if (key in self.formulas or key in self.unsupported) and key not in values:
+            raise _Pending()
+        return values.get(key)
+
+    def evaluate(self, inputs=None):
+        """Return ``{sheet: {coordinate: result}}`` for every formula cell.
+
+        ``inputs`` overrides cell values as ``{sheet: {coordinate: value}}``.
+        Results are numbers, strings, booleans or ``FormulaError`` instances;
+        cells that could not be evaluated are left out.
+        """
+        overrides = {(sheet, coordinate): value
+                     for sheet, sheet_cells in (inputs or {}).items()
+                     for coordinate, value in sheet_cells.items()}
+        self._values = {**self.constants, **overrides}
+        self._results = results = {}
+
+        pending = [key for key in self.order if key not in overrides]
+        while pending:
+            deferred = []
+            for key in pending:
+                try:
+                    value = scalar(self.formulas[key](self))
+                    # A formula showing an empty cell displays 0
+                    results[key] = 0 if value is None else _number_result(value)
+                except _Pending:
+                    deferred.append(key)
+                except FormulaError as e:
+                    results[key] = e
+                except (ArithmeticError, ValueError, TypeError):
+                    results[key] = FormulaError('#NUM!')
+            # Stop once a pass makes no progress (circular references)
+            if len(deferred) == len(pending):
+                break
+            pending = deferred
+
+        by_sheet = {}
+        for (sheet, coordinate), value in results.items():
+            by_sheet.setdefault(sheet, {})[coordinate] = value
+        return by_sheet
+
+
+def read_workbook(source):
+    """Read a saved workbook's cells and defined names.
+
+    Returns ``({sheet: {coordinate: value}}, {name: formula})``; formulas stay
+    text and shared formulas are expanded for every cell.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    wb = openpyxl.load_workbook(source, read_only=True)
+    try:
+        cells = {}
+        for ws in wb.worksheets:
+            cells[ws.title] = {cell.coordinate: cell.value
+                               for row in ws.iter_rows() for cell in row
+                               if getattr(cell, 'value', None) is not None}
+        names = {name: defined.attr_text for name, defined in wb.defined_names.items()}
+    finally:
+        wb.close()
+    return cells, names
+
+
+def workbook_cells(source):
+    """Read a saved workbook's cells as ``{sheet: {coordinate: value}}``; formulas stay text."""
+    return read_workbook(source)[0]
+
+
+def formula_functions(formula):
+    """Names of the functions a formula calls, in upper case."""
+    return {token.value[:-1].upper() for token in Tokenizer(formula).items
+            if token.type == Token.FUNC and token.subtype == Token.OPEN}
+
+
+def volatile_cells(source):
+    """List ``(sheet, coordinate, functions)`` for formulas that call volatile functions.
+
+    ``source`` is a saved workbook (path, bytes or binary file object) or a
+    ``{sheet: {coordinate: value}}`` dict.
+    """
+    cells = source if isinstance(source, dict) else workbook_cells(source)
+    found = []
+    for sheet, sheet_cells in cells.items():
+        for coordinate, value in sheet_cells.items():
+            if isinstance(value, str) and value.startswith('=') and len(value) > 1:
+                functions = formula_functions(value) & VOLATILE_FUNCTIONS
+                if functions:
+                    found.append((sheet, coordinate, sorted(functions)))
+    return found
+
+
+def cacheable(results):
+    """Drop error results, leaving values that can be stored as cached values."""
+    return {sheet: {coordinate: value for coordinate, value in cells.items()
+                    if not isinstance(value, FormulaError)}
+            for sheet, cells in results.items()}
+
+
+def precompute_values(filename):
+    """Evaluate a saved workbook's formulas and store the results in the file.
+
+    ``filename`` is a path or a seekable binary file object open for reading
+    and writing.
+
+    Returns the results as ``{sheet: {coordinate: value}}``.
+    """
+    if hasattr(filename, 'seek'):
+        filename.seek(0)
+    results = Evaluator.from_file(filename).evaluate()
+    inject_cached_values(filename, cacheable(results))
+    return results
@@ -0,0 +1,217 @@
+"""Per-phase timing and memory instrumentation.
+
+Generators mark their phases (workbook creation, each sheet, saving) with
+``phase``, used either as a context manager or as a decorator. While a
+``Profiler`` is active each phase records its wall time, CPU time, peak
+memory traced by ``tracemalloc`` and the process's maximum resident set size;
+otherwise ``phase`` does nothing beyond one global lookup.
+
+A profiler is activated explicitly with ``profiling()`` (the runner does this
+for in-process builds) or by setting the ``REXL_PROFILE`` environment variable
+to a directory: the outermost phase of each run then writes its JSON report
+there, which covers scripts run as standalone programs.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Directory for reports of runs profiled through the environment
+PROFILE_ENV = 'REXL_PROFILE'
+
+# Profiler collecting phases in this process, if any
+_active = None
+
+
+def max_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+class Profiler:
+    """Collects the phases of one run."""
+
+    def __init__(self, name, trace_memory=True):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.phases = []
+        self._stack = []
+        self._owns_tracing = False
+        self._started = None
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._started = datetime.now()
+        self.enter(self.name)
+
+    def stop(self):
+        self.exit()
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def _fold_peak(self):
+        """Credit the traced peak since the last check to every open phase."""
+        if not self.trace_memory:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self._stack:
+            record['peak_traced_bytes'] = max(record['peak_traced_bytes'], peak)
+        tracemalloc.reset_peak()
+
+    def enter(self, name):
+        self._fold_peak()
+        path = '/'.join([record['path'] for record in self._stack[-1:]] + [name])
+        record = {
+            'name': name,
+            'path': path,
+            'depth': len(self._stack),
+            'wall_s': time.perf_counter(),
+            'cpu_s': time.process_time(),
+            'peak_traced_bytes': tracemalloc.get_traced_memory()[0] if self.trace_memory else None,
+            'max_rss_kb': None
+        }
+        self.phases.append(record)
+        self._stack.append(record)
+
+    def exit(self):
+        self._fold_peak()
+        record = self._stack.pop()
+        record['wall_s'] = time.perf_counter() - record['wall_s']
+        record['cpu_s'] = time.process_time() - record['cpu_s']
+        record['max_rss_kb'] = max_rss_kb()
+
+    def report(self):
+        """The run as a JSON-serializable dict; the first phase is the whole run."""
+        run = self.phases[0] if self.phases else {}
+        return {
+            'name': self.name,
+            'pid': os.getpid(),
+            'started': self._started.isoformat(timespec='seconds') if self._started else None,
+            'wall_s': run.get('wall_s'),
+            'cpu_s': run.get('cpu_s'),
+            'peak_traced_bytes': run.get('peak_traced_bytes'),
+            'max_rss_kb': run.get('max_rss_kb'),
+            'phases': self.phases[1:]
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+@contextlib.contextmanager
+def profiling(name, trace_memory=True):
+    """Profile the phases run inside the block; yields the ``Profiler``."""
+    global _active
+    previous = _active
+    profiler = _active = Profiler(name, trace_memory)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = previous
+
+
+class phase(contextlib.ContextDecorator):
+    """Mark a phase of a run: ``with phase('save'):`` or ``@phase()``.
+
+    Used as a decorator without a name, the phase is named after the function.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._profiler = None
+        self._owned = False
+
+    def __call__(self, func):
+        if self.name is None:
+            self.name = func.__name__
+        return super().__call__(func)
+
+    def _recreate_cm(self):
+        # Each call of a decorated function gets its own state
+        return phase(self.name)
+
+    def __enter__(self):
+        global _active
+        if _active is None:
+            if not os.environ.get(PROFILE_ENV):
+                return self
+            # Outermost phase of a run profiled through the environment; the
+            # run is named after the script, as the runner names its runs
+            _active = Profiler(os.path.basename(sys.argv[0]) or self.name)
+            _active.start()
+            self._owned = True
+        self._profiler = _active
+        self._profiler.enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return False
+        profiler.exit()
+        if self._owned:
+            self._owned = False
+            profiler.stop()
+            _active = None
+            directory = os.environ[PROFILE_ENV]
+            os.makedirs(directory, exist_ok=True)
+            profiler.write(os.path.join(directory, f"{profiler.name}-{os.getpid()}-{time.time_ns()}.json"))
+        return False
+
+
+def load_reports(directory):
+    """Read the JSON reports written to ``directory`` through ``REXL_PROFILE``."""
+    reports = []
+    if os.path.isdir(directory):
+        for file in sorted(os.listdir(directory)):
+            if file.endswith('.json'):
+                with open(os.path.join(directory, file)) as f:
+                    reports.append(json.load(f))
+    return reports
+
+
+def aggregate(reports):
+    """Combine run reports into per-phase totals, keyed by phase path.
+
+    Wall and CPU times are summed over every occurrence of a phase; memory
+    figures are the largest seen.
+    """
+    phases = {}
+    for report in reports:
+        for record in report['phases']:
+            total = phases.setdefault(record['path'], {
+                'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_traced_bytes': None, 'max_rss_kb': None
+            })
+            total['count'] += 1
+            total['wall_s'] += record['wall_s']
+            total['cpu_s'] += record['cpu_s']
+            for key in ('peak_traced_bytes', 'max_rss_kb'):
+                if record[key] is not None:
+                    total[key] = max(total[key] or 0, record[key])
+    return {
+        'runs': len(reports),
+        'wall_s': sum(report['wall_s'] or 0 for report in reports),
+        'cpu_s': sum(report['cpu_s'] or 0 for report in reports),
+        'max_rss_kb': max((report['max_rss_kb'] or 0 for report in reports), default=None),
+        'phases': phases
+    }
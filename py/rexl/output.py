@@ -0,0 +1,37 @@
+"""Where generated workbooks go.
+
+Every generator's ``filename`` is either a path or a writable binary file
+object, so a workbook can be written straight into a response body or an
+upload stream. ``workbook_bytes`` runs a generator into memory and returns
+the finished file without touching the disk.
+"""
+
+import io
+
+
+def is_stream(target):
+    """True when ``target`` is a file object rather than a path."""
+    return hasattr(target, 'write')
+
+
+def describe(target):
+    """Name of an output target for progress messages."""
+    if is_stream(target):
+        name = getattr(target, 'name', None)
+        return name if isinstance(name, str) else f"<{type(target).__name__}>"
+    return str(target)
+
+
+def workbook_bytes(generate, *args, output_name=None, **kwargs):
+    """Run ``generate(filename=<buffer>, ...)`` and return the workbook it wrote.
+
+    ``output_name`` is where the caller will save the bytes; the buffer takes
+    it as its name, so the generator's messages show that path. Returns
+    ``b''`` when the generator wrote nothing, as generators that report
+    failures by printing do.
+    """
+    buffer = io.BytesIO()
+    if output_name is not None:
+        buffer.name = str(output_name)
+    generate(*args, filename=buffer, **kwargs)
+    return buffer.getvalue()
@@ -0,0 +1,305 @@
+"""Direct SpreadsheetML writer.
+
+``RawWorkbook`` writes worksheet XML as plain text straight into the xlsx zip
+instead of building openpyxl Cell objects and serializing them element by
+element. Rows are streamed to a temporary file as they are appended, so
+memory stays flat, and each cell costs one string format.
+
+openpyxl is still used for the parts that occur once per workbook or sheet:
+the stylesheet (named styles and per-cell formats resolve to the same style
+indices openpyxl would use), column widths, merged cells, data validation,
+conditional formatting, charts and the package manifest. Sheets are normally
+driven through ``rexl.streaming.SheetWriter``, which supplies cell addressing
+on top of ``append()``.
+"""
+
+import datetime
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import Cell
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.packaging.extended import ExtendedProperties
+from openpyxl.packaging.manifest import Manifest
+from openpyxl.packaging.relationship import Relationship, RelationshipList, get_rels_path
+from openpyxl.styles.differential import DifferentialStyle
+from openpyxl.styles.stylesheet import write_stylesheet
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import MultiCellRange
+from openpyxl.worksheet.datavalidation import DataValidationList
+from openpyxl.worksheet.dimensions import ColumnDimension, DimensionHolder
+from openpyxl.writer.theme import theme_xml
+from openpyxl.xml.constants import (
+    ARC_APP, ARC_CORE, ARC_ROOT_RELS, ARC_STYLE, ARC_THEME, ARC_WORKBOOK,
+    ARC_WORKBOOK_RELS, PKG_REL_NS, REL_NS, SHEET_MAIN_NS, WORKSHEET_TYPE, XLSX
+)
+from openpyxl.xml.functions import tostring
+
+from rexl.xlsxpatch import format_cached_value
+
+# Prefix of the relationship types between package parts
+OFFICE_REL_TYPE = REL_NS + "/"
+
+# Date and time values are converted to serial numbers like any other number
+TIME_TYPES = (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)
+
+
+def cell_xml(coordinate, value, style_id=0):
+    """Return the XML for one cell; strings starting with '=' are formulas."""
+    style = f' s="{style_id}"' if style_id else ''
+    if value is None:
+        return f'<c r="{coordinate}"{style}/>' if style else ''
+    if isinstance(value, str):
+        if len(value) > 1 and value.startswith('='):
+            return f'<c r="{coordinate}"{style}><f>{escape(value[1:])}</f><v/></c>'
+        space = ' xml:space="preserve"' if value != value.strip() else ''
+        return f'<c r="{coordinate}"{style} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    cell_type, text = format_cached_value(value)
+    return f'<c r="{coordinate}"{style}{cell_type}><v>{text}</v></c>'
+
+
+class _Part:
+    """Package part for the manifest: a path and a content type."""
+
+    def __init__(self, path, mime_type):
+        self.path = path
+        self.mime_type = mime_type
+
+
+class RawWorksheet:
+    """A worksheet whose rows are written as XML text as they are appended.
+
+    The attributes mirror openpyxl's write-only worksheet closely enough for
+    ``SheetWriter``, openpyxl charts and ``Reference`` to work with it.
+    """
+
+    def __init__(self, workbook, title):
+        self.workbook = workbook
+        # openpyxl cells and style bookkeeping look for the workbook here
+        self.parent = workbook.style_book
+        self.title = title
+        self.column_dimensions = DimensionHolder(worksheet=self, default_factory=lambda: ColumnDimension(self))
+        self.conditional_formatting = ConditionalFormattingList()
+        self.data_validations = DataValidationList()
+        self.merged_cells = MultiCellRange()
+        self._charts = []
+        self._rows = tempfile.TemporaryFile()
+        self._row = 0
+        self._max_column = 0
+
+    def add_chart(self, chart, anchor=None):
+        if anchor is not None:
+            chart.anchor = anchor
+        self._charts.append(chart)
+
+    def append(self, values, styles=None, number_formats=None):
+        """Write ``values`` as the next row.
+
+        Entries may be plain values or openpyxl cells. For plain values,
+        ``styles`` and ``number_formats`` are optional sequences aligned with
+        ``values`` giving a named style and a number format for each cell.
+        """
+        self._row += 1
+        row = self._row
+        cells = []
+        for index, value in enumerate(values):
+            if value is None:
+                continue
+            coordinate = f'{get_column_letter(index + 1)}{row}'
+            if isinstance(value, Cell):
+                style_id = value.style_id if value.has_style else 0
+                value = value.value
+            else:
+                style = styles[index] if styles is not None else None
+                number_format = number_formats[index] if number_formats is not None else None
+                style_id = self.workbook.style_id(self, style, number_format, isinstance(value, TIME_TYPES))
+            cells.append(cell_xml(coordinate, value, style_id))
+            self._max_column = max(self._max_column, index + 1)
+        if cells:
+            self._rows.write(f'<row r="{row}">{"".join(cells)}</row>'.encode('utf-8'))
+
+    def _write(self, archive, index, drawing_path=None, selected=False):
+        """Write the worksheet part, streaming the buffered rows into it."""
+        with archive.open(f'xl/worksheets/sheet{index}.xml', 'w') as part:
+            write = lambda text: part.write(text.encode('utf-8'))
+            write(f'<worksheet xmlns="{SHEET_MAIN_NS}" xmlns:r="{REL_NS}">')
+            if self._row and self._max_column:
+                write(f'<dimension ref="A1:{get_column_letter(self._max_column)}{self._row}"/>')
+            selected = ' tabSelected="1"' if selected else ''
+            write(f'<sheetViews><sheetView{selected} workbookViewId="0"/></sheetViews>')
+            write('<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>')
+            cols = self.column_dimensions.to_tree()
+            if cols is not None:
+                write(tostring(cols).decode('utf-8'))
+
+            write('<sheetData>')
+            self._rows.seek(0)
+            shutil.copyfileobj(self._rows, part)
+            self._rows.close()
+            write('</sheetData>')
+
+            if self.merged_cells:
+                refs = ''.join(f'<mergeCell ref="{ref}"/>' for ref in sorted(str(ref) for ref in self.merged_cells))
+                write(f'<mergeCells count="{len(self.merged_cells.ranges)}">{refs}</mergeCells>')
+            no_dxf = DifferentialStyle()
+            for formatting in self.conditional_formatting:
+                for rule in formatting.rules:
+                    if rule.dxf and rule.dxf != no_dxf:
+                        rule.dxfId = self.parent._differential_styles.add(rule.dxf)
+                write(tostring(formatting.to_tree()).decode('utf-8'))
+            if self.data_validations:
+                write(tostring(self.data_validations.to_tree()).decode('utf-8'))
+            write('<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>')
+            if drawing_path is not None:
+                write('<drawing r:id="rId1"/>')
+            write('</worksheet>')
+
+
+class RawWorkbook:
+    """A workbook written directly as SpreadsheetML; call ``save()`` once all sheets are done."""
+
+    # Rows go out as they are appended, like an openpyxl write-only workbook
+    write_only = True
+
+    def __init__(self):
+        # An empty write-only workbook holds the stylesheet; it never gets cells
+        self.style_book = openpyxl.Workbook(write_only=True)
+        self.worksheets = []
+        self._active = 0
+        # Workbook-level names, as openpyxl DefinedName objects by name
+        self.defined_names = {}
+        self._style_ids = {}
+
+    @property
+    def named_styles(self):
+        return self.style_book.named_styles
+
+    def add_named_style(self, style):
+        self.style_book.add_named_style(style)
+
+    @property
+    def sheetnames(self):
+        return [sheet.title for sheet in self.worksheets]
+
+    def __getitem__(self, title):
+        for sheet in self.worksheets:
+            if sheet.title == title:
+                return sheet
+        raise KeyError(f"Worksheet {title} does not exist.")
+
+    @property
+    def active(self):
+        """The sheet selected when the workbook opens (the first by default)."""
+        return self.worksheets[self._active] if self.worksheets else None
+
+    @active.setter
+    def active(self, sheet):
+        self._active = sheet if isinstance(sheet, int) else self.worksheets.index(sheet)
+
+    def create_sheet(self, title, index=None):
+        sheet = RawWorksheet(self, title)
+        if index is None:
+            self.worksheets.append(sheet)
+        else:
+            self.worksheets.insert(index, sheet)
+        return sheet
+
+    def style_id(self, sheet, style=None, number_format=None, is_time=False):
+        """Index of the cell format for a named style and number format on ``sheet``."""
+        key = (style, number_format, is_time)
+        style_id = self._style_ids.get(key)
+        if style_id is None:
+            # Resolve the combination once through openpyxl, as a cell would
+            cell = WriteOnlyCell(sheet, value=datetime.date.today() if is_time else None)
+            if style is not None:
+                cell.style = style
+            if number_format is not None:
+                cell.number_format = number_format
+            style_id = self._style_ids[key] = cell.style_id if cell.has_style else 0
+        return style_id
+
+    def save(self, filename):
+        """Write the workbook to ``filename`` (a path or binary file object)."""
+        manifest = Manifest()
+        with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            archive.writestr(ARC_APP, tostring(ExtendedProperties().to_tree()))
+            archive.writestr(ARC_CORE, tostring(self.style_book.properties.to_tree()))
+            archive.writestr(ARC_THEME, theme_xml)
+
+            charts = 0
+            drawings = 0
+            for index, sheet in enumerate(self.worksheets, 1):
+                drawing_path = None
+                if sheet._charts:
+                    drawings += 1
+                    drawing = SpreadsheetDrawing()
+                    drawing._id = drawings
+                    drawing.charts = sheet._charts
+                    for chart in sheet._charts:
+                        charts += 1
+                        chart._id = charts
+                        archive.writestr(chart.path[1:], tostring(chart._write()))
+                        manifest.append(chart)
+                    archive.writestr(drawing.path[1:], tostring(drawing._write()))
+                    archive.writestr(get_rels_path(drawing.path)[1:], tostring(drawing._write_rels()))
+                    manifest.append(drawing)
+                    drawing_path = drawing.path
+
+                    rels = RelationshipList()
+                    rels.append(Relationship(type="drawing", Target=drawing_path))
+                    archive.writestr(f'xl/worksheets/_rels/sheet{index}.xml.rels', tostring(rels.to_tree()))
+
+                sheet._write(archive, index, drawing_path, selected=index == self._active + 1)
+                manifest.append(_Part(f'/xl/worksheets/sheet{index}.xml', WORKSHEET_TYPE))
+
+            # Written after the sheets so conditional formats are registered
+            archive.writestr(ARC_STYLE, tostring(write_stylesheet(self.style_book)))
+            archive.writestr(ARC_WORKBOOK, self._workbook_xml())
+            archive.writestr(ARC_WORKBOOK_RELS, self._workbook_rels_xml())
+            archive.writestr(ARC_ROOT_RELS, (
+                f'<Relationships xmlns="{PKG_REL_NS}">'
+                f'<Relationship Id="rId1" Type="{OFFICE_REL_TYPE}officeDocument" Target="xl/workbook.xml"/>'
+                f'<Relationship Id="rId2" Type="{PKG_REL_NS}/metadata/core-properties" Target="docProps/core.xml"/>'
+                f'<Relationship Id="rId3" Type="{OFFICE_REL_TYPE}extended-properties" Target="docProps/app.xml"/>'
+                '</Relationships>'
+            ))
+
+            manifest.append(_Part('/' + ARC_WORKBOOK, XLSX))
+            manifest._register_mimetypes(filenames=archive.namelist())
+            archive.writestr(manifest.path, tostring(manifest.to_tree()))
+        return filename
+
+    def _workbook_xml(self):
+        sheets = ''.join(
+            f'<sheet name={quoteattr(sheet.title)} sheetId="{index}" r:id="rId{index}"/>'
+            for index, sheet in enumerate(self.worksheets, 1)
+        )
+        names = ''.join(
+            f'<definedName name={quoteattr(name)}>{escape(defined.attr_text)}</definedName>'
+            for name, defined in self.defined_names.items()
+        )
+        if names:
+            names = f'<definedNames>{names}</definedNames>'
+        return (
+            f'<workbook xmlns="{SHEET_MAIN_NS}" xmlns:r="{REL_NS}">'
+            f'<workbookPr/><bookViews><workbookView activeTab="{self._active}"/></bookViews>'
+            f'<sheets>{sheets}</sheets>{names}'
+            # Formulas are stored without results, so have Excel calculate on open
+            '<calcPr calcId="124519" fullCalcOnLoad="1"/>'
+            '</workbook>'
+        )
+
+    def _workbook_rels_xml(self):
+        count = len(self.worksheets)
+        rels = [
+            f'<Relationship Id="rId{index}" Type="{OFFICE_REL_TYPE}worksheet" Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, count + 1)
+        ]
+        rels.append(f'<Relationship Id="rId{count + 1}" Type="{OFFICE_REL_TYPE}styles" Target="styles.xml"/>')
+        rels.append(f'<Relationship Id="rId{count + 2}" Type="{OFFICE_REL_TYPE}theme" Target="theme/theme1.xml"/>')
+        return f'<Relationships xmlns="{PKG_REL_NS}">{"".join(rels)}</Relationships>'
@@ -0,0 +1,113 @@
+"""Mortgage scenario grids.
+
+Evaluates every combination of interest rate, loan term and down payment in
+one set of broadcast NumPy operations, then returns the results as arrays, a
+pandas DataFrame, or a compact heatmap worksheet.
+"""
+
+import numpy as np
+from openpyxl.formatting.rule import ColorScaleRule
+from openpyxl.utils import get_column_letter
+
+from rexl.amortization import periodic_payment
+from rexl.styles import CURRENCY_WHOLE, HEADER, HEADING_1, PERCENT
+
+# Down payment share below which the calculator charges PMI
+PMI_THRESHOLD = 0.2
+
+# Grid metrics that can be shown on the heatmap, with their labels
+GRID_METRICS = {
+    'payment': "Monthly P&I",
+    'pmi': "Monthly PMI",
+    'total_monthly': "Total Monthly Payment",
+    'total_interest': "Total Interest Paid",
+    'loan_amount': "Loan Amount"
+}
+
+
+def scenario_grid(purchase_price, rates, terms, down_payments, property_tax=0,
+                  insurance=0, pmi_rate=0):
+    """Evaluate a rate x term x down payment grid for one purchase price.
+
+    ``rates`` are annual decimals, ``terms`` are in years and
+    ``down_payments`` are shares of the purchase price. Returns a dict with
+    the three axes and one array per metric in ``GRID_METRICS``, each shaped
+    ``(len(rates), len(terms), len(down_payments))``.
+    """
+    rates = np.asarray(rates, dtype=float)
+    terms = np.asarray(terms, dtype=float)
+    down_payments = np.asarray(down_payments, dtype=float)
+
+    # Broadcast the axes against each other: rate x term x down payment
+    rate = rates[:, None, None]
+    term = terms[None, :, None]
+    down = down_payments[None, None, :]
+
+    loan_amount = np.broadcast_to(purchase_price * (1 - down), (len(rates), len(terms), len(down_payments)))
+    payment = periodic_payment(loan_amount, rate, term)
+    pmi = np.where(down < PMI_THRESHOLD, loan_amount * pmi_rate / 12, 0.0)
+    total_monthly = payment + pmi + (property_tax + insurance) / 12
+    total_interest = payment * term * 12 - loan_amount
+
+    return {
+        'rates': rates,
+        'terms': terms,
+        'down_payments': down_payments,
+        'loan_amount': np.array(loan_amount),
+        'payment': payment,
+        'pmi': np.broadcast_to(pmi, loan_amount.shape).copy(),
+        'total_monthly': total_monthly,
+        'total_interest': total_interest
+    }
+
+
+def grid_to_frame(grid):
+    """Flatten a scenario grid into a long pandas DataFrame, one row per scenario."""
+    import pandas as pd
+
+    rate, term, down = np.meshgrid(grid['rates'], grid['terms'], grid['down_payments'], indexing='ij')
+    columns = {'rate': rate.ravel(), 'term': term.ravel(), 'down_payment': down.ravel()}
+    for metric in GRID_METRICS:
+        columns[metric] = grid[metric].ravel()
+    return pd.DataFrame(columns)
+
+
+def write_scenario_sheet(sheet, grid, metric='total_monthly'):
+    """Write ``grid[metric]`` to ``sheet`` (a ``SheetWriter``) as a heatmap.
+
+    The sheet's workbook must have the shared named styles registered.
+
+    Each loan term gets a block with rates down the side and down payments
+    across the top; one colour scale spans every block so the cells are
+    comparable across terms.
+    """
+    if metric not in GRID_METRICS:
+        raise ValueError(f"metric must be one of {tuple(GRID_METRICS)}, not {metric!r}")
+
+    values = grid[metric]
+    down_payments = grid['down_payments'].tolist()
+    width = len(down_payments) + 1
+    header_formats = [None] + ['0.0%'] * len(down_payments)
+    row_styles = [PERCENT] + [CURRENCY_WHOLE] * len(down_payments)
+
+    sheet.column_dimensions['A'].width = 14
+    sheet.append([f"SCENARIO GRID - {GRID_METRICS[metric].upper()}"], styles=HEADING_1)
+    sheet.append([])
+
+    ranges = []
+    row = 2
+    for term_index, term in enumerate(grid['terms'].tolist()):
+        sheet.append([f"{term:g}-Year Term"], styles=HEADER)
+        sheet.append(["Rate \\ Down"] + down_payments, styles=HEADER, number_formats=header_formats)
+        first_row = row + 3
+        for rate_index, rate in enumerate(grid['rates'].tolist()):
+            sheet.append([rate] + values[rate_index, term_index].tolist(), styles=row_styles)
+        row = first_row + len(grid['rates'])
+        ranges.append(f"B{first_row}:{get_column_letter(width)}{row - 1}")
+        sheet.append([])
+
+    sheet.conditional_formatting.add(' '.join(ranges), ColorScaleRule(
+        start_type='min', start_color='63BE7B',
+        mid_type='percentile', mid_value=50, mid_color='FFEB84',
+        end_type='max', end_color='F8696B'
+    ))
@@ -0,0 +1,98 @@
+"""Reusable workbook skeletons.
+
+Most of a generated workbook is layout that never changes between runs:
+labels, headers, formulas, styles and validation. A ``WorkbookSkeleton`` is
+built once by running a generator, keeps the saved file's zip parts in memory,
+and then writes any number of copies with only the variable cells replaced.
+Worksheets without changes are copied byte for byte, so the cost of each
+copy grows with the number of changed cells rather than with the layout.
+"""
+
+import collections
+import contextlib
+import io
+import zipfile
+
+from rexl.formulas import Evaluator, cacheable
+from rexl.output import workbook_bytes
+from rexl.xlsxpatch import patch_formula_cells, set_cell_values, sheet_parts
+
+# Skeletons built in this process, by key, most recently used last (see cached_skeleton)
+_SKELETONS = collections.OrderedDict()
+
+# Skeletons kept per process; the least recently used one is dropped beyond this
+MAX_SKELETONS = 8
+
+
+class WorkbookSkeleton:
+    """The zip parts of a saved workbook, ready to be written with new cell values."""
+
+    def __init__(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.sheets = sheet_parts(archive)
+            self.parts = [(item, archive.read(item.filename)) for item in archive.infolist()]
+        self._data = data
+        self._evaluator = None
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls(f.read())
+
+    @classmethod
+    def build(cls, build, *args, **kwargs):
+        """Run ``build(*args, filename=<buffer>, **kwargs)`` in memory and load the result.
+
+        Anything the generator prints is discarded, since the buffer it writes
+        to is never saved.
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            return cls(workbook_bytes(build, *args, **kwargs))
+
+    def evaluator(self):
+        """The skeleton's formulas, compiled on first use (see rexl.formulas)."""
+        if self._evaluator is None:
+            self._evaluator = Evaluator.from_file(self._data)
+        return self._evaluator
+
+    def write(self, filename, values=None, evaluate=False, compresslevel=None):
+        """Save a copy to ``filename`` (a path or binary file object).
+
+        ``values`` maps sheet titles to ``{coordinate: value}`` dicts; strings
+        starting with '=' are written as formulas and ``None`` clears a cell.
+        With ``evaluate`` every formula's result for these values is stored as
+        its cached value; the skeleton itself must not hold cached values.
+        ``compresslevel`` is the zip compression level (zipfile's default if None).
+        """
+        values = values or {}
+        cached = cacheable(self.evaluator().evaluate(values)) if evaluate else {}
+        patched = {self.sheets[title]: cells for title, cells in values.items()}
+        results = {self.sheets[title]: cells for title, cells in cached.items() if cells}
+        with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as target:
+            for item, data in self.parts:
+                if item.filename in patched or item.filename in results:
+                    xml = data.decode('utf-8')
+                    if item.filename in patched:
+                        xml = set_cell_values(xml, patched[item.filename])
+                    if item.filename in results:
+                        xml = patch_formula_cells(xml, results[item.filename])
+                    data = xml.encode('utf-8')
+                target.writestr(item, data, compresslevel=compresslevel)
+        return filename
+
+
+def cached_skeleton(key, build, *args, **kwargs):
+    """Return the skeleton stored under ``key``, building it on first use.
+
+    Only the ``MAX_SKELETONS`` most recently used skeletons are kept, so a
+    batch whose records need many different layouts does not hold every one
+    of them in memory.
+    """
+    skeleton = _SKELETONS.get(key)
+    if skeleton is None:
+        skeleton = _SKELETONS[key] = WorkbookSkeleton.build(build, *args, **kwargs)
+        if len(_SKELETONS) > MAX_SKELETONS:
+            _SKELETONS.popitem(last=False)
+    else:
+        _SKELETONS.move_to_end(key)
+    return skeleton
@@ -0,0 +1,183 @@
+"""Row-level worksheet writing shared by the generators.
+
+Generators lay a sheet out as a few individually addressed cells (titles,
+labels, inputs) followed by long runs of uniform rows. ``SheetWriter`` accepts
+both through one small API and writes them to either a regular worksheet or an
+openpyxl write-only worksheet. In write-only mode addressed cells are held
+until the rows above them are complete and appended rows are streamed out
+immediately, so memory stays flat however long the sheet gets. Sheets of a
+``rexl.rawxlsx.RawWorkbook`` behave like write-only sheets, but appended rows
+are handed over as plain values and never become openpyxl cells.
+"""
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+from rexl.rawxlsx import RawWorkbook, RawWorksheet
+
+# Workbook implementations a generator can write through
+BACKENDS = ("openpyxl", "raw")
+
+
+def new_workbook(backend="openpyxl", write_only=False):
+    """Create an empty workbook for ``backend``.
+
+    "openpyxl" returns a regular (or, with ``write_only``, a write-only)
+    openpyxl Workbook; "raw" returns a ``RawWorkbook``, which always streams.
+    """
+    if backend == "raw":
+        return RawWorkbook()
+    if backend != "openpyxl":
+        raise ValueError(f"backend must be one of {BACKENDS}, not {backend!r}")
+    return openpyxl.Workbook(write_only=write_only)
+
+
+class PendingCell:
+    """A cell addressed on a write-only sheet before its row has been written."""
+
+    __slots__ = ('coordinate', 'row', 'column', 'value', 'font', 'number_format',
+                 'alignment', 'fill', 'border', 'style')
+
+    def __init__(self, coordinate, row, column):
+        self.coordinate = coordinate
+        self.row = row
+        self.column = column
+        self.value = None
+        self.font = None
+        self.number_format = None
+        self.alignment = None
+        self.fill = None
+        self.border = None
+        self.style = None
+
+    def to_cell(self, sheet):
+        """Convert to a styled write-only cell for ``sheet``."""
+        cell = WriteOnlyCell(sheet, value=self.value)
+        # A named style sets every attribute, so apply it before the overrides
+        if self.style is not None:
+            cell.style = self.style
+        for attr in ('font', 'number_format', 'alignment', 'fill', 'border'):
+            value = getattr(self, attr)
+            if value is not None:
+                setattr(cell, attr, value)
+        return cell
+
+
+class SheetWriter:
+    """Write cells and formatted rows to a regular or write-only worksheet.
+
+    ``writer['A1']`` returns a cell whose value and style can be set as usual;
+    ``append()`` writes a whole row below everything written or addressed so
+    far, applying named styles and number formats as each cell is created. Call
+    ``close()`` once the sheet is complete.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.raw = isinstance(sheet, RawWorksheet)
+        self.write_only = self.raw or isinstance(sheet, WriteOnlyWorksheet)
+        self._pending = {}
+        self._written_row = 0
+        self._max_row = 0
+
+    @property
+    def title(self):
+        return self.sheet.title
+
+    @property
+    def column_dimensions(self):
+        return self.sheet.column_dimensions
+
+    @property
+    def conditional_formatting(self):
+        return self.sheet.conditional_formatting
+
+    def __getitem__(self, coordinate):
+        if not self.write_only:
+            return self.sheet[coordinate]
+
+        column_letter, row = coordinate_from_string(coordinate)
+        if row <= self._written_row:
+            raise ValueError(f"Row {row} of '{self.title}' has already been written")
+
+        column = column_index_from_string(column_letter)
+        row_cells = self._pending.setdefault(row, {})
+        cell = row_cells.get(column)
+        if cell is None:
+            cell = row_cells[column] = PendingCell(coordinate, row, column)
+            self._max_row = max(self._max_row, row)
+        return cell
+
+    def __setitem__(self, coordinate, value):
+        self[coordinate].value = value
+
+    def merge_cells(self, range_string):
+        if self.write_only:
+            self.sheet.merged_cells.add(range_string)
+        else:
+            self.sheet.merge_cells(range_string)
+
+    def add_data_validation(self, validation):
+        if self.write_only:
+            self.sheet.data_validations.append(validation)
+        else:
+            self.sheet.add_data_validation(validation)
+
+    def add_chart(self, chart, anchor=None):
+        self.sheet.add_chart(chart, anchor)
+
+    def append(self, values, styles=None, number_formats=None):
+        """Write ``values`` as the next row in a single pass.
+
+        ``styles`` is either one named style for every non-empty cell or a
+        sequence aligned with ``values``; ``number_formats`` is an aligned
+        sequence applied on top of the style. ``None`` entries leave a cell
+        unstyled or unformatted.
+        """
+        if isinstance(styles, str) or styles is None:
+            styles = [styles] * len(values)
+
+        if self.raw:
+            self._flush_rows(self._max_row)
+            self.sheet.append(values, styles, number_formats)
+            self._written_row += 1
+            self._max_row = self._written_row
+            return
+
+        row = []
+        for index, value in enumerate(values):
+            if value is None:
+                row.append(None)
+                continue
+            cell = WriteOnlyCell(self.sheet, value=value)
+            if styles[index] is not None:
+                cell.style = styles[index]
+            if number_formats is not None and number_formats[index] is not None:
+                cell.number_format = number_formats[index]
+            row.append(cell)
+
+        if self.write_only:
+            self._flush_rows(self._max_row)
+            self.sheet.append(row)
+            self._written_row += 1
+            self._max_row = self._written_row
+        else:
+            self.sheet.append(row)
+
+    def close(self):
+        """Write any cells still waiting for their row."""
+        if self.write_only:
+            self._flush_rows(self._max_row)
+
+    def _flush_rows(self, last_row):
+        """Write pending rows up to and including ``last_row`` in order."""
+        while self._written_row < last_row:
+            row_idx = self._written_row + 1
+            cells = self._pending.pop(row_idx, {})
+            row = [None] * max(cells, default=0)
+            for column, cell in cells.items():
+                row[column - 1] = cell.to_cell(self.sheet)
+            self.sheet.append(row)
+            self._written_row = row_idx
@@ -0,0 +1,51 @@
+"""Named cell styles shared by the generators.
+
+Each workbook registers these once as openpyxl ``NamedStyle`` objects and
+cells refer to them by name (``cell.style = HEADER``), so the generators do
+not build new Font/Alignment objects for every cell and ``styles.xml`` holds
+one entry per style rather than one per formatted cell.
+"""
+
+from openpyxl.styles import Alignment, Font, NamedStyle
+
+TITLE = "RExl Title"
+HEADING_1 = "RExl Heading 1"
+HEADING_2 = "RExl Heading 2"
+HEADING_3 = "RExl Heading 3"
+HEADER = "RExl Header"
+CURRENCY = "RExl Currency"
+CURRENCY_WHOLE = "RExl Currency (Whole)"
+PERCENT = "RExl Percent"
+PERCENT_SHORT = "RExl Percent (1dp)"
+DATE = "RExl Date"
+INTEGER = "RExl Integer"
+
+
+def _font(size=11, bold=False):
+    """Workbook default font (Calibri 11), optionally resized or bold."""
+    return Font(name='Calibri', family=2, scheme='minor', size=size, bold=bold)
+
+
+# Style name -> NamedStyle attributes
+STYLE_DEFINITIONS = {
+    TITLE: {'font': _font(16, bold=True), 'alignment': Alignment(horizontal='center')},
+    HEADING_1: {'font': _font(16, bold=True)},
+    HEADING_2: {'font': _font(14, bold=True)},
+    HEADING_3: {'font': _font(12, bold=True)},
+    HEADER: {'font': _font(bold=True)},
+    CURRENCY: {'font': _font(), 'number_format': '$#,##0.00'},
+    CURRENCY_WHOLE: {'font': _font(), 'number_format': '$#,##0'},
+    PERCENT: {'font': _font(), 'number_format': '0.00%'},
+    PERCENT_SHORT: {'font': _font(), 'number_format': '0.0%'},
+    DATE: {'font': _font(), 'number_format': 'mm/dd/yyyy'},
+    INTEGER: {'font': _font(), 'number_format': '0'}
+}
+
+
+def register_styles(wb):
+    """Add the shared named styles to ``wb``; safe to call more than once."""
+    existing = set(wb.named_styles)
+    for name, attributes in STYLE_DEFINITIONS.items():
+        if name not in existing:
+            wb.add_named_style(NamedStyle(name=name, **attributes))
+    return wb
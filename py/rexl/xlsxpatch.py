@@ -0,0 +1,270 @@
+"""Post-process saved workbooks at the zip/XML level.
+
+openpyxl writes formulas without cached results, so anything that reads the
+file without recalculating (pandas, ``load_workbook(data_only=True)``,
+previewers) sees empty cells. ``inject_cached_values`` adds those results to
+a saved workbook. It rewrites the worksheet XML that openpyxl produces and is
+not meant as a general-purpose SpreadsheetML editor. ``set_cell_values``
+overwrites plain cells the same way, which lets a saved workbook serve as a
+template for others. ``compact_workbook`` shrinks a saved workbook by storing
+runs of repeated formulas as Excel shared formulas and recompressing it.
+"""
+
+import datetime
+import io
+import numbers
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.formula.translate import Translator
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+from openpyxl.utils.datetime import to_excel
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+# A formula cell as openpyxl writes it, <c r="B4" s="3"><f>...</f><v /></c>, or
+# as part of a shared formula: <f t="shared" ref="B4:B9" si="0">...</f> or <f t="shared" si="0"/>
+FORMULA_CELL = re.compile(r'<c r="([A-Z]+[0-9]+)"([^>]*)>(<f>[^<]*</f>|<f [^>]*/>|<f [^>]*>[^<]*</f>)<v\s*/></c>')
+
+# A formula cell that is not shared yet, up to the end of its formula
+PLAIN_FORMULA = re.compile(r'<c r="([A-Z]+)([0-9]+)"([^>]*)><f>([^<]*)</f>')
+SHARED_INDEX = re.compile(r'<f [^>]*\bsi="([0-9]+)"')
+
+# zip compression level of compacted workbooks (zipfile's default is 6)
+COMPACT_COMPRESSLEVEL = 9
+
+# Worksheet rows and cells, empty (<row r="2"/>) or with content
+SHEET_DATA = re.compile(r'<sheetData\s*/>|<sheetData>(.*?)</sheetData>', re.S)
+ROW = re.compile(r'<row r="([0-9]+)"[^>]*?(?:/>|>.*?</row>)', re.S)
+CELL = re.compile(r'<c r="([A-Z]+)[0-9]+"([^>]*?)(?:/>|>.*?</c>)', re.S)
+STYLE_ATTRIBUTE = re.compile(r' s="[0-9]+"')
+
+
+def sheet_parts(archive):
+    """Map worksheet titles to their part names inside an open xlsx zip."""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{{{PACKAGE_REL_NS}}}Relationship')}
+
+    parts = {}
+    for sheet in workbook.iter(f'{{{MAIN_NS}}}sheet'):
+        target = targets[sheet.get(f'{{{REL_NS}}}id')]
+        if target.startswith('/'):
+            part = target[1:]
+        else:
+            part = posixpath.normpath(posixpath.join('xl', target))
+        parts[sheet.get('name')] = part
+    return parts
+
+
+def format_cached_value(value):
+    """Return ``(type attribute, <v> text)`` for a cached formula result."""
+    if isinstance(value, bool):
+        return ' t="b"', '1' if value else '0'
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return '', repr(to_excel(value))
+    # numbers.* also covers NumPy scalars, whose repr is not a plain number
+    if isinstance(value, numbers.Integral):
+        return '', str(int(value))
+    if isinstance(value, numbers.Real):
+        return '', repr(float(value))
+    return ' t="str"', escape(str(value))
+
+
+def patch_formula_cells(xml, values):
+    """Fill in cached values for the formula cells of one worksheet's XML."""
+    def replace(match):
+        coordinate, attributes, formula = match.groups()
+        if coordinate not in values or values[coordinate] is None:
+            return match.group(0)
+        cell_type, text = format_cached_value(values[coordinate])
+        return f'<c r="{coordinate}"{attributes}{cell_type}>{formula}<v>{text}</v></c>'
+
+    return FORMULA_CELL.sub(replace, xml)
+
+
+def format_cell(coordinate, style, value):
+    """Return the XML for one cell; strings starting with '=' become formulas."""
+    if value is None:
+        return f'<c r="{coordinate}"{style}/>' if style else ''
+    if isinstance(value, str):
+        if value.startswith('='):
+            return f'<c r="{coordinate}"{style}><f>{escape(value[1:])}</f><v/></c>'
+        return f'<c r="{coordinate}"{style} t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+    cell_type, text = format_cached_value(value)
+    return f'<c r="{coordinate}"{style}{cell_type}><v>{text}</v></c>'
+
+
+def set_cell_values(xml, values):
+    """Overwrite cells in one worksheet's XML, keeping each cell's style.
+
+    ``values`` maps coordinates to new values; cells and rows that do not
+    exist yet are added in order. Only the rows being changed are parsed.
+    """
+    by_row = {}
+    for coordinate, value in values.items():
+        column, row = coordinate_from_string(coordinate)
+        by_row.setdefault(row, {})[column_index_from_string(column)] = (coordinate, value)
+
+    def patch_row(row, row_xml):
+        cells = {}
+        if row_xml is not None:
+            for match in CELL.finditer(row_xml):
+                cells[column_index_from_string(match.group(1))] = (match.group(0), match.group(2))
+            opening = row_xml[:row_xml.index('>') + 1].replace('/>', '>')
+        else:
+            opening = f'<row r="{row}">'
+        for column, (coordinate, value) in by_row[row].items():
+            style = STYLE_ATTRIBUTE.search(cells.get(column, ('', ''))[1])
+            cells[column] = (format_cell(coordinate, style.group(0) if style else '', value), '')
+        return opening + ''.join(cells[column][0] for column in sorted(cells)) + '</row>'
+
+    def patch_sheet_data(match):
+        rows = []
+        for row_match in ROW.finditer(match.group(1) or ''):
+            row = int(row_match.group(1))
+            row_xml = row_match.group(0)
+            rows.append((row, patch_row(row, row_xml) if row in by_row else row_xml))
+        existing = {row for row, _ in rows}
+        rows.extend((row, patch_row(row, None)) for row in by_row if row not in existing)
+        rows.sort(key=lambda item: item[0])
+        return '<sheetData>' + ''.join(row_xml for _, row_xml in rows) + '</sheetData>'
+
+    return SHEET_DATA.sub(patch_sheet_data, xml, count=1)
+
+
+def share_formulas(xml):
+    """Store runs of repeated formulas in one worksheet's XML as shared formulas.
+
+    A run is a block of consecutive rows in one column where every formula is
+    the first one moved down, as when a formula is filled down in Excel. Only
+    the first cell of a run keeps the formula text; relative references in
+    the others follow from their position, so formulas that point at fixed
+    cells need absolute references or defined names to be shared.
+    """
+    columns = {}
+    for match in PLAIN_FORMULA.finditer(xml):
+        column, row = match.group(1), int(match.group(2))
+        columns.setdefault(column, []).append((row, match))
+
+    # Cell XML start offset -> (end offset, replacement XML)
+    replacements = {}
+    index = max((int(si) for si in SHARED_INDEX.findall(xml)), default=-1) + 1
+    for column, cells in columns.items():
+        start = 0
+        while start < len(cells):
+            row, match = cells[start]
+            formula = unescape(match.group(4))
+            translator = Translator('=' + formula, f'{column}{row}')
+            end = start + 1
+            while end < len(cells) and cells[end][0] == row + end - start and \
+                    unescape(cells[end][1].group(4)) == translator.translate_formula(f'{column}{cells[end][0]}')[1:]:
+                end += 1
+
+            if end - start > 1:
+                last_row = cells[end - 1][0]
+                replacements[match.start()] = (match.end(), (
+                    f'<c r="{column}{row}"{match.group(3)}>'
+                    f'<f t="shared" ref="{column}{row}:{column}{last_row}" si="{index}">{match.group(4)}</f>'))
+                for _, child in cells[start + 1:end]:
+                    replacements[child.start()] = (child.end(), (
+                        f'<c r="{child.group(1)}{child.group(2)}"{child.group(3)}><f t="shared" si="{index}"/>'))
+                index += 1
+            start = end
+
+    if not replacements:
+        return xml
+    parts = []
+    position = 0
+    for offset in sorted(replacements):
+        end, replacement = replacements[offset]
+        parts.append(xml[position:offset])
+        parts.append(replacement)
+        position = end
+    parts.append(xml[position:])
+    return ''.join(parts)
+
+
+def _rewrite(filename, copy):
+    """Replace a saved workbook with the one ``copy(source, target)`` writes from it.
+
+    ``filename`` is a path or a seekable binary file object open for reading
+    and writing, which is rewritten in place.
+    """
+    if hasattr(filename, 'write'):
+        filename.seek(0)
+        rewritten = io.BytesIO()
+        copy(filename, rewritten)
+        filename.seek(0)
+        filename.truncate()
+        filename.write(rewritten.getvalue())
+        return
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+    os.close(fd)
+    try:
+        copy(filename, temp_path)
+        shutil.move(temp_path, filename)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def inject_cached_values(filename, values):
+    """Store cached results for formula cells in a saved workbook.
+
+    ``values`` maps sheet titles to ``{coordinate: value}`` dicts. Only cells
+    that already hold a formula are touched; worksheets without entries are
+    copied unchanged. ``filename`` is a path or a seekable binary file object
+    open for reading and writing, which is rewritten in place.
+    """
+    _rewrite(filename, lambda source, target: copy_with_cached_values(source, target, values))
+
+
+def copy_with_cached_values(source, target, values):
+    """Copy the workbook ``source`` to ``target`` with cached results added (see inject_cached_values)."""
+    with zipfile.ZipFile(source) as archive, zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as copy:
+        parts = sheet_parts(archive)
+        patched = {parts[title]: cells for title, cells in values.items() if title in parts}
+        for item in archive.infolist():
+            data = archive.read(item.filename)
+            if item.filename in patched:
+                data = patch_formula_cells(data.decode('utf-8'), patched[item.filename]).encode('utf-8')
+            copy.writestr(item, data)
+
+
+def compact_workbook(filename, compresslevel=COMPACT_COMPRESSLEVEL):
+    """Shrink a saved workbook in place: shared formulas and a higher zip compression level.
+
+    ``filename`` is a path or a seekable binary file object open for reading
+    and writing. Returns the file's size in bytes before and after.
+    """
+    sizes = []
+
+    def copy(source, target):
+        with zipfile.ZipFile(source) as archive, zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as compacted:
+            worksheets = set(sheet_parts(archive).values())
+            for item in archive.infolist():
+                data = archive.read(item.filename)
+                if item.filename in worksheets:
+                    data = share_formulas(data.decode('utf-8')).encode('utf-8')
+                compacted.writestr(item, data, compresslevel=compresslevel)
+
+    if hasattr(filename, 'write'):
+        sizes.append(filename.seek(0, os.SEEK_END))
+        _rewrite(filename, copy)
+        sizes.append(filename.tell())
+    else:
+        sizes.append(os.path.getsize(filename))
+        _rewrite(filename, copy)
+        sizes.append(os.path.getsize(filename))
+    return tuple(sizes)
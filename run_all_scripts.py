@@ -1,9 +1,56 @@
 import os
 import sys
+import json
+import hashlib
+import platform
+import argparse
 import subprocess
 import importlib.util
 import shutil
+import tempfile
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
+from importlib import metadata
+
+# Generator entry points that can be called directly from a warm process.
+# Each entry point accepts a ``filename`` keyword for the workbook it writes
+# (a path or a binary file object);
+# scripts that are not listed here always run in their own interpreter.
+# ``requires`` lists the libraries whose versions take part in the build cache key.
+# ``params`` are passed to the entry point, and as --name value options to the
+# script's command line when it runs isolated: the budget gets a fixed seed so
+# a cached build is the budget a fresh run would write. ``dated`` generators
+# write the run date into the workbook (loan start, report dates), so their
+# cached builds are only reused on the day they were made.
+GENERATORS = {
+    'development-budget-generator.py': {
+        'entry_point': 'generate_real_estate_budget',
+        'output': 'Real_Estate_Development_Budget.xlsx',
+        'requires': ['openpyxl', 'numpy'],
+        'params': {'seed': 1},
+        'dated': True
+    },
+    'home-inspection-excel-python.py': {
+        'entry_point': 'create_home_inspection_excel',
+        'output': 'Home_Inspection_Tool.xlsx',
+        'requires': ['openpyxl']
+    },
+    'mortgage-calculator-generator.py': {
+        'entry_point': 'create_mortgage_calculator',
+        'output': 'Mortgage_Calculator.xlsx',
+        'requires': ['openpyxl', 'numpy'],
+        'dated': True
+    }
+}
+
+# Manifest of the last successful in-process build of each generator
+BUILD_CACHE_FILE = os.path.join('xl', '.build-cache.json')
+
+# Where --profile writes the per-run reports and their aggregate by default
+PROFILE_FILE = os.path.join('xl', '.profile.json')
 
 def ensure_directories():
     """Create the py and xl directories if they don't exist."""
@@ -12,67 +59,373 @@ def ensure_directories():
             os.makedirs(directory)
             print(f"Created {directory} directory")
 
-def run_all_scripts():
-    """Run all Python scripts in the py folder and output to xl folder."""
+def load_instrument():
+    """Import the shared instrumentation module from py/rexl."""
+    py_dir = os.path.abspath('py')
+    if py_dir not in sys.path:
+        sys.path.insert(0, py_dir)
+    from rexl import instrument
+    return instrument
+
+def load_output():
+    """Import the shared output helpers module from py/rexl."""
+    load_instrument()
+    from rexl import output
+    return output
+
+def load_formulas():
+    """Import the shared formula evaluator module from py/rexl."""
+    load_instrument()
+    from rexl import formulas
+    return formulas
+
+def script_arguments(script_file):
+    """Command line options giving an isolated script its registered params."""
+    params = GENERATORS.get(script_file, {}).get('params', {})
+    arguments = []
+    for name, value in params.items():
+        arguments += [f"--{name.replace('_', '-')}", str(value)]
+    return arguments
+
+def run_script(script_file, profile=False):
+    """Run a single script from the py folder and buffer its output.
+
+    With ``profile`` set the script reports its phases through the
+    REXL_PROFILE environment variable and the reports are returned in
+    ``result['profile']``.
+    """
+    script_path = os.path.abspath(os.path.join('py', script_file))
+    result = {
+        'script': script_file,
+        'returncode': None,
+        'stdout': '',
+        'stderr': '',
+        'error': None,
+        'moved': [],
+        'profile': []
+    }
+
+    # Each script gets its own scratch directory so files it drops in its
+    # working directory cannot be confused with those of a concurrent script
+    work_dir = tempfile.mkdtemp(prefix='rexl_')
+    try:
+        # Create a modified environment with XL_OUTPUT_DIR set
+        env = os.environ.copy()
+        env['XL_OUTPUT_DIR'] = os.path.abspath('xl')
+        profile_dir = os.path.join(work_dir, '.profile')
+        if profile:
+            env['REXL_PROFILE'] = profile_dir
+
+        # Run the script with the modified environment
+        completed = subprocess.run(
+            [sys.executable, script_path, *script_arguments(script_file)],
+            cwd=work_dir,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        result['returncode'] = completed.returncode
+        result['stdout'] = completed.stdout
+        result['stderr'] = completed.stderr
+
+        # Move any Excel files created in the working directory to the xl folder
+        if completed.returncode == 0:
+            for file in os.listdir(work_dir):
+                if file.endswith(('.xlsx', '.xlsm', '.xls')):
+                    shutil.move(os.path.join(work_dir, file), os.path.join('xl', file))
+                    result['moved'].append(file)
+        if profile:
+            result['profile'] = load_instrument().load_reports(profile_dir)
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return result
+
+def load_generator(script_file):
+    """Import a script from the py folder and return its registered entry point."""
+    module_name = os.path.splitext(script_file)[0].replace('-', '_')
+    module = sys.modules.get(module_name)
+
+    if module is None:
+        py_dir = os.path.abspath('py')
+        if py_dir not in sys.path:
+            sys.path.insert(0, py_dir)
+
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(py_dir, script_file))
+        module = importlib.util.module_from_spec(spec)
+        # Register before executing so the module can be pickled into worker processes
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+
+    return getattr(module, GENERATORS[script_file]['entry_point'])
+
+def run_generator(script_file, profile=False):
+    """Call a registered generator in the current process and buffer its output.
+
+    With ``profile`` set the call is profiled and its report is returned in
+    ``result['profile']``.
+    """
+    output_file = GENERATORS[script_file]['output']
+    params = GENERATORS[script_file].get('params', {})
+    output_path = os.path.abspath(os.path.join('xl', output_file))
+    result = {
+        'script': script_file,
+        'returncode': None,
+        'stdout': '',
+        'stderr': '',
+        'error': None,
+        'moved': [],
+        'profile': []
+    }
+
+    stdout, stderr = StringIO(), StringIO()
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            generator = load_generator(script_file)
+            workbook_bytes = load_output().workbook_bytes
+            if profile:
+                with load_instrument().profiling(script_file) as profiler:
+                    data = workbook_bytes(generator, output_name=output_path, **params)
+                result['profile'] = [profiler.report()]
+            else:
+                data = workbook_bytes(generator, output_name=output_path, **params)
+
+        # Generators report some failures by printing rather than raising; the
+        # workbook is built in memory, so a failed run leaves the last one in place
+        if data:
+            with open(output_path, 'wb') as f:
+                f.write(data)
+        result['returncode'] = 0 if data else 1
+    except Exception:
+        stderr.write(traceback.format_exc())
+        result['returncode'] = 1
+
+    result['stdout'] = stdout.getvalue()
+    result['stderr'] = stderr.getvalue()
+    return result
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def library_version(name):
+    """Return the installed version of a library, or None if it is missing."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+def shared_sources():
+    """List the shared modules under py/ that generators import."""
+    sources = []
+    for root, dirs, files in os.walk('py'):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        if root != 'py':
+            sources.extend(os.path.join(root, f) for f in sorted(files) if f.endswith('.py'))
+    return sources
+
+def build_cache_key(script_file):
+    """Hash everything a registered generator's output depends on."""
+    entry = GENERATORS[script_file]
+    inputs = {
+        'source': file_digest(os.path.join('py', script_file)),
+        'shared': {path.replace(os.sep, '/'): file_digest(path) for path in shared_sources()},
+        'entry_point': entry['entry_point'],
+        'params': {'filename': entry['output'], **entry.get('params', {})},
+        'python': platform.python_version(),
+        'libraries': {name: library_version(name) for name in entry['requires']}
+    }
+    if entry.get('dated'):
+        inputs['date'] = datetime.now().date().isoformat()
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+def load_build_cache():
+    """Read the build cache manifest, starting fresh if it is missing or unreadable."""
+    try:
+        with open(BUILD_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_build_cache(cache):
+    """Write the build cache manifest next to the generated workbooks."""
+    with open(BUILD_CACHE_FILE, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+def is_cached(cache, script_file, key):
+    """Check that the recorded build matches ``key`` and its output is untouched."""
+    entry = cache.get(script_file)
+    if not entry or entry.get('key') != key:
+        return False
+
+    output_path = os.path.join('xl', GENERATORS[script_file]['output'])
+    return os.path.exists(output_path) and file_digest(output_path) == entry.get('output_sha256')
+
+def execute(script_file, isolate=False, profile=False):
+    """Run a script in-process when it is registered, otherwise in a subprocess."""
+    if not isolate and script_file in GENERATORS:
+        return run_generator(script_file, profile)
+    return run_script(script_file, profile)
+
+def report_result(result):
+    """Print the buffered output of a finished script. Returns True on success."""
+    print(f"\n{'='*60}")
+    print(f"Running: {result['script']}")
+    print(f"{'='*60}")
+
+    if result['error'] is not None:
+        print(f"Failed to execute {result['script']}: {result['error']}")
+        return False
+
+    # Print output
+    if result['stdout']:
+        print("\nOutput:")
+        print(result['stdout'])
+
+    # Check for errors
+    if result['returncode'] != 0:
+        print("\nError occurred:")
+        print(result['stderr'])
+        return False
+
+    for file in result['moved']:
+        print(f"Moved {file} to /xl directory")
+    return True
+
+def write_profile(reports, path):
+    """Save the run reports with their per-phase aggregate and print the slowest phases."""
+    summary = load_instrument().aggregate(reports)
+    with open(path, 'w') as f:
+        json.dump({'runs': reports, 'summary': summary}, f, indent=2)
+
+    print(f"\nProfile ({summary['runs']} runs, {summary['wall_s']:.2f}s wall, "
+          f"{summary['cpu_s']:.2f}s CPU, peak RSS {summary['max_rss_kb'] or 0} KiB) written to {path}")
+    slowest = sorted(summary['phases'].items(), key=lambda item: item[1]['wall_s'], reverse=True)
+    for phase_path, total in slowest[:10]:
+        peak = total['peak_traced_bytes']
+        memory = f", peak {peak / 1048576:.1f} MiB traced" if peak is not None else ""
+        print(f"  {total['wall_s']:8.3f}s wall {total['cpu_s']:8.3f}s CPU  x{total['count']}  {phase_path}{memory}")
+
+def check_volatile(directory='xl'):
+    """Print every formula in the directory's workbooks that calls a volatile function.
+
+    Returns the number of volatile cells found.
+    """
+    formulas = load_formulas()
+    found = 0
+    for name in sorted(f for f in os.listdir(directory) if f.endswith('.xlsx')):
+        cells = formulas.volatile_cells(os.path.join(directory, name))
+        for sheet, coordinate, functions in cells:
+            print(f"  {name} {sheet}!{coordinate}: {', '.join(functions)}")
+        found += len(cells)
+
+    print(f"\nVolatile check: {found} volatile formula cells in {directory}")
+    return found
+
+def run_all_scripts(workers=1, isolate=False, use_cache=True, profile=None, volatile_check=False):
+    """Run all Python scripts in the py folder and output to xl folder.
+
+    Registered generators are called directly from this process unless
+    ``isolate`` is set, in which case every script gets its own interpreter.
+    With ``workers`` greater than one the scripts run concurrently; their
+    output is buffered and still reported in script order. When ``use_cache``
+    is set, registered generators whose source, parameters and library
+    versions are unchanged since their last build are skipped. ``profile`` is
+    a path for a JSON report of every script's phases; profiling implies
+    rebuilding everything. ``volatile_check`` scans the generated workbooks
+    for formulas Excel recalculates on every edit (INDIRECT, OFFSET, NOW...).
+    """
+    if profile:
+        use_cache = False
+
     # Ensure directories exist
     ensure_directories()
-    
+
     # Get list of all .py files in the py directory
-    py_files = [f for f in os.listdir('py') if f.endswith('.py')]
-    
+    py_files = sorted(f for f in os.listdir('py') if f.endswith('.py'))
+
     if not py_files:
         print("No Python scripts found in the /py directory.")
         return
-    
+
+    workers = max(1, min(workers, len(py_files)))
     print(f"Found {len(py_files)} Python scripts to execute.")
-    
+    if workers > 1:
+        print(f"Running with {workers} parallel workers.")
+
     # Process each Python file
     success_count = 0
     failed_scripts = []
-    
-    for script_file in py_files:
-        script_path = os.path.join('py', script_file)
-        print(f"\n{'='*60}")
-        print(f"Running: {script_file}")
-        print(f"{'='*60}")
-        
-        try:
-            # Create a modified environment with XL_OUTPUT_DIR set
-            env = os.environ.copy()
-            env['XL_OUTPUT_DIR'] = os.path.abspath('xl')
-            
-            # Run the script with the modified environment
-            result = subprocess.run(
-                [sys.executable, script_path],
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Print output
-            if result.stdout:
-                print("\nOutput:")
-                print(result.stdout)
-            
-            # Check for errors
-            if result.returncode != 0:
-                print("\nError occurred:")
-                print(result.stderr)
-                failed_scripts.append(script_file)
-            else:
+
+    # Work out which generators still have a valid build in the xl folder
+    cache = load_build_cache() if use_cache and not isolate else {}
+    cache_keys = {}
+    cache_hits = []
+    if use_cache and not isolate:
+        for script_file in py_files:
+            if script_file in GENERATORS:
+                cache_keys[script_file] = build_cache_key(script_file)
+                if is_cached(cache, script_file, cache_keys[script_file]):
+                    cache_hits.append(script_file)
+
+    pending = [f for f in py_files if f not in cache_hits]
+    modes = [isolate] * len(pending)
+    profiles = [bool(profile)] * len(pending)
+    if workers > 1 and isolate:
+        # Each script runs in its own interpreter, so threads are enough to
+        # keep several processes busy at once; map() yields in input order
+        executor = ThreadPoolExecutor(max_workers=workers)
+        results = executor.map(execute, pending, modes, profiles)
+    elif workers > 1:
+        # Warm worker processes import each generator once and call it directly
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(execute, pending, modes, profiles)
+    else:
+        executor = None
+        results = map(execute, pending, modes, profiles)
+    reports = []
+
+    try:
+        for script_file in py_files:
+            if script_file in cache_hits:
+                print(f"\n{'='*60}")
+                print(f"Skipping: {script_file}")
+                print(f"{'='*60}")
+                print(f"Up to date: xl/{GENERATORS[script_file]['output']} (build cache hit)")
+                success_count += 1
+                continue
+
+            result = next(results)
+            reports.extend(result['profile'])
+            if report_result(result):
                 success_count += 1
-                
-                # Move any Excel files created in the current directory to the xl folder
-                for file in os.listdir('.'):
-                    if file.endswith(('.xlsx', '.xlsm', '.xls')):
-                        shutil.move(file, os.path.join('xl', file))
-                        print(f"Moved {file} to /xl directory")
-            
-        except Exception as e:
-            print(f"Failed to execute {script_file}: {str(e)}")
-            failed_scripts.append(script_file)
-    
+                if script_file in cache_keys:
+                    output_path = os.path.join('xl', GENERATORS[script_file]['output'])
+                    cache[script_file] = {
+                        'key': cache_keys[script_file],
+                        'output_sha256': file_digest(output_path)
+                    }
+            else:
+                failed_scripts.append(result['script'])
+                cache.pop(script_file, None)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if cache_keys:
+        save_build_cache(cache)
+
     # Print summary
     print(f"\n{'='*60}")
     print(f"Execution Summary ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
@@ -80,11 +433,36 @@ def run_all_scripts():
     print(f"Total scripts: {len(py_files)}")
     print(f"Successfully executed: {success_count}")
     print(f"Failed: {len(failed_scripts)}")
-    
+    if cache_keys:
+        print(f"Build cache: {len(cache_hits)} hits, {len(cache_keys) - len(cache_hits)} misses")
+
     if failed_scripts:
         print("\nFailed scripts:")
         for script in failed_scripts:
             print(f"- {script}")
 
+    if profile:
+        write_profile(reports, profile)
+
+    if volatile_check:
+        check_volatile()
+
+def parse_args(argv=None):
+    """Parse command line options for the runner."""
+    parser = argparse.ArgumentParser(description="Generate every workbook in /xl from the scripts in /py.")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="number of scripts to run at the same time (0 = one per CPU)")
+    parser.add_argument('--isolate', action='store_true',
+                        help="run every script in its own interpreter instead of calling registered generators directly")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="rebuild every workbook even if its build cache entry is still valid")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_FILE, default=None, metavar='PATH',
+                        help=f"record per-phase time and memory and write a JSON report (default {PROFILE_FILE})")
+    parser.add_argument('--check-volatile', action='store_true',
+                        help="list formulas in the generated workbooks that use volatile functions")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    run_all_scripts()
\ No newline at end of file
+    args = parse_args()
+    run_all_scripts(workers=args.workers or os.cpu_count() or 1, isolate=args.isolate,
+                    use_cache=not args.no_cache, profile=args.profile, volatile_check=args.check_volatile)
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PY_DIR = os.path.join(ROOT, 'py')
+
+for path in (ROOT, PY_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def load_script(script_file):
+    """Import a generator script from py/ (their file names are not module names)."""
+    name = os.path.splitext(script_file)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PY_DIR, script_file))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
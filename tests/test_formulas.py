@@ -0,0 +1,145 @@
+import contextlib
+import datetime
+import io
+
+import numpy as np
+import openpyxl
+import pytest
+
+from conftest import load_script
+from rexl.formulas import Evaluator, FormulaError, precompute_values
+from rexl.output import workbook_bytes
+from rexl.amortization import schedule_rows
+
+
+def evaluate(cells, names=None, inputs=None):
+    return Evaluator({'Sheet': cells}, names).evaluate(inputs).get('Sheet', {})
+
+
+@pytest.mark.parametrize('formula, expected', [
+    ('=2+3*4^2', 50),
+    ('=(2+3)*4', 20),
+    ('=-2^2', 4),
+    ('=10-4-3', 3),
+    ('=2^3^2', 64),
+    ('=10%', 0.1),
+    ('="a"&1+1', 'a2'),
+    ('=1+1=2', True),
+    ('=3<>3', False),
+    ('=ABS(-3)', 3),
+    ('=ROUND(2.345,2)', 2.35),
+    ('=IF(AND(1=1,NOT(2=1)),"yes","no")', 'yes'),
+    ('=OR(1>2,FALSE)', False),
+    ('=MAX(1,5,3)-MIN(4,2)', 3),
+])
+def test_known_results(formula, expected):
+    assert evaluate({'A1': formula})['A1'] == pytest.approx(expected)
+
+
+def test_financial_functions():
+    results = evaluate({'A1': '=PMT(0.06/12,360,-200000)', 'A2': '=PV(0.05/12,360,-1000)',
+                        'A3': '=PMT(0,12,-1200)', 'A4': '=PMT(0.06/12,84,-200000,140000)'})
+    rate = 0.005
+    assert results['A1'] == pytest.approx(200000 * rate / (1 - (1 + rate) ** -360))
+    assert results['A2'] == pytest.approx(1000 * (1 - (1 + 0.05 / 12) ** -360) / (0.05 / 12))
+    assert results['A3'] == pytest.approx(100)
+    growth = (1 + rate) ** 84
+    assert results['A4'] == pytest.approx(rate * (200000 * growth - 140000) / (growth - 1))
+
+
+def test_edate_clamps_to_month_end():
+    results = evaluate({'A1': '=EDATE("01/31/2024",1)', 'A2': '=EDATE("01/31/2023",1)', 'A3': '=EDATE(A1,12)'})
+    assert from_serial(results['A1']) == datetime.date(2024, 2, 29)
+    assert from_serial(results['A2']) == datetime.date(2023, 2, 28)
+    assert from_serial(results['A3']) == datetime.date(2025, 2, 28)
+
+
+def from_serial(serial):
+    return datetime.date(1899, 12, 30) + datetime.timedelta(days=serial)
+
+
+def test_ranges_index_and_indirect():
+    results = evaluate({'B1': 1, 'B2': 2, 'C1': 10, 'C2': 20,
+                        'A1': '=SUM(B1:C2)', 'A2': '=INDEX(C1:C2,2)', 'A3': '=INDEX(B1:C2,2,1)',
+                        'A4': '=INDIRECT("C"&B2)', 'A5': '=INDIRECT("A1")+1'})
+    assert results == {'A1': 33, 'A2': 20, 'A3': 2, 'A4': 20, 'A5': 34}
+
+
+def test_defined_names_and_other_sheets():
+    cells = {'Inputs': {'A1': 0.05}, 'Sheet': {'A1': '=Rate*2', 'A2': '=Inputs!A1+A1'}}
+    results = Evaluator(cells, {'Rate': 'Inputs!$A$1'}).evaluate()
+    assert results['Sheet'] == {'A1': pytest.approx(0.1), 'A2': pytest.approx(0.15)}
+
+
+def test_inputs_override_constants():
+    cells = {'A1': 5, 'A2': '=A1*2'}
+    assert evaluate(cells)['A2'] == 10
+    assert evaluate(cells, inputs={'Sheet': {'A1': 7}})['A2'] == 14
+
+
+def test_errors_propagate():
+    results = evaluate({'A1': '=1/0', 'A2': '=A1+1'})
+    assert isinstance(results['A1'], FormulaError)
+    assert isinstance(results['A2'], FormulaError)
+
+
+def test_circular_references_are_left_out():
+    results = evaluate({'A1': '=A2+1', 'A2': '=A1+1', 'A3': '=2*3'})
+    assert results == {'A3': 6}
+
+
+def test_unsupported_formulas_leave_dependents_uncached():
+    results = evaluate({
+        'A1': 5,
+        'A2': '=NPV(0.1,A1,A1)',
+        'A3': '=A2+1',
+        'A4': '=XLOOKUP(1,B1:B2,C1:C2)',
+        'A5': '=A4*2',
+        'A6': '=INDIRECT("A3")',
+        'A7': '=A1*2'
+    })
+    assert results == {'A7': 10}
+
+
+def test_precompute_values_stores_cached_values():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws['A1'] = 5
+    ws['A2'] = '=A1*2'
+    ws['A3'] = '=NPV(0.1,A1)'
+    ws['A4'] = '=A3+1'
+    buffer = io.BytesIO()
+    wb.save(buffer)
+
+    precompute_values(buffer)
+    buffer.seek(0)
+    values = openpyxl.load_workbook(buffer, data_only=True).active
+    assert values['A2'].value == 10
+    assert values['A3'].value is None
+    assert values['A4'].value is None
+
+
+@pytest.fixture(scope='module')
+def mortgage():
+    return load_script('mortgage-calculator-generator.py')
+
+
+@pytest.mark.parametrize('loan', [
+    {},
+    {'loan_term': 15, 'payment_type': "Balloon"},
+    {'payment_frequency': "Biweekly", 'payment_type': "Interest Only"},
+    {'extra_payment': 200, 'lump_sums': {12: 20000}},
+    {'payment_frequency': "Accelerated Biweekly"},
+])
+@pytest.mark.parametrize('options', [{}, {'compact': True, 'non_volatile': True}])
+def test_mortgage_cached_values_match_schedule(mortgage, loan, options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = workbook_bytes(mortgage.create_mortgage_calculator, loan=loan, evaluate=True, **options)
+    sheet = openpyxl.load_workbook(io.BytesIO(data), data_only=True)['Amortization']
+    schedule = mortgage.loan_schedule({**mortgage.DEFAULT_LOAN, **loan}, datetime.date.today())
+
+    assert sheet.max_row == 3 + len(schedule['payment_number'])
+    for row, payment in enumerate(schedule_rows(schedule), 4):
+        cached = [cell.value for cell in sheet[row]][:len(payment)]
+        assert cached[1].date() == payment[1]
+        assert np.allclose(cached[:1] + cached[2:], payment[:1] + payment[2:], rtol=1e-9, atol=1e-6)
@@ -0,0 +1,42 @@
+import datetime
+import io
+
+import pytest
+
+from conftest import load_script
+from generation_service import check_params
+
+
+def test_accepts_allowed_parameters():
+    params = check_params('mortgage', {
+        'evaluate': True,
+        'loan': {'interest_rate': 0.06, 'loan_term': 15, 'lump_sums': {'12': 5000}},
+        'strategies': [{'name': "Extra", 'extra_payment': 200}]
+    })
+    assert params['loan']['lump_sums'] == {12: 5000}
+    assert check_params('budget', {'forecast_start': '2026-11-01'}) == {'forecast_start': datetime.date(2026, 11, 1)}
+
+
+@pytest.mark.parametrize('name, params', [
+    ('budget', {'cost_breakdown': '/etc/passwd'}),
+    ('budget', {'filename': 'out.xlsx'}),
+    ('budget', {'forecast_periods': 100000}),
+    ('budget', {'project_size': '100000'}),
+    ('inspection', {'template': 'areas.json'}),
+    ('inspection', {'template': {'summary_areas': ['Pool']}}),
+    ('mortgage', {'loan': {'loan_term': 45}}),
+    ('mortgage', {'loan': {'lump_sums': {'abc': 5}}}),
+    ('mortgage', {'evaluate': 'yes'}),
+    ('mortgage', {'strategies': [{'extra_payment': 100}] * 51}),
+    ('mortgage', {'scenarios': {'rates': [0.05] * 26, 'terms': [30], 'down_payments': [0.2]}}),
+])
+def test_rejects_other_parameters(name, params):
+    with pytest.raises(ValueError):
+        check_params(name, params)
+
+
+@pytest.mark.parametrize('loan', [{'payment_type': "Foo"}, {'payment_type': "Foo", 'extra_payment': 100}])
+def test_mortgage_rejects_unknown_payment_type(loan):
+    mortgage = load_script('mortgage-calculator-generator.py')
+    with pytest.raises(ValueError, match="payment_type"):
+        mortgage.create_mortgage_calculator(io.BytesIO(), loan=loan)
@@ -0,0 +1,36 @@
+import io
+from contextlib import redirect_stdout
+
+import openpyxl
+
+from conftest import load_script
+
+inspection = load_script('home-inspection-excel-python.py')
+
+DETAILS = {'property_address': "12 Elm St", 'client_name': "Pat Doe", 'square_footage': 2100}
+
+
+def build(**kwargs):
+    buffer = io.BytesIO()
+    with redirect_stdout(io.StringIO()):
+        inspection.create_home_inspection_excel(buffer, property_details=DETAILS, **kwargs)
+    buffer.seek(0)
+    return openpyxl.load_workbook(buffer)
+
+
+def cells(workbook):
+    return {(sheet.title, cell.coordinate): (cell.value, cell.style)
+            for sheet in workbook for row in sheet.iter_rows() for cell in row
+            if cell.value is not None or cell.style != 'Normal'}
+
+
+def test_raw_backend_matches_openpyxl():
+    expected, raw = build(), build(backend='raw')
+    assert raw.sheetnames == expected.sheetnames
+    assert raw.active.title == expected.active.title == 'Instructions'
+    assert cells(raw) == cells(expected)
+    for title in expected.sheetnames:
+        assert ([str(dv.sqref) for dv in raw[title].data_validations.dataValidation]
+                == [str(dv.sqref) for dv in expected[title].data_validations.dataValidation])
+        assert ({k: d.width for k, d in raw[title].column_dimensions.items()}
+                == {k: d.width for k, d in expected[title].column_dimensions.items()})